@@ -2,8 +2,9 @@ import os
 from flask import Flask
 from .extensions import db, login_manager, migrate
 from .forms import CSRFOnlyForm
+from .audit import audit_sink
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
 
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret-key")
@@ -13,10 +14,13 @@ def create_app():
         "sqlite:///oms_job_app.db"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if test_config:
+        app.config.update(test_config)
 
     db.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+    audit_sink.init_app(app)
 
     @app.context_processor
     def inject_global_forms():
@@ -28,9 +32,21 @@ def create_app():
     from .main import main_bp
     from .auth import auth_bp
     from .jobs import jobs_bp
+    from .jobs.wizard_expiry import draft_sweeper
+    from .jobs.artifacts import artifact_materialiser
+    from .jobs.probe import raw_file_hasher
+    from .jobs.run_monitor import run_monitor
+
+    draft_sweeper.init_app(app)
+    artifact_materialiser.init_app(app)
+    raw_file_hasher.init_app(app)
+    run_monitor.init_app(app)
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(jobs_bp, url_prefix="/jobs")
 
+    from .jobs.commands import worker_command
+    app.cli.add_command(worker_command)
+
     return app
\ No newline at end of file
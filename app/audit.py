@@ -0,0 +1,177 @@
+import atexit
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+ASYNC = "async"
+
+# Read-audit events: losing the tail of these on a crash is acceptable, so
+# they are written off the request path. Everything else is written in the
+# caller's transaction.
+DEFAULT_ASYNC_EVENT_TYPES = frozenset({"EXPORTED_JSON"})
+
+
+class AuditSink:
+    """
+    Front door for JobEvent writes.
+
+    SYNC events are added to the caller's db.session and commit with the
+    state change they describe. ASYNC events go onto an in-process queue, in
+    batches of at most `batch_size` rows, that a background thread drains in
+    batched inserts. At most `max_pending` rows wait in the queue; rows beyond
+    that are written straight away so nothing is dropped. Pending events are
+    flushed on interpreter shutdown.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.async_event_types = DEFAULT_ASYNC_EVENT_TYPES
+        self.enabled = False
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.max_pending = 10000
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get("AUDIT_ASYNC", not app.config.get("TESTING", False))
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", 500)
+        self.flush_interval = app.config.get("AUDIT_FLUSH_INTERVAL", 1.0)
+        self.async_event_types = frozenset(
+            app.config.get("AUDIT_ASYNC_EVENT_TYPES", DEFAULT_ASYNC_EVENT_TYPES)
+        )
+        self.max_pending = app.config.get("AUDIT_QUEUE_SIZE", 10000)
+        app.extensions["audit_sink"] = self
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def durability_for(self, event_type: str) -> str:
+        return ASYNC if event_type in self.async_event_types else SYNC
+
+    def record(
+        self,
+        job_id: int,
+        actor_user_id: Optional[int],
+        event_type: str,
+        payload_json: Any = None,
+        durability: Optional[str] = None,
+    ) -> None:
+        durability = durability or self.durability_for(event_type)
+        if durability == SYNC:
+            from .models import JobEvent
+            db.session.add(JobEvent(
+                job_id=job_id,
+                actor_user_id=actor_user_id,
+                event_type=event_type,
+                payload_json=payload_json,
+            ))
+            return
+        self.record_many([{
+            "job_id": job_id,
+            "actor_user_id": actor_user_id,
+            "event_type": event_type,
+            "payload_json": payload_json,
+            "created_at": datetime.utcnow(),
+        }])
+
+    def record_many(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Queue pre-built job_events rows (job_id, actor_user_id, event_type,
+        payload_json, created_at) for an asynchronous batched insert.
+        """
+        if not rows:
+            return
+        if not self.enabled:
+            self._write(rows)
+            return
+        self._ensure_started()
+        overflow: List[Dict[str, Any]] = []
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            with self._pending_lock:
+                if self._pending + len(batch) > self.max_pending:
+                    overflow.extend(batch)
+                    continue
+                self._pending += len(batch)
+            self._queue.put(batch)
+        if overflow:
+            logger.warning("audit queue full; writing %d events inline", len(overflow))
+            self._write(overflow)
+
+    def _take(self, block: bool, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        batch = self._queue.get(block, timeout)
+        with self._pending_lock:
+            self._pending -= len(batch)
+        return batch
+
+    def flush(self) -> None:
+        """Write everything currently queued, on the calling thread."""
+        batch: List[Dict[str, Any]] = []
+        while True:
+            try:
+                batch.extend(self._take(block=False))
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = list(self._take(block=True, timeout=self.flush_interval))
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.extend(self._take(block=False))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception("failed to write %d audit events", len(batch))
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        from .models import JobEvent
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(insert(JobEvent.__table__), rows)
+
+
+audit_sink = AuditSink()
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 jobs_bp = Blueprint("jobs", __name__)
 
-from . import routes  
\ No newline at end of file
+from . import routes, commands  
@@ -0,0 +1,172 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+from app.models.job import Job
+from app.models.oms_config import DatabaseTier, SearchEnginesMode
+
+# Footprint model. Numbers are per run, memory in MB; override any key with
+# the ADMISSION_PROFILE config dict.
+DEFAULT_PROFILE: Dict[str, Any] = {
+    # base (cpus, memory_mb) by search engine set
+    "engines": {
+        SearchEnginesMode.BASIC_COMET: (4, 8192),
+        SearchEnginesMode.MULTI_COMET_MSFRAGGER: (8, 24576),
+        SearchEnginesMode.FULL_ALL: (16, 49152),
+    },
+    # extra (cpus, memory_mb) for the largest database tier requested
+    "db_tiers": {
+        DatabaseTier.CANONICAL_ONLY: (0, 0),
+        DatabaseTier.BASIC_NON_CANONICAL: (0, 4096),
+        DatabaseTier.CANCER_BIOTYPE_SPECIFIC: (0, 8192),
+        DatabaseTier.FULL_NON_CANONICAL: (4, 24576),
+        DatabaseTier.PERSONAL_DB: (0, 8192),
+        DatabaseTier.SPECIAL_FASTA: (0, 4096),
+    },
+    # fragment index memory for the largest catalogued FASTA (see jobs/fasta.py)
+    "memory_mb_per_million_residues": 48,
+    # raw files are converted and searched up to this many at a time
+    "parallel_raw_files": 8,
+    "memory_mb_per_raw_file": 512,
+    "cpus_per_raw_file": 0.5,
+    # each enabled microproteome round widens the peptide length index
+    "memory_mb_per_micro_round": 2048,
+}
+
+
+@dataclass
+class ResourceEstimate:
+    cpus: float
+    memory_mb: int
+    parts: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {"cpus": self.cpus, "memory_mb": self.memory_mb, "parts": list(self.parts)}
+
+
+@dataclass
+class Headroom:
+    cpus_total: int
+    cpus_idle: float
+    memory_total_mb: int
+    memory_available_mb: int
+
+
+def _gb(mb: float) -> str:
+    return f"{mb / 1024:.1f} GB"
+
+
+def profile_from_config(config) -> Dict[str, Any]:
+    profile = dict(DEFAULT_PROFILE)
+    for key, value in (config.get("ADMISSION_PROFILE") or {}).items():
+        profile[key] = {**profile[key], **value} if isinstance(profile.get(key), dict) else value
+    return profile
+
+
+def estimate_job(job: Job, profile: Optional[Dict[str, Any]] = None) -> ResourceEstimate:
+    """
+    Estimate the CPUs and memory one run of `job` needs, from its search
+    engines, database tiers (and catalogued FASTA sizes), raw file count and
+    microproteome rounds. Expects the job aggregate to be loaded.
+    """
+    profile = profile or DEFAULT_PROFILE
+    engines = profile["engines"]
+    mode = job.search_config.search_engines_mode if job.search_config else SearchEnginesMode.BASIC_COMET
+    cpus, memory = engines.get(mode, engines[SearchEnginesMode.BASIC_COMET])
+    parts = [f"{mode}: {cpus} CPUs, {_gb(memory)}"]
+
+    tiers = [profile["db_tiers"].get(d.db_tier, (0, 0)) for d in job.database_requests]
+    if tiers:
+        tier_cpus, tier_memory = max(tiers, key=lambda t: (t[1], t[0]))
+        if tier_cpus or tier_memory:
+            cpus += tier_cpus
+            memory += tier_memory
+            parts.append(f"database tiers: +{tier_cpus} CPUs, +{_gb(tier_memory)}")
+    residues = max((d.fasta_catalog.total_residues for d in job.database_requests
+                    if d.fasta_catalog is not None and d.fasta_catalog.status == "OK"), default=0)
+    if residues:
+        fasta_memory = int(residues / 1e6 * profile["memory_mb_per_million_residues"])
+        memory += fasta_memory
+        parts.append(f"largest FASTA ({residues:,} residues): +{_gb(fasta_memory)}")
+
+    parallel = min(len(job.raw_files), profile["parallel_raw_files"])
+    if parallel:
+        cpus += parallel * profile["cpus_per_raw_file"]
+        memory += parallel * profile["memory_mb_per_raw_file"]
+        parts.append(f"{len(job.raw_files)} raw file(s), {parallel} at a time: "
+                     f"+{parallel * profile['cpus_per_raw_file']:g} CPUs, +{_gb(parallel * profile['memory_mb_per_raw_file'])}")
+
+    rounds = sum(1 for r in job.microproteome_rounds if r.enabled)
+    if rounds:
+        memory += rounds * profile["memory_mb_per_micro_round"]
+        parts.append(f"{rounds} microproteome round(s): +{_gb(rounds * profile['memory_mb_per_micro_round'])}")
+
+    return ResourceEstimate(cpus=float(cpus), memory_mb=int(memory), parts=parts)
+
+
+def host_headroom() -> Headroom:
+    cpus_total = psutil.cpu_count() or 1
+    try:
+        load = psutil.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = cpus_total * psutil.cpu_percent(interval=None) / 100.0
+    vm = psutil.virtual_memory()
+    return Headroom(
+        cpus_total=cpus_total,
+        cpus_idle=max(0.0, cpus_total - load),
+        memory_total_mb=vm.total // (1024 * 1024),
+        memory_available_mb=vm.available // (1024 * 1024),
+    )
+
+
+class AdmissionController:
+    """
+    Decides whether a run may start on this host now.
+
+    A run is admitted when its estimate fits both the live headroom from
+    psutil (available memory less ADMISSION_MEMORY_RESERVE_MB, idle CPUs
+    from the 1-minute load average) and what is left of the host once the
+    estimates of runs already started here are set aside; the second check
+    covers runs that have started but not yet grown to their full size.
+    When none of our runs is going on this host the next one always
+    starts: waiting only frees what our own runs hold, so background load
+    or a run larger than the host would otherwise hold the queue forever.
+    """
+
+    def __init__(self, config, headroom=host_headroom):
+        self.enabled = config.get("ADMISSION_ENABLED", True)
+        self.profile = profile_from_config(config)
+        self.memory_reserve_mb = config.get("ADMISSION_MEMORY_RESERVE_MB", 2048)
+        self.cpu_overcommit = config.get("ADMISSION_CPU_OVERCOMMIT", 1.0)
+        self.headroom = headroom
+
+    def estimate(self, job: Job) -> ResourceEstimate:
+        return estimate_job(job, self.profile)
+
+    def check(self, estimate: ResourceEstimate, running: Iterable[Tuple[float, int]]) -> Optional[str]:
+        """None if a run with `estimate` may start; otherwise why it has to wait."""
+        if not self.enabled:
+            return None
+        running = list(running)
+        if not running:
+            return None
+        host = self.headroom()
+        cpu_capacity = host.cpus_total * self.cpu_overcommit
+        memory_capacity = host.memory_total_mb - self.memory_reserve_mb
+        reserved_cpus = sum(c for c, _ in running)
+        reserved_memory = sum(m for _, m in running)
+
+        if estimate.memory_mb > host.memory_available_mb - self.memory_reserve_mb:
+            return (f"needs {_gb(estimate.memory_mb)} memory; {_gb(host.memory_available_mb)} available "
+                    f"and {_gb(self.memory_reserve_mb)} is kept free")
+        if reserved_memory + estimate.memory_mb > memory_capacity:
+            return (f"needs {_gb(estimate.memory_mb)} memory; {len(running)} running job(s) have "
+                    f"{_gb(reserved_memory)} of {_gb(memory_capacity)} reserved")
+        if reserved_cpus + estimate.cpus > cpu_capacity:
+            return (f"needs {estimate.cpus:g} CPUs; {len(running)} running job(s) have "
+                    f"{reserved_cpus:g} of {cpu_capacity:g} reserved")
+        if estimate.cpus > host.cpus_idle * self.cpu_overcommit:
+            return f"needs {estimate.cpus:g} CPUs; {host.cpus_idle:.1f} of {host.cpus_total} idle"
+        return None
+
@@ -0,0 +1,323 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.job import Job, PendingArtifact, RunDirState
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ArtifactStore:
+    """
+    Content-addressed blob store: each distinct file body is kept once under
+    `<root>/sha256/<ab>/<digest>` and hard-linked into run directories.
+    Blobs are written to a temp file and renamed into place, so concurrent
+    writers of the same content are harmless.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        # path -> (mtime_ns, size, digest), so unchanged snapshot sources are not rehashed per job
+        self._file_digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "sha256" / digest[:2] / digest
+
+    def put_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.blob_path(digest)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.chmod(tmp, 0o444)
+                os.replace(tmp, target)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        return digest
+
+    def put_file(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        with self._lock:
+            cached = self._file_digests.get(key)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size) and self.blob_path(cached[2]).exists():
+            return cached[2]
+        digest = self.put_bytes(path.read_bytes())
+        with self._lock:
+            self._file_digests[key] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def link_into(self, digest: str, dest: Path) -> str:
+        """
+        Place blob `digest` at `dest`: a hard link where the filesystem allows
+        it, otherwise a symlink, otherwise a copy. Returns which one was used.
+        """
+        blob = self.blob_path(digest)
+        if dest.exists() or dest.is_symlink():
+            dest.unlink()
+        try:
+            os.link(blob, dest)
+            return "hardlink"
+        except OSError:
+            pass
+        try:
+            os.symlink(blob, dest)
+            return "symlink"
+        except OSError:
+            shutil.copyfile(blob, dest)
+            return "copy"
+
+
+def get_artifact_store() -> ArtifactStore:
+    """The app's ArtifactStore, rooted at ARTIFACT_STORE_PATH (default <instance>/artifacts)."""
+    store = current_app.extensions.get("artifact_store")
+    if store is None:
+        root = current_app.config.get("ARTIFACT_STORE_PATH") or os.path.join(current_app.instance_path, "artifacts")
+        store = ArtifactStore(root)
+        current_app.extensions["artifact_store"] = store
+    return store
+
+
+def pipeline_paths() -> Tuple[Path, Path]:
+    repo_root = Path(current_app.root_path).parent
+    return repo_root / "pipeline" / "main.nf", repo_root / "pipeline" / "nextflow.config"
+
+
+def run_dir_for(job_id: int) -> Path:
+    return Path(current_app.instance_path) / "jobs" / str(job_id)
+
+
+def write_run_artifacts(job_id: int, profile: str, params: dict, run_dir: Optional[Path] = None) -> Path:
+    """
+    Lay out a job's run directory: params.json, run.sh and profile.txt are
+    written directly, the nextflow.config snapshot is linked from the
+    artifact store, and manifest.json records the SHA-256 of every file.
+    """
+    store = get_artifact_store()
+    run_dir = run_dir or run_dir_for(job_id)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    pipeline_path, config_path = pipeline_paths()
+    params_path = run_dir / "params.json"
+
+    files = {
+        "params.json": json.dumps(params, indent=2).encode("utf-8"),
+        "run.sh": "\n".join([
+            "#!/usr/bin/env bash",
+            "set -euo pipefail",
+            f'nextflow run "{pipeline_path}" -c "{config_path}" -profile "{profile}" -params-file "{params_path}"',
+            ""
+        ]).encode("utf-8"),
+        "profile.txt": (profile + "\n").encode("utf-8"),
+    }
+
+    manifest = {"job_id": job_id, "created_at": datetime.utcnow().isoformat(), "files": {}}
+    for name, data in files.items():
+        (run_dir / name).write_bytes(data)
+        manifest["files"][name] = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+    (run_dir / "run.sh").chmod(0o755)
+
+    digest = store.put_file(config_path)
+    manifest["files"]["nextflow.config.snapshot"] = {
+        "sha256": digest,
+        "size": config_path.stat().st_size,
+        "blob": str(store.blob_path(digest)),
+        "link": store.link_into(digest, run_dir / "nextflow.config.snapshot"),
+    }
+
+    (run_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return run_dir
+
+
+def queue_run_artifacts(job: Job, profile: str, params: dict) -> PendingArtifact:
+    """
+    Mark `job` as MATERIALISING and add its pending_artifacts row to the
+    caller's session; the run dir is written by ArtifactMaterialiser once
+    the caller has committed.
+    """
+    job.run_dir = str(run_dir_for(job.id))
+    job.run_dir_state = RunDirState.MATERIALISING
+    pending = PendingArtifact(job_id=job.id, profile=profile, params=dict(params or {}))
+    db.session.add(pending)
+    return pending
+
+
+class ArtifactMaterialiser:
+    """
+    Writes queued run directories off the request path.
+
+    pending_artifacts is the durable queue: a pool of ARTIFACT_WORKERS
+    threads claims rows (a claim expires after ARTIFACT_CLAIM_TIMEOUT
+    seconds, so rows held by a dead process are picked up again), writes the
+    run dir and then deletes the row and marks the job READY. Failures are
+    retried (one claim timeout apart) up to ARTIFACT_MAX_ATTEMPTS times
+    before the job is marked FAILED. The pool starts on the first wake(),
+    or at startup when rows are already waiting. With ARTIFACT_ASYNC off
+    (the default under TESTING) wake() materialises inline instead.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.workers = 2
+        self.poll_interval = 5.0
+        self.claim_timeout = 300
+        self.max_attempts = 5
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get("ARTIFACT_ASYNC", not app.config.get("TESTING", False))
+        self.workers = app.config.get("ARTIFACT_WORKERS", 2)
+        self.poll_interval = app.config.get("ARTIFACT_POLL_INTERVAL", 5.0)
+        self.claim_timeout = app.config.get("ARTIFACT_CLAIM_TIMEOUT", 300)
+        self.max_attempts = app.config.get("ARTIFACT_MAX_ATTEMPTS", 5)
+        app.extensions["artifact_materialiser"] = self
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+        if self.enabled:
+            self._resume_pending()
+
+    def wake(self) -> None:
+        """Call after committing new pending_artifacts rows."""
+        if not self.enabled:
+            self.drain()
+            return
+        self._ensure_started()
+        self._wakeup.set()
+
+    def drain(self) -> int:
+        """Materialise everything claimable on the calling thread. Returns the number of run dirs written."""
+        done = 0
+        while True:
+            pending_id = self._claim()
+            if pending_id is None:
+                return done
+            if self._process(pending_id):
+                done += 1
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _resume_pending(self) -> None:
+        """Start the pool now if an earlier process left rows behind (restart, crash)."""
+        try:
+            with self.app.app_context():
+                if not db.inspect(db.engine).has_table(PendingArtifact.__tablename__):
+                    return
+                left = db.session.execute(
+                    select(PendingArtifact.id).where(PendingArtifact.attempts < self.max_attempts).limit(1)
+                ).first()
+                db.session.remove()
+        except SQLAlchemyError:
+            logger.exception("could not check for pending run dirs at startup")
+            return
+        if left is not None:
+            self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._run, name=f"artifact-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("artifact worker failed")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self) -> Optional[int]:
+        table = PendingArtifact.__table__
+        with self.app.app_context():
+            now = datetime.utcnow()
+            stale = now - timedelta(seconds=self.claim_timeout)
+            claimable = (or_(table.c.claimed_at.is_(None), table.c.claimed_at < stale),
+                         table.c.attempts < self.max_attempts)
+            with db.engine.begin() as conn:
+                candidates = conn.execute(
+                    select(table.c.id, table.c.claimed_at).where(*claimable).order_by(table.c.id).limit(5)
+                ).all()
+                for pending_id, claimed_at in candidates:
+                    # compare-and-set so two workers never take the same row
+                    won = conn.execute(
+                        update(table)
+                        .where(table.c.id == pending_id,
+                               table.c.claimed_at.is_(None) if claimed_at is None else table.c.claimed_at == claimed_at)
+                        .values(claimed_at=now)
+                    ).rowcount
+                    if won:
+                        return pending_id
+        return None
+
+    def _process(self, pending_id: int) -> bool:
+        with self.app.app_context():
+            pending = db.session.get(PendingArtifact, pending_id)
+            if pending is None:
+                return False
+            job = db.session.get(Job, pending.job_id)
+            if job is None:
+                logger.warning("job %s is gone; dropping its pending run dir", pending.job_id)
+                db.session.delete(pending)
+                db.session.commit()
+                return False
+            try:
+                run_dir = write_run_artifacts(pending.job_id, pending.profile, pending.params or {},
+                                              run_dir=Path(job.run_dir) if job.run_dir else None)
+            except Exception as e:
+                logger.exception("writing run dir for job %s failed", pending.job_id)
+                db.session.rollback()
+                pending.attempts += 1
+                pending.last_error = f"{type(e).__name__}: {e}"
+                # left claimed, so the retry waits for the claim to go stale
+                if pending.attempts >= self.max_attempts:
+                    job.run_dir_state = RunDirState.FAILED
+                db.session.commit()
+                return False
+            job.run_dir = str(run_dir)
+            job.run_dir_state = RunDirState.READY
+            db.session.delete(pending)
+            db.session.commit()
+            return True
+
+
+artifact_materialiser = ArtifactMaterialiser()
@@ -0,0 +1,330 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models import (
+    Job, JobEvent, JobPriority, JobStatus, Project,
+    SearchConfig, ValidationConfig, DatabaseRequest, JobRawFile, MicroproteomeRound,
+    ProjectType, MSMode, TMTLabelType, SearchEnginesMode, DatabaseTier,
+)
+from app.jobs.probe import within_roots
+from app.jobs.status_counts import adjust_status_count
+
+# DB tiers in the same rank order as new_job_wizard.
+TIER_RANKS = {
+    DatabaseTier.CANONICAL_ONLY: 1,
+    DatabaseTier.BASIC_NON_CANONICAL: 2,
+    DatabaseTier.CANCER_BIOTYPE_SPECIFIC: 3,
+    DatabaseTier.FULL_NON_CANONICAL: 4,
+    DatabaseTier.PERSONAL_DB: 5,
+    DatabaseTier.SPECIAL_FASTA: 6,
+}
+
+VALIDATION_FLAGS = (
+    "hla_binding", "conflict_resolution_delta_score_filter", "pep_filter",
+    "two_search_engine_agreement", "pd_infrys_validation", "pepquery",
+    "rnaseq_mapping_read_quant", "immunogenicity_analysis",
+)
+
+_TRUE = {"1", "true", "yes", "y", "on", "x"}
+_FALSE = {"", "0", "false", "no", "n", "off"}
+
+
+class ManifestError(ValueError):
+    """The manifest as a whole could not be read."""
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created_job_ids: List[int] = field(default_factory=list)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "created": len(self.created_job_ids),
+            "job_ids": self.created_job_ids,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+def parse_manifest(data: str, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Rows of a manifest given as JSON (a list of objects, or {"jobs": [...]})
+    or CSV with a header row. `fmt` is "json" or "csv"; guessed when omitted.
+    """
+    fmt = fmt or ("json" if data.lstrip()[:1] in ("[", "{") else "csv")
+    if fmt == "json":
+        try:
+            doc = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise ManifestError(f"Invalid JSON manifest: {e}") from None
+        rows = doc.get("jobs") if isinstance(doc, dict) else doc
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ManifestError("JSON manifest must be a list of job objects (or {\"jobs\": [...]}).")
+        return rows
+    reader = csv.DictReader(io.StringIO(data))
+    if not reader.fieldnames:
+        raise ManifestError("CSV manifest has no header row.")
+    return [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in reader]
+
+
+def _text(row, key) -> Optional[str]:
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _flag(row, key, errors, default=False) -> bool:
+    value = row.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    errors.append(f"{key}: expected a yes/no value, got {value!r}")
+    return default
+
+
+def _list(row, key) -> List[str]:
+    """A list field: a JSON list, or a ';'-separated string ('|' and newlines also accepted)."""
+    value = row.get(key)
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    text = str(value).replace("|", ";").replace("\n", ";")
+    return [part.strip() for part in text.split(";") if part.strip()]
+
+
+def _choice(row, key, allowed, default, errors) -> str:
+    value = _text(row, key)
+    if value is None:
+        return default
+    if value not in allowed:
+        errors.append(f"{key}: {value!r} is not one of {', '.join(allowed)}")
+    return value
+
+
+def validate_row(row: Dict[str, Any],
+                 raw_file_roots: Optional[Sequence[str]] = None) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Check one manifest row and build the column values for its job and child
+    rows, applying the same rules as new_job_wizard. With `raw_file_roots`,
+    local raw file paths outside them are errors. Returns (plan, errors).
+    """
+    errors: List[str] = []
+
+    project_name = _text(row, "project_name")
+    if not project_name:
+        errors.append("project_name is required")
+
+    priority = (_text(row, "priority") or JobPriority.NORMAL).upper()
+    if priority not in JobPriority.ALL:
+        errors.append(f"priority: {priority!r} is not one of {', '.join(JobPriority.ALL)}")
+
+    tmt_label_type = _choice(row, "tmt_label_type", TMTLabelType.ALL, TMTLabelType.LF, errors)
+    tmt_plex = None
+    if _text(row, "tmt_plex"):
+        try:
+            tmt_plex = int(row["tmt_plex"])
+        except (TypeError, ValueError):
+            errors.append(f"tmt_plex: {row['tmt_plex']!r} is not a whole number")
+    if tmt_label_type != TMTLabelType.LF and not tmt_plex:
+        errors.append("tmt_plex is required when using TMT labelling")
+
+    search = {
+        "project_type": _choice(row, "project_type", ProjectType.ALL, ProjectType.IMMPEP_MHC1, errors),
+        "species": _text(row, "species") or "Human",
+        "instrument": _text(row, "instrument"),
+        "ms_mode": _choice(row, "ms_mode", MSMode.ALL, MSMode.MS2, errors),
+        "tmt_label_type": tmt_label_type,
+        "tmt_plex": tmt_plex,
+        "tmt_labelling_schema": _text(row, "tmt_labelling_schema"),
+        "carbamidomethylated": _flag(row, "carbamidomethylated", errors, default=True),
+        "additional_mods": _list(row, "additional_mods"),
+        "sample_description": _text(row, "sample_description"),
+        "search_engines_mode": _choice(row, "search_engines_mode", SearchEnginesMode.ALL,
+                                       SearchEnginesMode.BASIC_COMET, errors),
+        "additional_searches": _list(row, "additional_searches"),
+        "hla_typing_information": _text(row, "hla_typing_information"),
+    }
+
+    validation = {flag: _flag(row, flag, errors) for flag in VALIDATION_FLAGS}
+    validation["genome_mapping_tool"] = _text(row, "genome_mapping_tool")
+
+    req_text = _text(row, "db_requirements_text")
+    databases = []
+    for tier in _list(row, "db_tiers"):
+        if tier not in TIER_RANKS:
+            errors.append(f"db_tiers: {tier!r} is not one of {', '.join(DatabaseTier.ALL)}")
+            continue
+        fasta = None
+        if tier == DatabaseTier.PERSONAL_DB:
+            fasta = _text(row, "personal_fasta_location")
+            if not fasta:
+                errors.append("personal_fasta_location is required for PERSONAL_DB")
+        elif tier == DatabaseTier.SPECIAL_FASTA:
+            fasta = _text(row, "special_fasta_location")
+            if not fasta:
+                errors.append("special_fasta_location is required for SPECIAL_FASTA")
+        databases.append({
+            "db_tier": tier,
+            "rank_level": TIER_RANKS[tier],
+            "requires_rnaseq": tier == DatabaseTier.FULL_NON_CANONICAL,
+            "requirements_text": req_text,
+            "fasta_location": fasta,
+        })
+    # PepQuery needs a DB request at rank 3+; new_job_wizard disables it silently too.
+    if validation["pepquery"] and not any(d["rank_level"] >= 3 for d in databases):
+        validation["pepquery"] = False
+
+    rounds = []
+    for spec in _list(row, "micro_rounds"):
+        a, sep, b = spec.partition("-")
+        try:
+            lo, hi = int(a.strip()), int(b.strip())
+        except ValueError:
+            errors.append(f"micro_rounds: {spec!r} is not a length range like 8-13")
+            continue
+        if not sep or lo > hi:
+            errors.append(f"micro_rounds: {spec!r} is not a length range like 8-13")
+            continue
+        rounds.append({"round_name": f"{lo}-{hi}", "min_len": lo, "max_len": hi, "enabled": True})
+
+    raw_files = list(dict.fromkeys(_list(row, "raw_files")))
+    if raw_file_roots is not None:
+        errors.extend(f"raw_files: {uri!r} is outside the allowed raw file locations"
+                      for uri in raw_files if not within_roots(uri, raw_file_roots))
+
+    if errors:
+        return None, errors
+    return {
+        "project": {
+            "name": project_name,
+            "partners_text": _text(row, "project_partners"),
+            "short_description": _text(row, "short_description") or search["sample_description"],
+        },
+        "priority": priority,
+        "search": search,
+        "validation": validation,
+        "databases": databases,
+        "raw_files": raw_files,
+        "rounds": rounds,
+    }, []
+
+
+def _project_ids(plans: List[Dict[str, Any]], user_id: int, now: datetime) -> Dict[str, int]:
+    """Look up every project named in `plans` with one query and insert the missing ones."""
+    names = sorted({p["project"]["name"] for p in plans})
+    found: Dict[str, int] = {}
+    for name, pid in db.session.execute(
+        select(Project.name, Project.id).where(Project.name.in_(names)).order_by(Project.id.desc())
+    ).all():
+        found[name] = pid  # lowest id wins, like Query.first() in new_job_wizard
+
+    missing, seen = [], set()
+    for p in plans:
+        name = p["project"]["name"]
+        if name in found or name in seen:
+            continue
+        seen.add(name)
+        missing.append({
+            **p["project"],
+            "owner_user_id": user_id,
+            "created_by_user_id": user_id,
+            "created_at": now,
+        })
+    if missing:
+        ids = db.session.scalars(
+            insert(Project).returning(Project.id, sort_by_parameter_order=True), missing
+        ).all()
+        found.update({row["name"]: pid for row, pid in zip(missing, ids)})
+    return found
+
+
+def _insert_chunk(plans: List[Dict[str, Any]], user_id: int) -> List[int]:
+    now = datetime.utcnow()
+    projects = _project_ids(plans, user_id, now)
+
+    job_ids = db.session.scalars(
+        insert(Job).returning(Job.id, sort_by_parameter_order=True),
+        [{
+            "project_id": projects[p["project"]["name"]],
+            "submitted_by_user_id": user_id,
+            "status": JobStatus.SUBMITTED,
+            "priority": p["priority"],
+            "job_kind": "PRESET",
+            "content_version": 1,
+            "created_at": now,
+            "updated_at": now,
+        } for p in plans],
+    ).all()
+
+    search, validation, databases, raw_files, rounds, events = [], [], [], [], [], []
+    for job_id, p in zip(job_ids, plans):
+        search.append({"job_id": job_id, "created_at": now, "updated_at": now, **p["search"]})
+        validation.append({"job_id": job_id, "created_at": now, "updated_at": now, **p["validation"]})
+        databases.extend({"job_id": job_id, "created_at": now, **d} for d in p["databases"])
+        raw_files.extend({"job_id": job_id, "location_uri": uri, "created_at": now} for uri in p["raw_files"])
+        rounds.extend({"job_id": job_id, "created_at": now, **r} for r in p["rounds"])
+        events.append({
+            "job_id": job_id,
+            "actor_user_id": user_id,
+            "event_type": "JOB_CREATED_BULK",
+            "payload_json": {"project_name": p["project"]["name"]},
+            "created_at": now,
+        })
+
+    for model, rows in ((SearchConfig, search), (ValidationConfig, validation), (DatabaseRequest, databases),
+                        (JobRawFile, raw_files), (MicroproteomeRound, rounds), (JobEvent, events)):
+        if rows:
+            db.session.execute(insert(model), rows)
+    adjust_status_count(JobStatus.SUBMITTED, len(job_ids))
+    return list(job_ids)
+
+
+def import_manifest(rows: Iterable[Dict[str, Any]], user_id: int, chunk_size: int = 200,
+                    raw_file_roots: Optional[Sequence[str]] = None) -> ImportReport:
+    """
+    Validate every row first, then insert the valid ones `chunk_size` jobs
+    per transaction with executemany. Invalid rows, and every row of a chunk
+    whose transaction fails, are reported by 1-based row number; the rest of
+    the batch still goes in.
+    """
+    report = ImportReport()
+    valid: List[Tuple[int, Dict[str, Any]]] = []
+    for n, row in enumerate(rows, start=1):
+        report.rows += 1
+        plan, errors = validate_row(row, raw_file_roots)
+        if errors:
+            report.errors.append({"row": n, "errors": errors})
+        else:
+            valid.append((n, plan))
+
+    for i in range(0, len(valid), chunk_size):
+        chunk = valid[i:i + chunk_size]
+        try:
+            job_ids = _insert_chunk([plan for _, plan in chunk], user_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            report.errors.extend({"row": n, "errors": [f"not saved: {type(e).__name__}: {e}"]} for n, _ in chunk)
+        else:
+            report.created_job_ids.extend(job_ids)
+    report.errors.sort(key=lambda err: err["row"])
+    return report
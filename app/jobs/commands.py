@@ -0,0 +1,175 @@
+import signal
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import jobs_bp
+from ..extensions import db
+from .status_counts import rebuild_status_counts
+from .retention import run_retention
+from .wizard_expiry import sweep_expired_drafts
+from .artifacts import artifact_materialiser
+from .bulk_import import ManifestError, import_manifest, parse_manifest
+from .probe import index_mzml_files, job_raw_files, probe_job, probe_project, project_raw_files
+from .fasta import catalog_fasta_files, job_database_requests, project_database_requests
+from .runner import JobWorker
+from .run_monitor import run_monitor
+from ..models import User
+
+
+@jobs_bp.cli.command("rebuild-status-counts")
+def rebuild_status_counts_command():
+    """Recompute job_status_counts from the jobs table."""
+    counts = rebuild_status_counts()
+    db.session.commit()
+    for status in sorted(counts):
+        click.echo(f"{status}: {counts[status]}")
+    click.echo(f"Rebuilt counts for {sum(counts.values())} jobs.")
+
+
+@jobs_bp.cli.command("event-retention")
+@click.option("--older-than-days", default=90, show_default=True,
+              help="Compact high-volume events older than this many days.")
+@click.option("--chunk-size", default=200, show_default=True,
+              help="Jobs per compaction transaction (archive moves 5x this many events).")
+@click.option("--pause", default=0.05, show_default=True,
+              help="Seconds to sleep between transactions.")
+def event_retention_command(older_than_days, chunk_size, pause):
+    """Compact old audit events and move archived jobs' events to cold storage."""
+    report = run_retention(older_than_days=older_than_days, chunk_size=chunk_size, pause=pause)
+    click.echo(f"Jobs scanned: {report.jobs_scanned}")
+    click.echo(f"Events compacted: {report.events_compacted} into {report.summaries_written} summaries")
+    click.echo(f"Events archived: {report.events_archived}")
+
+
+@jobs_bp.cli.command("expire-wizard-drafts")
+@click.option("--older-than-hours", default=168, show_default=True,
+              help="Remove unsubmitted drafts not touched for this many hours.")
+@click.option("--chunk-size", default=500, show_default=True,
+              help="Drafts deleted per transaction.")
+@click.option("--pause", default=0.05, show_default=True,
+              help="Seconds to sleep between transactions.")
+@click.option("--archive-dir", type=click.Path(file_okay=False), default=None,
+              help="Append removed drafts to a gzipped JSON-lines file in this directory.")
+def expire_wizard_drafts_command(older_than_hours, chunk_size, pause, archive_dir):
+    """Delete (or archive) abandoned wizard drafts."""
+    report = sweep_expired_drafts(datetime.utcnow() - timedelta(hours=older_than_hours),
+                                  chunk_size=chunk_size, pause=pause, archive_dir=archive_dir)
+    click.echo(f"Drafts removed: {report.sessions_deleted} ({report.sessions_archived} archived)")
+    click.echo(f"Bytes reclaimed: {report.bytes_reclaimed}")
+
+
+@jobs_bp.cli.command("materialise-pending")
+def materialise_pending_command():
+    """Write every queued run directory now, on this process."""
+    done = artifact_materialiser.drain()
+    click.echo(f"Run dirs written: {done}")
+
+
+@jobs_bp.cli.command("monitor-runs")
+@click.option("--interval", default=5.0, show_default=True,
+              help="Seconds between polls of the run dirs.")
+@click.option("--once", is_flag=True, help="Poll once and exit.")
+def monitor_runs_command(interval, once):
+    """Follow .nextflow.log and trace.txt of running jobs and update their progress."""
+    if once:
+        report = run_monitor.poll()
+        click.echo(f"Jobs followed: {report.jobs_followed} ({report.jobs_updated} updated, {report.bytes_read} bytes read)")
+        for job_id, state in report.finished:
+            click.echo(f"Job {job_id}: nextflow session {state}")
+        for job_id, status in report.status_changes:
+            click.echo(f"Job {job_id}: status -> {status}")
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: run_monitor.stop())
+    run_monitor.run_forever(interval)
+
+
+@jobs_bp.cli.command("import")
+@click.argument("manifest", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--user", "user_email", required=True, help="Email of the submitting user.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "json"]), default=None,
+              help="Manifest format (guessed from the content when omitted).")
+@click.option("--chunk-size", default=200, show_default=True,
+              help="Jobs inserted per transaction.")
+def import_jobs_command(manifest, user_email, fmt, chunk_size):
+    """Create jobs in bulk from a CSV or JSON manifest."""
+    user = User.query.filter_by(email=user_email).first()
+    if user is None:
+        raise click.ClickException(f"No user with email {user_email}")
+    try:
+        rows = parse_manifest(manifest.read(), fmt)
+    except ManifestError as e:
+        raise click.ClickException(str(e))
+
+    report = import_manifest(rows, user.id, chunk_size=chunk_size)
+    for err in report.errors:
+        click.echo(f"row {err['row']}: " + "; ".join(err["errors"]), err=True)
+    click.echo(f"Rows: {report.rows}, created: {len(report.created_job_ids)}, failed: {len(report.errors)}")
+
+
+@jobs_bp.cli.command("probe-raw-files")
+@click.option("--job", "job_id", type=int, default=None, help="Probe the raw files of this job.")
+@click.option("--project", "project_id", type=int, default=None, help="Probe the raw files of every job in this project.")
+@click.option("--checksum/--no-checksum", default=False, show_default=True,
+              help="Also compute SHA-256 of files not hashed before.")
+@click.option("--workers", default=8, show_default=True, help="Parallel stat/hash threads.")
+def probe_raw_files_command(job_id, project_id, checksum, workers):
+    """Check that local raw files exist, recording size, mtime and optionally a checksum."""
+    if (job_id is None) == (project_id is None):
+        raise click.UsageError("Give exactly one of --job or --project.")
+    if job_id is not None:
+        report = probe_job(job_id, checksum=checksum, workers=workers)
+    else:
+        report = probe_project(project_id, checksum=checksum, workers=workers)
+    db.session.commit()
+    click.echo(f"Files: {report.files} (ok {report.ok}, missing {report.missing}, "
+               f"not local {report.unsupported}, errors {report.errors})")
+    click.echo(f"Cache hits: {report.cached}; hashed {report.hashed} files, {report.bytes_hashed} bytes")
+
+
+@jobs_bp.cli.command("index-mzml")
+@click.option("--job", "job_id", type=int, default=None, help="Index the mzML raw files of this job.")
+@click.option("--project", "project_id", type=int, default=None, help="Index the mzML raw files of every job in this project.")
+@click.option("--workers", default=4, show_default=True, help="Parser processes.")
+def index_mzml_command(job_id, project_id, workers):
+    """Read spectrum counts, MS levels and RT range from local mzML raw files."""
+    if (job_id is None) == (project_id is None):
+        raise click.UsageError("Give exactly one of --job or --project.")
+    raw_files = job_raw_files(job_id) if job_id is not None else project_raw_files(project_id)
+    report = index_mzml_files(raw_files, workers=workers)
+    db.session.commit()
+    click.echo(f"Files: {report.files} (ok {report.ok}, missing {report.missing})")
+    click.echo(f"mzML headers read: {report.mzml_indexed}, unchanged: {report.mzml_cached}")
+
+
+@jobs_bp.cli.command("catalog-fasta")
+@click.option("--job", "job_id", type=int, default=None, help="Catalog the FASTA files of this job's database requests.")
+@click.option("--project", "project_id", type=int, default=None, help="Catalog the FASTA files of every job in this project.")
+def catalog_fasta_command(job_id, project_id):
+    """Count sequences and residues of local FASTA files and index their headers."""
+    if (job_id is None) == (project_id is None):
+        raise click.UsageError("Give exactly one of --job or --project.")
+    requests = job_database_requests(job_id) if job_id is not None else project_database_requests(project_id)
+    report = catalog_fasta_files(requests)
+    db.session.commit()
+    click.echo(f"FASTA files: {report.files} (missing {report.missing}, not local {report.unsupported}, "
+               f"errors {report.errors}, not FASTA {report.invalid})")
+    click.echo(f"Indexed: {report.indexed}, unchanged: {report.cached}")
+
+
+# Registered on the app as `flask worker` (see create_app), not under `flask jobs`.
+@click.command("worker")
+@click.option("--slots", type=int, default=None, help="Concurrent runs (default RUNNER_SLOTS).")
+@click.option("--poll-interval", type=float, default=None, help="Seconds between queue polls (default RUNNER_POLL_INTERVAL).")
+@click.option("--once", is_flag=True, help="Exit once the queue is empty and every started run has finished.")
+@with_appcontext
+def worker_command(slots, poll_interval, once):
+    """Run queued pipeline runs (each job's run.sh) until stopped."""
+    worker = JobWorker(current_app._get_current_object(), slots=slots, poll_interval=poll_interval)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: worker.stop())
+    click.echo(f"Worker {worker.worker_id}: {worker.slots} slot(s)")
+    worker.run(once=once)
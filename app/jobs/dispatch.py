@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models.job import Job, JobEvent, JobPriority, JobStatus
+
+READY_STATUSES = (JobStatus.SUBMITTED, JobStatus.TRIAGED)
+PRIORITY_RANKS = {JobPriority.LOW: 0, JobPriority.NORMAL: 1, JobPriority.HIGH: 2, JobPriority.URGENT: 3}
+
+# Look this many event ids behind the cursor: ids are allocated before
+# commit, so a slow transaction can land an event below one already seen.
+_EVENT_OVERLAP = 200
+_IN_CHUNK = 500
+
+
+def _epoch(dt: datetime) -> float:
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+class ReadyQueue:
+    """
+    Ready jobs kept sorted by (key, job_id), with each job's key in a dict.
+    position() is a bisect and head() a slice; push() and remove() find the
+    entry by bisect and shift the list, a memmove that stays cheap for the
+    few thousand jobs that wait at once.
+    """
+
+    def __init__(self):
+        self._order: List[Tuple[float, int]] = []
+        self._keys: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self._keys
+
+    def clear(self) -> None:
+        self._order = []
+        self._keys = {}
+
+    def push(self, job_id: int, key: float) -> None:
+        old = self._keys.get(job_id)
+        if old == key:
+            return
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (old, job_id))]
+        self._keys[job_id] = key
+        bisect.insort(self._order, (key, job_id))
+
+    def remove(self, job_id: int) -> None:
+        key = self._keys.pop(job_id, None)
+        if key is not None:
+            del self._order[bisect.bisect_left(self._order, (key, job_id))]
+
+    def key(self, job_id: int) -> Optional[float]:
+        return self._keys.get(job_id)
+
+    def position(self, job_id: int) -> Optional[int]:
+        """1-based place of `job_id` in dispatch order, or None if it is not queued."""
+        key = self._keys.get(job_id)
+        if key is None:
+            return None
+        return 1 + bisect.bisect_left(self._order, (key, job_id))
+
+    def head(self, limit: int) -> List[Tuple[float, int]]:
+        return self._order[:limit]
+
+
+class Dispatcher:
+    """
+    Dispatch order over SUBMITTED/TRIAGED jobs: higher priority first, with
+    aging so a waiting job gains one priority level every DISPATCH_AGING_HOURS.
+
+    Because every waiting job ages at the same rate, the order never changes
+    with the clock alone: a job's sort key is its created_at minus
+    rank * aging interval, i.e. the time at which an URGENT job queued now
+    would stop overtaking it. The queue is kept current by tailing
+    job_events (every status, priority or creation change writes one) and
+    reloading only the jobs named there; a full reload runs every
+    DISPATCH_RESYNC_SECONDS as a backstop.
+    """
+
+    def __init__(self, aging_hours: float = 8.0, resync_seconds: float = 600.0, ignored_event_types: Iterable[str] = ()):
+        self.aging_seconds = aging_hours * 3600.0
+        self.resync_seconds = resync_seconds
+        self.ignored_event_types = tuple(ignored_event_types)
+        self.queue = ReadyQueue()
+        self._cursor: Optional[int] = None
+        # event ids already applied within the overlap window
+        self._seen_events: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def key_for(self, priority: str, created_at: datetime) -> float:
+        return _epoch(created_at) - PRIORITY_RANKS.get(priority, 1) * self.aging_seconds
+
+    def effective_priority(self, key: float, now: Optional[datetime] = None) -> float:
+        """Priority rank plus aging credit (1.0 per DISPATCH_AGING_HOURS waited)."""
+        return (_epoch(now or datetime.utcnow()) - key) / self.aging_seconds
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._cursor is None or time.monotonic() - self._loaded_at > self.resync_seconds:
+                self._reload()
+            else:
+                self._apply_events()
+
+    def position(self, job_id: int) -> Optional[Tuple[int, int]]:
+        """(position, queue length) for a ready job, else None."""
+        self.sync()
+        with self._lock:
+            pos = self.queue.position(job_id)
+            return None if pos is None else (pos, len(self.queue))
+
+    def snapshot(self, limit: int = 100) -> List[dict]:
+        self.sync()
+        now = datetime.utcnow()
+        with self._lock:
+            head = self.queue.head(limit)
+        return [
+            {"position": i, "job_id": job_id, "effective_priority": round(self.effective_priority(key, now), 3)}
+            for i, (key, job_id) in enumerate(head, start=1)
+        ]
+
+    def order(self, job_ids: Iterable[int]) -> List[int]:
+        """Sort `job_ids` into dispatch order; jobs not in the ready queue go last, oldest first."""
+        self.sync()
+        with self._lock:
+            keyed = [(self.queue.key(j), j) for j in job_ids]
+        return [j for _, j in sorted(keyed, key=lambda kj: (kj[0] is None, kj[0] or 0.0, kj[1]))]
+
+    def _reload(self) -> None:
+        self._cursor = db.session.execute(select(func.max(JobEvent.id))).scalar() or 0
+        self._seen_events = set()
+        self.queue.clear()
+        rows = db.session.execute(
+            select(Job.id, Job.priority, Job.created_at).where(Job.status.in_(READY_STATUSES))
+        ).all()
+        for job_id, priority, created_at in rows:
+            self.queue.push(job_id, self.key_for(priority, created_at))
+        self._loaded_at = time.monotonic()
+
+    def _apply_events(self) -> None:
+        q = select(JobEvent.id, JobEvent.job_id).where(JobEvent.id > self._cursor - _EVENT_OVERLAP)
+        if self.ignored_event_types:
+            q = q.where(JobEvent.event_type.notin_(self.ignored_event_types))
+        events = db.session.execute(q).all()
+        fresh = {job_id for event_id, job_id in events if event_id not in self._seen_events}
+        self._seen_events = {event_id for event_id, _ in events}
+        if not fresh:
+            return
+        self._cursor = max(self._cursor, max(event_id for event_id, _ in events))
+        job_ids = sorted(fresh)
+        seen = set()
+        for i in range(0, len(job_ids), _IN_CHUNK):
+            rows = db.session.execute(
+                select(Job.id, Job.status, Job.priority, Job.created_at).where(Job.id.in_(job_ids[i:i + _IN_CHUNK]))
+            ).all()
+            for job_id, status, priority, created_at in rows:
+                seen.add(job_id)
+                if status in READY_STATUSES:
+                    self.queue.push(job_id, self.key_for(priority, created_at))
+                else:
+                    self.queue.remove(job_id)
+        for job_id in set(job_ids) - seen:
+            self.queue.remove(job_id)
+
+
+def get_dispatcher() -> Dispatcher:
+    """The app's Dispatcher (DISPATCH_AGING_HOURS, DISPATCH_RESYNC_SECONDS)."""
+    dispatcher = current_app.extensions.get("dispatcher")
+    if dispatcher is None:
+        audit = current_app.extensions.get("audit_sink")
+        dispatcher = Dispatcher(
+            aging_hours=current_app.config.get("DISPATCH_AGING_HOURS", 8.0),
+            resync_seconds=current_app.config.get("DISPATCH_RESYNC_SECONDS", 600.0),
+            # read-audit events never change what is queued
+            ignored_event_types=audit.async_event_types if audit else (),
+        )
+        current_app.extensions["dispatcher"] = dispatcher
+    return dispatcher
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.job import Job
+from app.models.oms_config import SearchEnginesMode
+
+
+def _search_engines(mode: str | None) -> list[str]:
+    if mode == SearchEnginesMode.BASIC_COMET:
+        return ["COMET"]
+    if mode == SearchEnginesMode.MULTI_COMET_MSFRAGGER:
+        return ["COMET", "MSFRAGGER"]
+    if mode == SearchEnginesMode.FULL_ALL:
+        return ["COMET", "MSFRAGGER", "OTHER_ENGINES"]
+    return []
+
+
+def job_export_payload(job: Job) -> Dict[str, Any]:
+    """
+    Pipeline-facing JSON for one job, including the derived `pipeline_plan`.
+    Expects the job's config children to be loaded (see load_job_aggregate).
+    """
+    sc = job.search_config
+    vc = job.validation_config
+    payload = {
+        "job": {
+            "id": job.id,
+            "status": job.status,
+            "priority": job.priority,
+            "project": {"id": job.project.id, "name": job.project.name},
+            "assigned_primary_user_id": job.assigned_primary_user_id,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+        },
+        "search_config": None if not sc else {
+            "project_type": sc.project_type,
+            "species": sc.species,
+            "instrument": sc.instrument,
+            "ms_mode": sc.ms_mode,
+            "tmt_label_type": sc.tmt_label_type,
+            "tmt_plex": sc.tmt_plex,
+            "tmt_labelling_schema": sc.tmt_labelling_schema,
+            "carbamidomethylated": sc.carbamidomethylated,
+            "additional_mods": sc.additional_mods or [],
+            "sample_description": sc.sample_description,
+            "search_engines_mode": sc.search_engines_mode,
+            "additional_searches": sc.additional_searches or [],
+            "hla_typing_information": sc.hla_typing_information,
+        },
+        "raw_files": [
+            {
+                "location_uri": r.location_uri,
+                "notes": r.notes,
+                "mzml": r.probe.mzml_summary() if r.probe else None,
+            }
+            for r in job.raw_files
+        ],
+        "database_requests": [
+            {
+                "db_tier": d.db_tier,
+                "rank_level": d.rank_level,
+                "requires_rnaseq": d.requires_rnaseq,
+                "requirements_text": d.requirements_text,
+                "fasta_location": d.fasta_location,
+                "notes": d.notes,
+                "fasta": d.fasta_catalog.summary() if d.fasta_catalog else None,
+            }
+            for d in job.database_requests
+        ],
+        "microproteome_rounds": [
+            {"round_name": r.round_name, "min_len": r.min_len, "max_len": r.max_len, "enabled": r.enabled}
+            for r in job.microproteome_rounds
+        ],
+        "validation_config": None if not vc else {
+            "hla_binding": vc.hla_binding,
+            "conflict_resolution_delta_score_filter": vc.conflict_resolution_delta_score_filter,
+            "pep_filter": vc.pep_filter,
+            "two_search_engine_agreement": vc.two_search_engine_agreement,
+            "pd_infrys_validation": vc.pd_infrys_validation,
+            "pepquery": vc.pepquery,
+            "rnaseq_mapping_read_quant": vc.rnaseq_mapping_read_quant,
+            "genome_mapping_tool": vc.genome_mapping_tool,
+            "immunogenicity_analysis": vc.immunogenicity_analysis,
+            "notes": vc.notes,
+        },
+    }
+    payload["pipeline_plan"] = {
+        "search_engines": _search_engines(sc.search_engines_mode if sc else None),
+        "extra_searches": (payload.get("search_config") or {}).get("additional_searches", []),
+        "db_ranks": [d["rank_level"] for d in payload["database_requests"]],
+        "requires_rnaseq": any(d["requires_rnaseq"] for d in payload["database_requests"]),
+        "micro_rounds": payload["microproteome_rounds"],
+    }
+    return payload
+
+
+class ExportCache:
+    """
+    Bounded LRU of serialised export payloads keyed by (job_id, content_version).
+    A job edit bumps its version, so stale entries are never served; they just
+    age out.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: int, version: int) -> Optional[bytes]:
+        key = (job_id, version)
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, job_id: int, version: int, body: bytes) -> None:
+        key = (job_id, version)
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+export_cache = ExportCache()
+
+
+def export_etag(job_id: int, version: int) -> str:
+    return f"job-{job_id}-v{version}"
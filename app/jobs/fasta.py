@@ -0,0 +1,285 @@
+import mmap
+import os
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import DatabaseRequest, FastaCatalog, Job
+from app.jobs.probe import DENIED, ERROR, MISSING, OK, UNSUPPORTED, _stat, local_path, path_under_roots
+from app.jobs.repository import insert_ignoring_conflicts
+
+INVALID = "INVALID"
+
+# Bytes per pass when counting line breaks over the mapped file.
+_COUNT_CHUNK = 16 * 1024 * 1024
+DUPLICATE_SAMPLE_SIZE = 20
+# Only blank lines may precede the first header; don't search further for it.
+_PREAMBLE_LIMIT = 64 * 1024
+
+
+class FastaChanged(Exception):
+    """The file on disk no longer matches the catalogued (size, mtime)."""
+
+
+@dataclass
+class FastaReport:
+    files: int = 0
+    indexed: int = 0
+    cached: int = 0
+    invalid: int = 0
+    missing: int = 0
+    unsupported: int = 0
+    errors: int = 0
+    denied: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def _pack(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(data: bytes, typecode: str) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def scan_fasta(path: str) -> Dict[str, Any]:
+    """
+    Memory-map a FASTA file and walk its headers. Returns the sequence count,
+    total residues, duplicate ids and the packed header index (see
+    FastaCatalog). A protein id is the first word of its header line; where
+    an id repeats, the index points at its first record.
+    """
+    result: Dict[str, Any] = {
+        "status": OK,
+        "error": None,
+        "sequence_count": 0,
+        "total_residues": 0,
+        "duplicate_count": 0,
+        "duplicate_sample": None,
+        "id_blob": None,
+        "id_offsets": None,
+        "record_offsets": None,
+        "record_lengths": None,
+    }
+    ids: List[bytes] = []
+    starts = array("Q")
+    lengths = array("Q")
+    header_bytes = 0
+
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            result.update(status=INVALID, error="empty file")
+            return result
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = mm.find(b">", 0, _PREAMBLE_LIMIT)
+            if first == -1 or mm[:first].strip():
+                result.update(status=INVALID, error="does not start with a '>' header line")
+                return result
+
+            start = first
+            while start != -1:
+                nl = mm.find(b"\n", start)
+                header_end = size if nl == -1 else nl
+                nxt = mm.find(b"\n>", header_end)
+                end = size if nxt == -1 else nxt + 1
+                header = mm[start + 1:header_end]
+                words = header.split(None, 1)
+                ids.append(words[0] if words else b"")
+                starts.append(start)
+                lengths.append(end - start)
+                # ">" and the header text; its line break is counted with the others below
+                header_bytes += 1 + len(header.rstrip(b"\r"))
+                start = -1 if nxt == -1 else nxt + 1
+
+            breaks = 0
+            for offset in range(first, size, _COUNT_CHUNK):
+                chunk = mm[offset:offset + _COUNT_CHUNK]
+                breaks += chunk.count(b"\n") + chunk.count(b"\r")
+
+    result["sequence_count"] = len(ids)
+    result["total_residues"] = max(0, size - first - header_bytes - breaks)
+
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    blob = bytearray()
+    id_offsets = array("Q")
+    record_offsets = array("Q")
+    record_lengths = array("Q")
+    duplicates: List[str] = []
+    previous = None
+    for i in order:
+        pid = ids[i]
+        if not pid:
+            continue
+        if pid == previous:
+            if not duplicates or duplicates[-1] != pid.decode("utf-8", "replace"):
+                duplicates.append(pid.decode("utf-8", "replace"))
+            continue
+        previous = pid
+        id_offsets.append(len(blob))
+        blob += pid
+        record_offsets.append(starts[i])
+        record_lengths.append(lengths[i])
+    id_offsets.append(len(blob))
+
+    result["duplicate_count"] = len(duplicates)
+    result["duplicate_sample"] = duplicates[:DUPLICATE_SAMPLE_SIZE] or None
+    result["id_blob"] = bytes(blob)
+    result["id_offsets"] = _pack(id_offsets)
+    result["record_offsets"] = _pack(record_offsets)
+    result["record_lengths"] = _pack(record_lengths)
+    return result
+
+
+class FastaIndex:
+    """Binary search over a catalog's packed header index."""
+
+    def __init__(self, id_blob: bytes, id_offsets: bytes, record_offsets: bytes, record_lengths: bytes):
+        self.id_blob = id_blob
+        self.id_offsets = _unpack(id_offsets, "Q")
+        self.record_offsets = _unpack(record_offsets, "Q")
+        self.record_lengths = _unpack(record_lengths, "Q")
+
+    def __len__(self) -> int:
+        return len(self.record_offsets)
+
+    def _id(self, i: int) -> bytes:
+        return self.id_blob[self.id_offsets[i]:self.id_offsets[i + 1]]
+
+    def find(self, protein_id: bytes) -> Optional[Tuple[int, int]]:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id(mid) < protein_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self._id(lo) == protein_id:
+            return self.record_offsets[lo], self.record_lengths[lo]
+        return None
+
+
+@lru_cache(maxsize=8)
+def _load_index(catalog_id: int, path: str, size: int, mtime_ns: int) -> FastaIndex:
+    # (path, size, mtime_ns) are part of the key only so a reused id never hits a stale entry
+    table = FastaCatalog.__table__
+    row = db.session.execute(
+        select(table.c.id_blob, table.c.id_offsets, table.c.record_offsets, table.c.record_lengths)
+        .where(table.c.id == catalog_id)
+    ).one()
+    return FastaIndex(*row)
+
+
+def lookup_protein(catalog: FastaCatalog, protein_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read one record from the catalogued file by seeking to its indexed
+    offset. Returns None for an unknown id and raises FastaChanged when the
+    file was modified after it was catalogued.
+    """
+    if catalog.status != OK:
+        return None
+    status, key, error = _stat(catalog.path)
+    if status != OK or key != (catalog.size, catalog.mtime_ns):
+        raise FastaChanged(error or "file changed since it was catalogued")
+    found = _load_index(catalog.id, catalog.path, catalog.size, catalog.mtime_ns).find(protein_id.encode("utf-8"))
+    if found is None:
+        return None
+    offset, length = found
+    with open(catalog.path, "rb") as fh:
+        fh.seek(offset)
+        record = fh.read(length).decode("utf-8", "replace")
+    header, _, body = record.partition("\n")
+    return {
+        "id": protein_id,
+        "header": header[1:].rstrip("\r"),
+        "sequence": "".join(body.split()),
+        "offset": offset,
+    }
+
+
+def _catalogs_for(keys: Dict[str, Tuple[int, int]]) -> Dict[str, FastaCatalog]:
+    found: Dict[str, FastaCatalog] = {}
+    for path, (size, mtime_ns) in keys.items():
+        catalog = FastaCatalog.query.filter_by(path=path, size=size, mtime_ns=mtime_ns).first()
+        if catalog is not None:
+            found[path] = catalog
+    return found
+
+
+def catalog_fasta_files(requests: List[DatabaseRequest], roots: Optional[Sequence[str]] = None) -> FastaReport:
+    """
+    Catalog the local FASTA file of every request that has one. A file whose
+    (path, size, mtime) was catalogued before is not read again. Each
+    request's fasta_catalog link is updated; the caller commits.
+
+    With `roots`, files outside them are counted as denied and left unread;
+    None (the CLI) catalogs any path.
+    """
+    located = [(dr, local_path(dr.fasta_location)) for dr in requests if dr.fasta_location]
+    report = FastaReport(files=len(located))
+    denied = {path for _, path in located if path and roots is not None and not path_under_roots(path, roots)}
+    distinct = sorted({path for _, path in located if path and path not in denied})
+    stats = {path: _stat(path) for path in distinct}
+    keys = {path: key for path, (status, key, _) in stats.items() if status == OK}
+    catalogs = _catalogs_for(keys)
+
+    now = datetime.utcnow()
+    for path, (size, mtime_ns) in keys.items():
+        if path in catalogs:
+            report.cached += 1
+            continue
+        try:
+            scanned = scan_fasta(path)
+        except (OSError, ValueError) as e:
+            stats[path] = (ERROR, None, str(e))
+            continue
+        insert_ignoring_conflicts(FastaCatalog, [
+            {"path": path, "size": size, "mtime_ns": mtime_ns, "created_at": now, **scanned}
+        ], ["path", "size", "mtime_ns"])
+        report.indexed += 1
+    catalogs.update(_catalogs_for({path: key for path, key in keys.items() if path not in catalogs}))
+
+    for dr, path in located:
+        if path is None:
+            status = UNSUPPORTED
+        elif path in denied:
+            status = DENIED
+        else:
+            status = stats[path][0]
+        catalog = catalogs.get(path) if status == OK else None
+        report.missing += status == MISSING
+        report.unsupported += status == UNSUPPORTED
+        report.errors += status == ERROR
+        report.denied += status == DENIED
+        report.invalid += catalog is not None and catalog.status != OK
+        if dr.fasta_catalog_id != (catalog.id if catalog else None):
+            dr.fasta_catalog = catalog
+    return report
+
+
+def job_database_requests(job_id: int) -> List[DatabaseRequest]:
+    return DatabaseRequest.query.filter_by(job_id=job_id).order_by(DatabaseRequest.id).all()
+
+
+def project_database_requests(project_id: int) -> List[DatabaseRequest]:
+    return (
+        DatabaseRequest.query.join(Job, Job.id == DatabaseRequest.job_id)
+        .filter(Job.project_id == project_id)
+        .order_by(DatabaseRequest.id)
+        .all()
+    )
@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField
 from wtforms import (
     StringField, TextAreaField, SelectField, SubmitField, BooleanField, IntegerField
 )
@@ -79,6 +80,12 @@ class RawFileForm(FlaskForm):
     submit = SubmitField("Add raw file")
 
 
+class RawFilesBulkForm(FlaskForm):
+    uris_text = TextAreaField("Raw file locations (one per line, optionally a tab or ',' and notes)", validators=[Optional()])
+    upload = FileField("...or upload a text/CSV list")
+    submit = SubmitField("Add raw files")
+
+
 class DatabaseRequestForm(FlaskForm):
     db_tier = SelectField("Database tier", validators=[DataRequired()])
     rank_level = IntegerField("Ranking level (1-6)", validators=[DataRequired(), NumberRange(min=1, max=6)])
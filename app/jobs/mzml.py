@@ -0,0 +1,113 @@
+"""
+Streaming mzML header reader. Standard library only, so it can run in
+worker processes without the app.
+"""
+import gzip
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Optional
+
+MZML_SUFFIXES = (".mzml", ".mzml.gz")
+
+# PSI-MS / UO accessions
+MS_LEVEL = "MS:1000511"
+SCAN_START_TIME = "MS:1000016"
+UNIT_MINUTE = "UO:0000031"
+
+OK = "OK"
+TRUNCATED = "TRUNCATED"
+INVALID = "INVALID"
+
+
+def is_mzml(path: str) -> bool:
+    return path.lower().endswith(MZML_SUFFIXES)
+
+
+# Elements repeated once per record; each is dropped from the tree as soon as it is read.
+_PER_RECORD = ("spectrum", "chromatogram", "offset")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def read_mzml_header(path: str) -> Dict[str, Any]:
+    """
+    Count spectra per MS level and the scan start time range of an mzML
+    (optionally gzipped) file, and note whether it carries an index offset
+    list (indexedmzML). Each spectrum, chromatogram and index offset is
+    cleared and detached from its parent once read, so memory stays flat
+    however large the file is.
+
+    A file that ends mid-document comes back with status TRUNCATED and the
+    counts read up to that point.
+    """
+    result: Dict[str, Any] = {
+        "status": OK,
+        "error": None,
+        "spectrum_count": 0,
+        "declared_spectrum_count": None,
+        "ms_levels": {},
+        "rt_min": None,
+        "rt_max": None,
+        "has_index": False,
+    }
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    ms_level: Optional[int] = None
+    depth_in_spectrum = 0
+    root = None
+    # open elements, so a finished record can be detached from its parent
+    stack = []
+
+    try:
+        with opener(path, "rb") as fh:
+            for event, elem in ET.iterparse(fh, events=("start", "end")):
+                tag = _local(elem.tag)
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    stack.append(elem)
+                    if tag == "spectrum":
+                        depth_in_spectrum += 1
+                        ms_level = None
+                    elif tag == "spectrumList" and elem.get("count"):
+                        result["declared_spectrum_count"] = int(elem.get("count"))
+                    elif tag in ("indexList", "indexListOffset"):
+                        result["has_index"] = True
+                    continue
+
+                stack.pop()
+                if tag == "cvParam" and depth_in_spectrum:
+                    accession = elem.get("accession")
+                    if accession == MS_LEVEL:
+                        ms_level = int(elem.get("value"))
+                    elif accession == SCAN_START_TIME:
+                        rt = float(elem.get("value"))
+                        if elem.get("unitAccession") == UNIT_MINUTE:
+                            rt *= 60.0
+                        result["rt_min"] = rt if result["rt_min"] is None else min(result["rt_min"], rt)
+                        result["rt_max"] = rt if result["rt_max"] is None else max(result["rt_max"], rt)
+                elif tag == "spectrum":
+                    depth_in_spectrum -= 1
+                    result["spectrum_count"] += 1
+                    key = str(ms_level) if ms_level is not None else "unknown"
+                    result["ms_levels"][key] = result["ms_levels"].get(key, 0) + 1
+                elif tag == "binaryDataArrayList":
+                    elem.clear()
+                if tag in _PER_RECORD:
+                    elem.clear()
+                    if stack:
+                        # records finish one at a time, so this is the only child
+                        del stack[-1][:]
+    except ET.ParseError as e:
+        result["status"] = TRUNCATED if result["spectrum_count"] or root is not None else INVALID
+        result["error"] = str(e)
+    except (OSError, EOFError, ValueError) as e:
+        result["status"] = INVALID
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    if result["status"] == OK:
+        declared = result["declared_spectrum_count"]
+        if declared is not None and declared != result["spectrum_count"]:
+            result["status"] = TRUNCATED
+            result["error"] = f"spectrumList declares {declared} spectra, found {result['spectrum_count']}"
+    return result
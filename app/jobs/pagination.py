@@ -0,0 +1,61 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    Inverse of encode_cursor. Raises ValueError for a malformed cursor.
+    """
+    if not cursor:
+        return None
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def page_size(value: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(n, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, created_col, id_col, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Newest-first page of `query` keyed on (created_col, id_col).
+
+    Rows strictly after the cursor position are returned, so the cost of a page
+    does not depend on how deep it is. Returns (rows, next_cursor); next_cursor
+    is None on the last page.
+    """
+    after = decode_cursor(cursor)
+    if after:
+        created_at, row_id = after
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id),
+        ))
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
@@ -0,0 +1,400 @@
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+from sqlalchemy import bindparam, func, select, update
+
+from app.extensions import db
+from app.models import Job, JobRawFile, RawFileProbe, bump_content_versions
+from app.jobs.mzml import is_mzml, read_mzml_header
+from app.jobs.repository import insert_ignoring_conflicts
+
+logger = logging.getLogger(__name__)
+
+OK = "OK"
+MISSING = "MISSING"
+UNSUPPORTED = "UNSUPPORTED"
+ERROR = "ERROR"
+DENIED = "DENIED"
+
+DEFAULT_WORKERS = 8
+_READ_CHUNK = 1024 * 1024
+# Keep IN (...) lists under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+
+@dataclass
+class ProbeReport:
+    files: int = 0
+    ok: int = 0
+    missing: int = 0
+    unsupported: int = 0
+    errors: int = 0
+    denied: int = 0
+    cached: int = 0
+    hashed: int = 0
+    bytes_hashed: int = 0
+    checksums_queued: int = 0
+    mzml_indexed: int = 0
+    mzml_cached: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def local_path(location_uri: str) -> Optional[str]:
+    """The filesystem path for a file:// URI or a plain path; None for other schemes."""
+    uri = location_uri.strip()
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        if parsed.netloc not in ("", "localhost"):
+            return None
+        return unquote(parsed.path)
+    if parsed.scheme and len(parsed.scheme) > 1:  # a one-letter "scheme" is a Windows drive
+        return None
+    return os.path.expanduser(uri)
+
+
+def path_under_roots(path: str, roots: Sequence[str]) -> bool:
+    """Whether `path`, with symlinks and '..' resolved, lies inside one of `roots`."""
+    real = os.path.realpath(path)
+    for root in roots:
+        root = os.path.realpath(root)
+        if os.path.commonpath([real, root]) == root:
+            return True
+    return False
+
+
+def within_roots(location_uri: str, roots: Sequence[str]) -> bool:
+    """False for a local path outside `roots`; URIs of other schemes are never read here and pass."""
+    path = local_path(location_uri)
+    return path is None or path_under_roots(path, roots)
+
+
+def _stat(path: str) -> Tuple[str, Optional[Tuple[int, int]], Optional[str]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return MISSING, None, None
+    except OSError as e:
+        return ERROR, None, str(e)
+    if not os.path.isfile(path):
+        return ERROR, None, "not a regular file"
+    return OK, (st.st_size, st.st_mtime_ns), None
+
+
+def _sha256(path: str) -> Tuple[Optional[str], Optional[str]]:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_READ_CHUNK), b""):
+                h.update(chunk)
+    except OSError as e:
+        return None, str(e)
+    return h.hexdigest(), None
+
+
+def _cached_probes(keys: Dict[str, Tuple[int, int]]) -> Dict[str, RawFileProbe]:
+    found: Dict[str, RawFileProbe] = {}
+    paths = list(keys)
+    for i in range(0, len(paths), _IN_CHUNK):
+        for probe in RawFileProbe.query.filter(RawFileProbe.path.in_(paths[i:i + _IN_CHUNK])):
+            if (probe.size, probe.mtime_ns) == keys[probe.path]:
+                found[probe.path] = probe
+    return found
+
+
+def probe_raw_files(raw_files: List[JobRawFile], checksum: bool = False,
+                    workers: int = DEFAULT_WORKERS, roots: Optional[Sequence[str]] = None) -> ProbeReport:
+    """
+    Stat every local raw file on a pool of at most `workers` threads and,
+    with `checksum`, SHA-256 the ones not already hashed. Results are cached
+    in raw_file_probes by (path, size, mtime), so unchanged files cost one
+    stat. Each JobRawFile's probe columns are updated; the caller commits.
+
+    With `roots`, paths outside them are marked DENIED without being
+    touched; None (the CLI) probes any path.
+    """
+    report = ProbeReport(files=len(raw_files))
+    paths = {rf.id: local_path(rf.location_uri) for rf in raw_files}
+    denied = {p for p in paths.values() if p and roots is not None and not path_under_roots(p, roots)}
+    distinct = sorted({p for p in paths.values() if p and p not in denied})
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(distinct) or 1))) as pool:
+        stats = dict(zip(distinct, pool.map(_stat, distinct)))
+
+        keys = {path: key for path, (status, key, _) in stats.items() if status == OK}
+        cached = _cached_probes(keys)
+        to_hash = [path for path in keys if checksum and not (path in cached and cached[path].sha256)]
+        digests = dict(zip(to_hash, pool.map(_sha256, to_hash)))
+
+    now = datetime.utcnow()
+    new_rows, hashed_rows = [], []
+    for path, (size, mtime_ns) in keys.items():
+        digest, error = digests.get(path, (None, None))
+        if error:
+            stats[path] = (ERROR, None, error)
+            continue
+        if path in cached:
+            report.cached += 1
+            if digest:
+                hashed_rows.append({"probe_id": cached[path].id, "digest": digest})
+        else:
+            new_rows.append({"path": path, "size": size, "mtime_ns": mtime_ns, "sha256": digest, "created_at": now})
+        if digest:
+            report.hashed += 1
+            report.bytes_hashed += size
+
+    if new_rows:
+        insert_ignoring_conflicts(RawFileProbe, new_rows, ["path", "size", "mtime_ns"])
+    if hashed_rows:
+        probes = RawFileProbe.__table__
+        db.session.execute(
+            update(probes).where(probes.c.id == bindparam("probe_id")).values(sha256=bindparam("digest")),
+            hashed_rows,
+        )
+    probe_ids = {probe.path: probe.id for probe in cached.values()}
+    if new_rows:
+        inserted = _cached_probes({row["path"]: (row["size"], row["mtime_ns"]) for row in new_rows})
+        probe_ids.update({path: probe.id for path, probe in inserted.items()})
+
+    updates, changed_jobs = [], set()
+    for rf in raw_files:
+        path = paths[rf.id]
+        if path is None:
+            status, error = UNSUPPORTED, None
+        elif path in denied:
+            status, error = DENIED, "outside the allowed raw file roots"
+        else:
+            status, _, error = stats[path]
+        report.ok += status == OK
+        report.missing += status == MISSING
+        report.unsupported += status == UNSUPPORTED
+        report.errors += status == ERROR
+        report.denied += status == DENIED
+        pid = probe_ids.get(path) if status == OK else None
+        if pid != rf.probe_id:
+            changed_jobs.add(rf.job_id)
+        updates.append({"rf_id": rf.id, "status": status, "error": error, "at": now, "pid": pid})
+
+    # Core UPDATE: probe results are not job content, so they do not bump content_version.
+    table = JobRawFile.__table__
+    if updates:
+        db.session.execute(
+            update(table).where(table.c.id == bindparam("rf_id")).values(
+                probe_status=bindparam("status"), probe_error=bindparam("error"),
+                probed_at=bindparam("at"), probe_id=bindparam("pid"),
+            ),
+            updates,
+        )
+        for rf in raw_files:
+            db.session.expire(rf, ["probe_status", "probe_error", "probed_at", "probe_id", "probe"])
+    # the export payload carries the linked probe's mzML stats
+    bump_content_versions(db.session, changed_jobs)
+    return report
+
+
+def index_mzml_files(raw_files: List[JobRawFile], workers: int = 4, report: ProbeReport | None = None,
+                     roots: Optional[Sequence[str]] = None) -> ProbeReport:
+    """
+    Probe `raw_files` (within `roots`, see probe_raw_files), then read the
+    header stats of every mzML whose fingerprint has not been read before,
+    `workers` files at a time in separate processes (parsing is CPU-bound).
+    Stats are stored on the raw_file_probes row, so a file is only re-read
+    when its size or mtime changes. The caller commits.
+    """
+    report = report or probe_raw_files(raw_files, roots=roots)
+    probe_ids = sorted({rf.probe_id for rf in raw_files if rf.probe_id})
+    probes: Dict[int, RawFileProbe] = {}
+    for i in range(0, len(probe_ids), _IN_CHUNK):
+        for probe in RawFileProbe.query.filter(RawFileProbe.id.in_(probe_ids[i:i + _IN_CHUNK])):
+            if is_mzml(probe.path):
+                probes[probe.id] = probe
+    todo = [p for p in probes.values() if p.mzml_indexed_at is None]
+    report.mzml_cached = len(probes) - len(todo)
+    if not todo:
+        return report
+
+    ctx = multiprocessing.get_context("spawn")  # the parent has DB connections and worker threads
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))), mp_context=ctx) as pool:
+        results = list(pool.map(read_mzml_header, [p.path for p in todo]))
+
+    now = datetime.utcnow()
+    rows = []
+    for probe, res in zip(todo, results):
+        levels = res["ms_levels"]
+        rows.append({
+            "probe_id": probe.id,
+            "mzml_status": res["status"],
+            "mzml_error": res["error"],
+            "spectrum_count": res["spectrum_count"],
+            "ms1_count": levels.get("1", 0),
+            "ms2_count": levels.get("2", 0),
+            "ms3_count": levels.get("3", 0),
+            "rt_min_seconds": res["rt_min"],
+            "rt_max_seconds": res["rt_max"],
+            "has_index": res["has_index"],
+            "mzml_indexed_at": now,
+        })
+    table = RawFileProbe.__table__
+    db.session.execute(
+        update(table).where(table.c.id == bindparam("probe_id")).values(
+            {c: bindparam(c) for c in rows[0] if c != "probe_id"}
+        ),
+        rows,
+    )
+    for probe in todo:
+        db.session.expire(probe)
+    indexed = {p.id for p in todo}
+    bump_content_versions(db.session, {rf.job_id for rf in raw_files if rf.probe_id in indexed})
+    report.mzml_indexed = len(todo)
+    return report
+
+
+def job_raw_files(job_id: int) -> List[JobRawFile]:
+    return JobRawFile.query.filter_by(job_id=job_id).order_by(JobRawFile.id).all()
+
+
+def project_raw_files(project_id: int) -> List[JobRawFile]:
+    return (
+        JobRawFile.query.join(Job, Job.id == JobRawFile.job_id)
+        .filter(Job.project_id == project_id)
+        .order_by(JobRawFile.id)
+        .all()
+    )
+
+
+def probe_job(job_id: int, checksum: bool = False, workers: int = DEFAULT_WORKERS,
+              roots: Optional[Sequence[str]] = None) -> ProbeReport:
+    return probe_raw_files(job_raw_files(job_id), checksum=checksum, workers=workers, roots=roots)
+
+
+def probe_project(project_id: int, checksum: bool = False, workers: int = DEFAULT_WORKERS) -> ProbeReport:
+    return probe_raw_files(project_raw_files(project_id), checksum=checksum, workers=workers)
+
+
+def _unhashed_probes(job_id: int):
+    return (
+        select(RawFileProbe.id, RawFileProbe.path, RawFileProbe.size, RawFileProbe.mtime_ns)
+        .join(JobRawFile, JobRawFile.probe_id == RawFileProbe.id)
+        .where(JobRawFile.job_id == job_id, RawFileProbe.sha256.is_(None))
+        .distinct()
+    )
+
+
+def count_unhashed(job_id: int) -> int:
+    """Probed files of `job_id` that have no SHA-256 yet."""
+    return db.session.scalar(select(func.count()).select_from(_unhashed_probes(job_id).subquery()))
+
+
+def hash_job_raw_files(job_id: int, workers: int = DEFAULT_WORKERS) -> ProbeReport:
+    """
+    SHA-256 the probed files of `job_id` that have no checksum yet. A file
+    whose size or mtime changed since its probe is skipped; the next probe
+    gives it a new row. The caller commits.
+    """
+    report = ProbeReport()
+    rows = db.session.execute(_unhashed_probes(job_id)).all()
+    report.files = len(rows)
+
+    def hash_if_unchanged(row):
+        status, key, _ = _stat(row.path)
+        if status != OK or key != (row.size, row.mtime_ns):
+            return None, None
+        return _sha256(row.path)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(rows) or 1))) as pool:
+        digests = list(pool.map(hash_if_unchanged, rows))
+
+    hashed_rows = []
+    for row, (digest, error) in zip(rows, digests):
+        if error:
+            report.errors += 1
+        elif digest:
+            hashed_rows.append({"probe_id": row.id, "digest": digest})
+            report.hashed += 1
+            report.bytes_hashed += row.size
+    if hashed_rows:
+        probes = RawFileProbe.__table__
+        db.session.execute(
+            update(probes).where(probes.c.id == bindparam("probe_id")).values(sha256=bindparam("digest")),
+            hashed_rows,
+        )
+    return report
+
+
+class RawFileHasher:
+    """
+    Computes raw file checksums off the request path: submit() returns at
+    once and a single background thread hashes one job at a time, reading
+    RAW_CHECKSUM_WORKERS files in parallel. Queued jobs live only in this
+    process; a job dropped by a restart is hashed the next time someone
+    asks. With RAW_CHECKSUM_ASYNC off (the default under TESTING) submit()
+    hashes inline.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.workers = DEFAULT_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queued: Set[int] = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get("RAW_CHECKSUM_ASYNC", not app.config.get("TESTING", False))
+        self.workers = app.config.get("RAW_CHECKSUM_WORKERS", DEFAULT_WORKERS)
+        app.extensions["raw_file_hasher"] = self
+        atexit.register(self.shutdown)
+
+    def submit(self, job_id: int) -> int:
+        """Queue the unhashed files of `job_id`; returns how many there are. Call after committing the probe."""
+        pending = count_unhashed(job_id)
+        if not pending:
+            return 0
+        if not self.enabled:
+            self._hash(job_id)
+            return pending
+        with self._lock:
+            if job_id in self._queued:
+                return pending
+            self._queued.add(job_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-file-hasher")
+            self._executor.submit(self._run, job_id)
+        return pending
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: int) -> None:
+        with self._lock:
+            self._queued.discard(job_id)
+        try:
+            with self.app.app_context():
+                self._hash(job_id)
+        except Exception:
+            logger.exception("hashing raw files of job %s failed", job_id)
+
+    def _hash(self, job_id: int) -> None:
+        report = hash_job_raw_files(job_id, workers=self.workers)
+        db.session.commit()
+        if report.hashed:
+            logger.info("hashed %d raw file(s) of job %s, %d bytes", report.hashed, job_id, report.bytes_hashed)
+
+
+raw_file_hasher = RawFileHasher()
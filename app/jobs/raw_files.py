@@ -0,0 +1,106 @@
+import csv
+import io
+from datetime import datetime
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import JobRawFile, bump_content_versions
+from app.jobs.probe import within_roots
+from app.jobs.repository import insert_ignoring_conflicts
+
+# Rows per INSERT batch, and per existence check.
+BATCH_SIZE = 500
+
+RawFileEntry = Tuple[str, Optional[str]]  # (location_uri, notes)
+
+
+def iter_raw_file_entries(stream: IO[str]) -> Iterator[RawFileEntry]:
+    """
+    Parse a pasted list or uploaded text/CSV file line by line: one location
+    per line, optionally followed by notes after a tab or a comma. A line
+    with a tab is split at its first tab only, so a location may contain
+    commas there; otherwise the line is read as CSV, and a location with a
+    comma must be quoted ("/data/a,b.raw",notes). Blank lines, '#' comments
+    and a leading "location_uri" header are skipped.
+    """
+    for i, line in enumerate(stream):
+        line = line.rstrip("\r\n")
+        if "\t" in line:
+            uri, _, notes = line.partition("\t")
+        else:
+            row = next(csv.reader([line]), [])
+            uri, notes = (row[0], ",".join(row[1:])) if row else ("", "")
+        uri = uri.strip()
+        if not uri or uri.startswith("#"):
+            continue
+        if i == 0 and uri.lower() in ("location_uri", "uri", "path"):
+            continue
+        yield uri, notes.strip() or None
+
+
+def entries_within_roots(entries: Iterable[RawFileEntry], roots: Sequence[str],
+                         rejected: List[str]) -> Iterator[RawFileEntry]:
+    """
+    Pass on the entries whose local path lies inside `roots` (see
+    RAW_FILE_ROOTS) or that are not local at all; the locations of the rest
+    are appended to `rejected`.
+    """
+    for uri, notes in entries:
+        if within_roots(uri, roots):
+            yield uri, notes
+        else:
+            rejected.append(uri)
+
+
+def register_raw_files(job_id: int, entries: Iterable[RawFileEntry]) -> Tuple[int, int]:
+    """
+    Add raw file rows for `job_id` in batches, skipping locations the job
+    already has (or that repeat within `entries`). Runs in the caller's
+    transaction. Returns (added, skipped).
+    """
+    added = skipped = 0
+    seen = set()
+    batch: List[RawFileEntry] = []
+
+    def flush_batch():
+        nonlocal added, skipped
+        uris = [uri for uri, _ in batch]
+        existing = set(db.session.execute(
+            select(JobRawFile.location_uri)
+            .where(JobRawFile.job_id == job_id, JobRawFile.location_uri.in_(uris))
+        ).scalars())
+        now = datetime.utcnow()
+        rows = [{"job_id": job_id, "location_uri": uri, "notes": notes, "created_at": now}
+                for uri, notes in batch if uri not in existing]
+        inserted = 0
+        if rows:
+            # a concurrent registration of the same file is skipped, not an error
+            inserted = insert_ignoring_conflicts(JobRawFile, rows, ["job_id", "location_uri"])
+        added += inserted
+        skipped += len(batch) - inserted
+        batch.clear()
+
+    for uri, notes in entries:
+        if uri in seen:
+            skipped += 1
+            continue
+        seen.add(uri)
+        batch.append((uri, notes))
+        if len(batch) >= BATCH_SIZE:
+            flush_batch()
+    if batch:
+        flush_batch()
+
+    if added:
+        # Core inserts bypass the flush hooks that version job content
+        bump_content_versions(db.session, [job_id])
+    return added, skipped
+
+
+def text_stream(data) -> IO[str]:
+    """Wrap an uploaded file (binary) or pasted text for iter_raw_file_entries."""
+    if isinstance(data, str):
+        return io.StringIO(data)
+    return io.TextIOWrapper(data, encoding="utf-8-sig", newline="")
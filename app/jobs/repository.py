@@ -0,0 +1,91 @@
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.extensions import db
+from app.models.job import Job
+from app.models.oms_config import DatabaseRequest, JobRawFile
+
+
+def job_rows_query():
+    """
+    Job query for table/list views: the project and primary assignee shown on
+    every row are joined in, so rendering N rows costs one statement.
+    """
+    return Job.query.options(
+        joinedload(Job.project),
+        joinedload(Job.assigned_primary_user),
+    )
+
+
+def load_job_aggregate(job_id: int) -> Optional[Job]:
+    """
+    Load a job with its project, assignee, configs, DB requests, micro rounds
+    and raw files in two statements.
+
+    The scalar relations and the two short collections (a handful of DB tiers
+    and rounds per job) are joined into the job row; raw files can run to
+    hundreds per job, so they come in a separate select-in query rather than
+    multiplying the joined rows.
+    """
+    return (
+        Job.query.options(
+            joinedload(Job.project),
+            joinedload(Job.assigned_primary_user),
+            joinedload(Job.search_config),
+            joinedload(Job.validation_config),
+            joinedload(Job.database_requests).joinedload(DatabaseRequest.fasta_catalog),
+            joinedload(Job.microproteome_rounds),
+            selectinload(Job.raw_files).joinedload(JobRawFile.probe),
+        )
+        .filter(Job.id == job_id)
+        .one_or_none()
+    )
+
+
+def iter_job_aggregates(query, batch_size: int = 500) -> Iterator[Job]:
+    """
+    Yield every job matched by `query` with its export children loaded,
+    walking the table in id order `batch_size` jobs at a time.
+
+    Each batch is one keyset query plus one select-in per child collection.
+    Nothing holds on to earlier batches, so memory stays proportional to
+    `batch_size` rather than to the number of jobs exported.
+    """
+    query = query.options(
+        joinedload(Job.project),
+        joinedload(Job.search_config),
+        joinedload(Job.validation_config),
+        selectinload(Job.raw_files).joinedload(JobRawFile.probe),
+        selectinload(Job.database_requests).joinedload(DatabaseRequest.fasta_catalog),
+        selectinload(Job.microproteome_rounds),
+    )
+    last_id = 0
+    while True:
+        batch = query.filter(Job.id > last_id).order_by(Job.id.asc()).limit(batch_size).all()
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield from batch
+        if len(batch) < batch_size:
+            return
+
+
+def insert_ignoring_conflicts(model, rows: List[dict], index_elements: Sequence[str]) -> int:
+    """
+    executemany INSERT of `rows` that skips rows hitting the unique index on
+    `index_elements` (ON CONFLICT DO NOTHING on SQLite and PostgreSQL; a
+    plain INSERT elsewhere). Returns the number of rows actually inserted,
+    read back with RETURNING so skipped rows are not counted.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        db.session.execute(insert(model), rows)
+        return len(rows)
+    stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+    return len(db.session.execute(stmt.returning(*model.__table__.primary_key.columns), rows).all())
@@ -0,0 +1,176 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+
+from app.extensions import db
+from app.models.job import Job, JobEvent, JobEventArchive, JobStatus
+
+# Event types that are rolled up into one summary row per job per day.
+# CONFIG_UPDATED is only rolled up on days where it occurs more than once.
+COMPACT_ALWAYS = ("EXPORTED_JSON",)
+COMPACT_REPEATED = ("CONFIG_UPDATED",)
+SUMMARY_SUFFIX = "_DAILY"
+
+# Keep IN (...) lists under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+
+@dataclass
+class RetentionReport:
+    jobs_scanned: int = 0
+    events_compacted: int = 0
+    summaries_written: int = 0
+    events_archived: int = 0
+
+
+def _chunks(items: List[int], size: int = _IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _summary_rows(events) -> Tuple[List[dict], List[int]]:
+    """
+    Group one job's candidate events by (event_type, day) and build a summary
+    row per group. Returns (summary_rows, ids_to_delete).
+    """
+    groups: Dict[Tuple[str, str], list] = defaultdict(list)
+    for ev in events:
+        groups[(ev.event_type, ev.created_at.date().isoformat())].append(ev)
+
+    rows, ids = [], []
+    for (event_type, day), items in sorted(groups.items()):
+        if event_type in COMPACT_REPEATED and len(items) < 2:
+            continue
+        payload = {
+            "summary_of": event_type,
+            "day": day,
+            "count": len(items),
+            "first_at": items[0].created_at.isoformat(),
+            "last_at": items[-1].created_at.isoformat(),
+            "actor_user_ids": sorted({ev.actor_user_id for ev in items if ev.actor_user_id is not None}),
+        }
+        if event_type == "CONFIG_UPDATED":
+            payload["sections"] = sorted({
+                (ev.payload_json or {}).get("section") for ev in items if (ev.payload_json or {}).get("section")
+            })
+        rows.append({
+            "job_id": items[0].job_id,
+            "actor_user_id": None,
+            "event_type": event_type + SUMMARY_SUFFIX,
+            "payload_json": payload,
+            "created_at": items[-1].created_at,
+        })
+        ids.extend(ev.id for ev in items)
+    return rows, ids
+
+
+def compact_events(older_than: datetime, chunk_size: int = 200, pause: float = 0.0,
+                   report: RetentionReport | None = None) -> RetentionReport:
+    """
+    Roll high-volume events created before `older_than` (rounded down to a day
+    boundary) into per-job daily summary rows.
+
+    Works through jobs `chunk_size` at a time, one short transaction per chunk,
+    sleeping `pause` seconds between chunks so web requests can take the
+    write lock in between.
+    """
+    report = report or RetentionReport()
+    cutoff = datetime.combine(older_than.date(), datetime.min.time())
+    types = COMPACT_ALWAYS + COMPACT_REPEATED
+
+    last_job_id = 0
+    while True:
+        job_ids = db.session.execute(
+            select(JobEvent.job_id)
+            .where(JobEvent.job_id > last_job_id,
+                   JobEvent.event_type.in_(types),
+                   JobEvent.created_at < cutoff)
+            .group_by(JobEvent.job_id)
+            .order_by(JobEvent.job_id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not job_ids:
+            break
+        last_job_id = job_ids[-1]
+
+        events = db.session.execute(
+            select(JobEvent.id, JobEvent.job_id, JobEvent.actor_user_id, JobEvent.event_type,
+                   JobEvent.payload_json, JobEvent.created_at)
+            .where(JobEvent.job_id.in_(job_ids),
+                   JobEvent.event_type.in_(types),
+                   JobEvent.created_at < cutoff)
+            .order_by(JobEvent.job_id, JobEvent.created_at, JobEvent.id)
+        ).all()
+
+        by_job = defaultdict(list)
+        for ev in events:
+            by_job[ev.job_id].append(ev)
+
+        summaries, doomed = [], []
+        for job_events in by_job.values():
+            rows, ids = _summary_rows(job_events)
+            summaries.extend(rows)
+            doomed.extend(ids)
+
+        if summaries:
+            db.session.execute(insert(JobEvent), summaries)
+        for ids in _chunks(doomed):
+            db.session.execute(delete(JobEvent).where(JobEvent.id.in_(ids)))
+        db.session.commit()
+
+        report.jobs_scanned += len(job_ids)
+        report.events_compacted += len(doomed)
+        report.summaries_written += len(summaries)
+        if pause:
+            time.sleep(pause)
+    return report
+
+
+def archive_events_of_archived_jobs(chunk_size: int = 1000, pause: float = 0.0,
+                                    report: RetentionReport | None = None) -> RetentionReport:
+    """
+    Move job_events rows of ARCHIVED jobs into job_events_archive,
+    `chunk_size` events per transaction.
+    """
+    report = report or RetentionReport()
+    cols = [JobEvent.id, JobEvent.job_id, JobEvent.actor_user_id, JobEvent.event_type,
+            JobEvent.payload_json, JobEvent.created_at]
+
+    while True:
+        ids = db.session.execute(
+            select(JobEvent.id)
+            .join(Job, Job.id == JobEvent.job_id)
+            .where(Job.status == JobStatus.ARCHIVED)
+            .order_by(JobEvent.id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        now = datetime.utcnow()
+        for part in _chunks(ids):
+            db.session.execute(
+                insert(JobEventArchive).from_select(
+                    ["id", "job_id", "actor_user_id", "event_type", "payload_json", "created_at", "archived_at"],
+                    select(*cols, literal(now, DateTime)).where(JobEvent.id.in_(part)),
+                )
+            )
+            db.session.execute(delete(JobEvent).where(JobEvent.id.in_(part)))
+        db.session.commit()
+
+        report.events_archived += len(ids)
+        if pause:
+            time.sleep(pause)
+    return report
+
+
+def run_retention(older_than_days: int = 90, chunk_size: int = 200, pause: float = 0.0) -> RetentionReport:
+    report = RetentionReport()
+    compact_events(datetime.utcnow() - timedelta(days=older_than_days), chunk_size=chunk_size,
+                   pause=pause, report=report)
+    archive_events_of_archived_jobs(chunk_size=chunk_size * 5, pause=pause, report=report)
+    return report
@@ -1,18 +1,39 @@
 from io import BytesIO
-from flask import render_template, redirect, url_for, flash, request, abort, jsonify, send_file, current_app 
+from datetime import datetime
+import json
+from flask import (
+    render_template, redirect, url_for, flash, request, abort, jsonify, send_file, current_app, Response,
+    stream_with_context,
+)
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from . import jobs_bp
 from .forms import (
     NewJobForm, SearchConfigForm, ValidationConfigForm,
-    RawFileForm, DatabaseRequestForm, MicroproteomeRoundForm,
+    RawFileForm, RawFilesBulkForm, DatabaseRequestForm, MicroproteomeRoundForm,
     AssignJobForm, UpdateStatusForm
 )
-from app.jobs.wizard_tree import WizardTree
-from app.jobs.wizard_service import WizardSessionService
+from app.jobs.wizard_service import WizardSessionService, WizardStepError
+from app.jobs.wizard_store import get_wizard_store
+from app.jobs.artifacts import artifact_materialiser, queue_run_artifacts
+from app.jobs.bulk_import import ManifestError, import_manifest, parse_manifest
+from app.jobs.raw_files import entries_within_roots, iter_raw_file_entries, register_raw_files, text_stream
+from app.jobs.probe import index_mzml_files, job_raw_files, path_under_roots, probe_job, raw_file_hasher, within_roots
+from app.jobs.fasta import FastaChanged, catalog_fasta_files, job_database_requests, lookup_protein
+from app.jobs.admission import estimate_job, profile_from_config
+from app.jobs.dispatch import get_dispatcher
+from app.jobs.runner import STDERR_LOG, STDOUT_LOG, RunnerError, enqueue_run, job_runs, read_log_tail, request_cancel
+from app.jobs.run_monitor import job_progress
 from .wizard_forms import NewJobWizardForm
+from .status_counts import record_status_change, status_counts
+from .pagination import keyset_page, page_size
+from .repository import job_rows_query, load_job_aggregate, iter_job_aggregates
+from .export import job_export_payload, export_cache, export_etag
 from ..extensions import db
+from ..audit import audit_sink
 from ..models import (
-    Job, JobEvent, JobStatus,
+    Job, JobEvent, JobStatus, JobRun, RunState,
     SearchConfig, ValidationConfig,
     JobRawFile, DatabaseRequest, MicroproteomeRound,
     User, Role, ProjectType, DatabaseTier,
@@ -23,19 +44,23 @@ from pathlib import Path
 from ..forms import CSRFOnlyForm
 import io
 
-from .wizard_tree import get_public_state, get_node_for_path
+from .wizard_tree import WIZARD, get_public_state, get_node_for_path, public_tree_document
+
+WIZARD_TREE_MAX_AGE = 24 * 60 * 60
 
 def _wizard_service() -> WizardSessionService:
-    tree_path = Path(current_app.root_path) / "jobs" / "config" / "wizard_tree.json"
-    tree = WizardTree.from_json_file(str(tree_path))
-    return WizardSessionService(tree)
+    return WizardSessionService(WIZARD, get_wizard_store())
+
+
+def _wizard_already_submitted():
+    return jsonify({"error": "Wizard session already submitted."}), 409
 
 @jobs_bp.get("/dashboard")
 @login_required
 def dashboard():
-    counts = {s: Job.query.filter_by(status=s).count() for s in JobStatus.ALL}
-    unassigned = Job.query.filter(Job.assigned_primary_user_id.is_(None)).order_by(Job.created_at.desc()).limit(20).all()
-    mine = Job.query.filter_by(assigned_primary_user_id=current_user.id).order_by(Job.created_at.desc()).limit(20).all()
+    counts = status_counts()
+    unassigned = job_rows_query().filter(Job.assigned_primary_user_id.is_(None)).order_by(Job.created_at.desc()).limit(20).all()
+    mine = job_rows_query().filter(Job.assigned_primary_user_id == current_user.id).order_by(Job.created_at.desc()).limit(20).all()
     return render_template("jobs/dashboard.html", counts=counts, unassigned=unassigned, mine=mine)
 
 
@@ -45,13 +70,14 @@ def archive_job(job_id):
     job = Job.query.get_or_404(job_id)
     if current_user.role not in ("admin", "analyst"):
         abort(403)
+    record_status_change(job.status, JobStatus.ARCHIVED)
     job.status = JobStatus.ARCHIVED
-    db.session.add(JobEvent(
+    audit_sink.record(
         job_id=job.id,
         actor_user_id=current_user.id,
         event_type="ARCHIVED",
         payload_json=None
-    ))
+    )
     db.session.commit()
     flash("Job archived.", "info")
     return redirect(url_for("jobs.list_jobs"))
@@ -118,6 +144,7 @@ def new_job_wizard():
         )
         db.session.add(job)
         db.session.flush()
+        record_status_change(None, job.status)
 
         sc = SearchConfig(
             job_id=job.id,
@@ -152,8 +179,11 @@ def new_job_wizard():
         db.session.add(vc)
 
         raw_lines = [ln.strip() for ln in (form.raw_files_multiline.data or "").splitlines() if ln.strip()]
-        for ln in raw_lines:
-            db.session.add(JobRawFile(job_id=job.id, location_uri=ln))
+        rejected_raw: list[str] = []
+        register_raw_files(job.id, entries_within_roots([(ln, None) for ln in raw_lines], _raw_file_roots(),
+                                                        rejected_raw))
+        if rejected_raw:
+            flash(f"Skipped {len(rejected_raw)} raw file(s) outside the allowed raw file locations.", "warning")
 
         req_text = form.db_requirements_text.data.strip() if form.db_requirements_text.data else None
 
@@ -209,12 +239,12 @@ def new_job_wizard():
                         enabled=True
                     ))
 
-        db.session.add(JobEvent(
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="JOB_CREATED_WIZARD",
             payload_json={"project_name": project.name}
-        ))
+        )
         db.session.commit()
         flash("OMS job created.", "success")
         return redirect(url_for("jobs.job_detail", job_id=job.id))
@@ -222,16 +252,80 @@ def new_job_wizard():
     return render_template("jobs/new_wizard.html", form=form)
 
 
-@jobs_bp.get("/")
-@login_required
-def list_jobs():
+def _job_list_page():
     status = request.args.get("status")
-    q = Job.query.filter(Job.status != JobStatus.ARCHIVED).order_by(Job.created_at.desc())
+    q = job_rows_query().filter(Job.status != JobStatus.ARCHIVED)
     if status:
         q = q.filter(Job.status == status)
-    jobs = q.limit(100).all()
+    jobs, next_cursor = keyset_page(
+        q, Job.created_at, Job.id,
+        cursor=request.args.get("cursor"),
+        limit=page_size(request.args.get("limit")),
+    )
+    return jobs, next_cursor, status
 
-    return render_template("jobs/list.html", jobs=jobs, status=status, statuses=JobStatus.ALL)
+
+@jobs_bp.get("/")
+@login_required
+def list_jobs():
+    try:
+        jobs, next_cursor, status = _job_list_page()
+    except ValueError:
+        abort(400)
+
+    return render_template(
+        "jobs/list.html",
+        jobs=jobs,
+        status=status,
+        statuses=JobStatus.ALL,
+        next_cursor=next_cursor,
+    )
+
+
+@jobs_bp.get("/api/jobs")
+@login_required
+def list_jobs_json():
+    try:
+        jobs, next_cursor, status = _job_list_page()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "jobs": [
+            {
+                "id": j.id,
+                "status": j.status,
+                "priority": j.priority,
+                "project_id": j.project_id,
+                "assigned_primary_user_id": j.assigned_primary_user_id,
+                "created_at": j.created_at.isoformat() if j.created_at else None,
+            }
+            for j in jobs
+        ],
+        "next_cursor": next_cursor,
+    })
+
+
+@jobs_bp.post("/api/import")
+@login_required
+def import_jobs():
+    """
+    Bulk job submission from a manifest: a JSON body (list of jobs or
+    {"jobs": [...]}) or an uploaded CSV/JSON file in the "manifest" field.
+    Rows are validated up front; bad rows are reported, the rest are created.
+    """
+    upload = request.files.get("manifest")
+    try:
+        if upload is not None:
+            fmt = "csv" if (upload.filename or "").lower().endswith(".csv") else None
+            rows = parse_manifest(upload.read().decode("utf-8-sig"), fmt)
+        else:
+            rows = parse_manifest(request.get_data(as_text=True), "json")
+    except (ManifestError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    report = import_manifest(rows, current_user.id, raw_file_roots=_raw_file_roots())
+    return jsonify(report.as_dict()), 201 if report.created_job_ids else 400
 
 
 @jobs_bp.get("/new")
@@ -267,11 +361,12 @@ def new_job_post():
     )
     db.session.add(job)
     db.session.flush()
+    record_status_change(None, job.status)
 
     db.session.add(SearchConfig(job_id=job.id))
     db.session.add(ValidationConfig(job_id=job.id))
 
-    db.session.add(JobEvent(
+    audit_sink.record(
         job_id=job.id,
         actor_user_id=current_user.id,
         event_type="CREATED",
@@ -280,7 +375,7 @@ def new_job_post():
             "priority": job.priority,
             "status": job.status
         }
-    ))
+    )
     db.session.commit()
     flash(f"Job #{job.id} created.", "success")
     return redirect(url_for("jobs.list_jobs"))
@@ -293,11 +388,28 @@ def _get_job_or_404(job_id: int) -> Job:
     return job
 
 
+def _get_job_aggregate_or_404(job_id: int) -> Job:
+    job = load_job_aggregate(job_id)
+    if not job:
+        abort(404)
+    return job
+
+
 def _require_analyst():
     if not current_user.is_authenticated or not getattr(current_user, "is_analyst", lambda: False)():
         abort(403)
 
 
+def _raw_file_roots() -> list[str]:
+    """Directories raw files may be registered and read from (RAW_FILE_ROOTS; none by default)."""
+    return list(current_app.config.get("RAW_FILE_ROOTS") or [])
+
+
+def _fasta_roots() -> list[str]:
+    """Directories FASTA files may be read from (FASTA_ROOTS; none by default)."""
+    return list(current_app.config.get("FASTA_ROOTS") or [])
+
+
 @jobs_bp.post("/<int:job_id>/assign")
 @login_required
 def assign_job(job_id: int):
@@ -312,20 +424,21 @@ def assign_job(job_id: int):
     assignee_id = form.assignee_user_id.data
     job.assigned_primary_user_id = assignee_id
     db.session.add(JobAssignment(job_id=job.id, user_id=assignee_id, role="primary"))
-    db.session.add(JobEvent(
+    audit_sink.record(
         job_id=job.id,
         actor_user_id=current_user.id,
         event_type="ASSIGNED",
         payload_json={"assignee_user_id": assignee_id}
-    ))
+    )
     if job.status == JobStatus.SUBMITTED:
+        record_status_change(JobStatus.SUBMITTED, JobStatus.TRIAGED)
         job.status = JobStatus.TRIAGED
-        db.session.add(JobEvent(
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="STATUS_CHANGED",
             payload_json={"from": JobStatus.SUBMITTED, "to": JobStatus.TRIAGED}
-        ))
+        )
     db.session.commit()
     flash("Job assigned.", "success")
     return redirect(url_for("jobs.job_detail", job_id=job.id))
@@ -344,139 +457,355 @@ def update_status(job_id: int):
     new_status = form.status.data
     old_status = job.status
     if new_status != old_status:
+        record_status_change(old_status, new_status)
         job.status = new_status
-        db.session.add(JobEvent(
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="STATUS_CHANGED",
             payload_json={"from": old_status, "to": new_status}
-        ))
+        )
         db.session.commit()
         flash("Status updated.", "success")
     return redirect(url_for("jobs.job_detail", job_id=job.id))
 
 
+def _enqueue_run(job: Job) -> JobRun:
+    try:
+        run = enqueue_run(job, current_user.id)
+        db.session.commit()
+    except IntegrityError:
+        # lost a race with another request queueing the same job
+        db.session.rollback()
+        raise RunnerError("The job already has a queued or running run.")
+    except RunnerError:
+        db.session.rollback()
+        raise
+    return run
+
+
+def _cancel_run(job: Job, run_id: int) -> JobRun:
+    run = JobRun.query.filter_by(id=run_id, job_id=job.id).first_or_404()
+    try:
+        request_cancel(run, current_user.id)
+    except RunnerError:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    return run
+
+
+@jobs_bp.get("/api/queue")
+@login_required
+def queue_api():
+    """Ready (SUBMITTED/TRIAGED) jobs in dispatch order: priority, aged by time waiting."""
+    try:
+        limit = min(max(int(request.args.get("limit", 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    dispatcher = get_dispatcher()
+    entries = dispatcher.snapshot(limit)
+    jobs = {j.id: j for j in job_rows_query().filter(Job.id.in_([e["job_id"] for e in entries])).all()} if entries else {}
+    queued_runs = {r.job_id: r for r in JobRun.query.filter(
+        JobRun.job_id.in_(list(jobs)), JobRun.state == RunState.QUEUED
+    )} if jobs else {}
+    items = []
+    for e in entries:
+        j = jobs.get(e["job_id"])
+        if j is None:
+            continue
+        items.append({
+            **e,
+            "status": j.status,
+            "priority": j.priority,
+            "project": {"id": j.project.id, "name": j.project.name},
+            "created_at": j.created_at.isoformat() if j.created_at else None,
+            "queued_run_id": queued_runs[j.id].id if j.id in queued_runs else None,
+            "deferred_reason": queued_runs[j.id].deferred_reason if j.id in queued_runs else None,
+        })
+    return jsonify({"length": len(dispatcher.queue), "jobs": items})
+
+
+@jobs_bp.post("/<int:job_id>/runs")
+@login_required
+def start_run(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    form = CSRFOnlyForm()
+    if not form.validate_on_submit():
+        abort(400)
+    try:
+        run = _enqueue_run(job)
+    except RunnerError as e:
+        flash(str(e), "warning")
+    else:
+        flash(f"Run #{run.id} queued.", "success")
+    return redirect(url_for("jobs.job_detail", job_id=job.id))
+
+
+@jobs_bp.post("/<int:job_id>/runs/<int:run_id>/cancel")
+@login_required
+def cancel_run(job_id: int, run_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    form = CSRFOnlyForm()
+    if not form.validate_on_submit():
+        abort(400)
+    try:
+        run = _cancel_run(job, run_id)
+    except RunnerError as e:
+        flash(str(e), "warning")
+    else:
+        flash(f"Run #{run.id} cancelled." if run.state == "CANCELLED" else f"Stopping run #{run.id}.", "info")
+    return redirect(url_for("jobs.job_detail", job_id=job.id))
+
+
+@jobs_bp.get("/<int:job_id>/runs/<int:run_id>/<any(stdout, stderr):stream>.log")
+@login_required
+def run_log(job_id: int, run_id: int, stream: str):
+    job = _get_job_or_404(job_id)
+    JobRun.query.filter_by(id=run_id, job_id=job.id).first_or_404()
+    if not job.run_dir:
+        abort(404)
+    text = read_log_tail(job.run_dir, STDOUT_LOG if stream == "stdout" else STDERR_LOG)
+    return Response(text, mimetype="text/plain")
+
+
+@jobs_bp.get("/api/jobs/<int:job_id>/runs")
+@login_required
+def list_runs_api(job_id: int):
+    job = _get_job_or_404(job_id)
+    return jsonify({"job_id": job.id, "runs": [r.as_dict() for r in job_runs(job.id)]})
+
+
+@jobs_bp.get("/api/jobs/<int:job_id>/estimate")
+@login_required
+def job_estimate_api(job_id: int):
+    job = _get_job_aggregate_or_404(job_id)
+    return jsonify({"job_id": job.id, **estimate_job(job, profile_from_config(current_app.config)).as_dict()})
+
+
+@jobs_bp.get("/api/jobs/<int:job_id>/progress")
+@login_required
+def job_progress_api(job_id: int):
+    job = _get_job_or_404(job_id)
+    progress = job_progress(job.id)
+    if progress is None:
+        return jsonify({"job_id": job.id, "state": None, "processes": {}})
+    return jsonify(progress.as_dict())
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/runs")
+@login_required
+def start_run_api(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    try:
+        run = _enqueue_run(job)
+    except RunnerError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(run.as_dict()), 201
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/runs/<int:run_id>/cancel")
+@login_required
+def cancel_run_api(job_id: int, run_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    try:
+        run = _cancel_run(job, run_id)
+    except RunnerError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(run.as_dict())
+
+
 @jobs_bp.get("/<int:job_id>/export.json")
 @login_required
 def export_job_json(job_id: int):
-    job = _get_job_or_404(job_id)
-    sc = SearchConfig.query.get(job.id)
-    vc = ValidationConfig.query.get(job.id)
-    raw_files = JobRawFile.query.filter_by(job_id=job.id).all()
-    db_reqs = DatabaseRequest.query.filter_by(job_id=job.id).order_by(DatabaseRequest.rank_level.asc()).all()
-    rounds = MicroproteomeRound.query.filter_by(job_id=job.id).order_by(MicroproteomeRound.min_len.asc()).all()
-    payload = {
-        "job": {
-            "id": job.id,
-            "status": job.status,
-            "priority": job.priority,
-            "project": {"id": job.project.id, "name": job.project.name},
-            "assigned_primary_user_id": job.assigned_primary_user_id,
-            "created_at": job.created_at.isoformat() if job.created_at else None,
-        },
-        "search_config": None if not sc else {
-            "project_type": sc.project_type,
-            "species": sc.species,
-            "instrument": sc.instrument,
-            "ms_mode": sc.ms_mode,
-            "tmt_label_type": sc.tmt_label_type,
-            "tmt_plex": sc.tmt_plex,
-            "tmt_labelling_schema": sc.tmt_labelling_schema,
-            "carbamidomethylated": sc.carbamidomethylated,
-            "additional_mods": sc.additional_mods or [],
-            "sample_description": sc.sample_description,
-            "search_engines_mode": sc.search_engines_mode,
-            "additional_searches": sc.additional_searches or [],
-            "hla_typing_information": sc.hla_typing_information,
-        },
-        "raw_files": [{"location_uri": r.location_uri, "notes": r.notes} for r in raw_files],
-        "database_requests": [
-            {
-                "db_tier": d.db_tier,
-                "rank_level": d.rank_level,
-                "requires_rnaseq": d.requires_rnaseq,
-                "requirements_text": d.requirements_text,
-                "fasta_location": d.fasta_location,
-                "notes": d.notes,
-            }
-            for d in db_reqs
-        ],
-        "microproteome_rounds": [
-            {"round_name": r.round_name, "min_len": r.min_len, "max_len": r.max_len, "enabled": r.enabled}
-            for r in rounds
-        ],
-        "validation_config": None if not vc else {
-            "hla_binding": vc.hla_binding,
-            "conflict_resolution_delta_score_filter": vc.conflict_resolution_delta_score_filter,
-            "pep_filter": vc.pep_filter,
-            "two_search_engine_agreement": vc.two_search_engine_agreement,
-            "pd_infrys_validation": vc.pd_infrys_validation,
-            "pepquery": vc.pepquery,
-            "rnaseq_mapping_read_quant": vc.rnaseq_mapping_read_quant,
-            "genome_mapping_tool": vc.genome_mapping_tool,
-            "immunogenicity_analysis": vc.immunogenicity_analysis,
-            "notes": vc.notes,
-        },
-    }
-    db.session.add(JobEvent(
-        job_id=job.id,
+    # Only the version column is read up front: a matching If-None-Match or a
+    # cache hit never touches the config tables.
+    version = db.session.query(Job.content_version).filter(Job.id == job_id).scalar()
+    if version is None:
+        abort(404)
+    etag = export_etag(job_id, version)
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    body = export_cache.get(job_id, version)
+    if body is None:
+        job = _get_job_aggregate_or_404(job_id)
+        body = current_app.json.dumps(job_export_payload(job)).encode("utf-8")
+        export_cache.put(job_id, version, body)
+
+    audit_sink.record(
+        job_id=job_id,
         actor_user_id=current_user.id,
         event_type="EXPORTED_JSON",
         payload_json={"format": "json"}
-    ))
-    db.session.commit()
-    plan = {
-        "search_engines": [],
-        "extra_searches": (payload.get("search_config") or {}).get("additional_searches", []),
-        "db_ranks": [d["rank_level"] for d in payload.get("database_requests", [])],
-        "requires_rnaseq": any(d["requires_rnaseq"] for d in payload.get("database_requests", [])),
-        "micro_rounds": payload.get("microproteome_rounds", []),
-    }
+    )
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+def _export_filter_query(filters):
+    """
+    Build the job query for a bulk export from request filters:
+    status, project_id, priority, created_after, created_before, ids.
+    List filters accept repeated keys or comma-separated values.
+    Raises ValueError on malformed values.
+    """
+    def values(key):
+        raw = filters.getlist(key) if hasattr(filters, "getlist") else filters.get(key)
+        if raw is None:
+            return []
+        if not isinstance(raw, list):
+            raw = [raw]
+        out = []
+        for item in raw:
+            out.extend(x.strip() for x in str(item).split(",") if x.strip())
+        return out
+
+    q = Job.query
+    statuses = values("status")
+    if statuses:
+        q = q.filter(Job.status.in_(statuses))
+    priorities = values("priority")
+    if priorities:
+        q = q.filter(Job.priority.in_(priorities))
+    project_ids = [int(x) for x in values("project_id")]
+    if project_ids:
+        q = q.filter(Job.project_id.in_(project_ids))
+    ids = [int(x) for x in values("ids")]
+    if ids:
+        q = q.filter(Job.id.in_(ids))
+    created_after = values("created_after")
+    if created_after:
+        q = q.filter(Job.created_at >= datetime.fromisoformat(created_after[0]))
+    created_before = values("created_before")
+    if created_before:
+        q = q.filter(Job.created_at < datetime.fromisoformat(created_before[0]))
+    return q
+
+
+@jobs_bp.route("/export.ndjson", methods=["GET", "POST"])
+@login_required
+def export_jobs_ndjson():
+    """
+    Stream export_job_json payloads for every matching job, one per line.
+    Filters come from the query string (GET) or a JSON object (POST).
+    """
+    if request.method == "POST":
+        filters = request.get_json(silent=True) or {}
+    else:
+        filters = request.args
+    try:
+        q = _export_filter_query(filters)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    actor_id = current_user.id
+
+    def generate():
+        exported = []
+        try:
+            for job in iter_job_aggregates(q, batch_size=EXPORT_BATCH_SIZE):
+                yield json.dumps(job_export_payload(job), separators=(",", ":")) + "\n"
+                exported.append(job.id)
+        finally:
+            if exported:
+                now = datetime.utcnow()
+                audit_sink.record_many([
+                    {
+                        "job_id": job_id,
+                        "actor_user_id": actor_id,
+                        "event_type": "EXPORTED_JSON",
+                        "payload_json": {"format": "ndjson"},
+                        "created_at": now,
+                    }
+                    for job_id in exported
+                ])
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@jobs_bp.get("/<int:job_id>/events")
+@login_required
+def job_events(job_id: int):
+    """
+    Newest-first page of a job's audit events.
+    Query args: cursor, limit, type (repeatable or comma-separated).
+    """
+    if not db.session.query(Job.id).filter(Job.id == job_id).scalar():
+        abort(404)
 
-    scp = payload.get("search_config") or {}
-    mode = scp.get("search_engines_mode")
+    q = db.session.query(
+        JobEvent.id, JobEvent.event_type, JobEvent.actor_user_id, JobEvent.payload_json, JobEvent.created_at,
+    ).filter(JobEvent.job_id == job_id)
+    types = [t.strip() for raw in request.args.getlist("type") for t in raw.split(",") if t.strip()]
+    if types:
+        q = q.filter(JobEvent.event_type.in_(types))
 
-    if mode == "BASIC_COMET":
-        plan["search_engines"] = ["COMET"]
-    elif mode == "MULTI_COMET_MSFRAGGER":
-        plan["search_engines"] = ["COMET", "MSFRAGGER"]
-    elif mode == "FULL_ALL":
-        plan["search_engines"] = ["COMET", "MSFRAGGER", "OTHER_ENGINES"]
+    try:
+        events, next_cursor = keyset_page(
+            q, JobEvent.created_at, JobEvent.id,
+            cursor=request.args.get("cursor"),
+            limit=page_size(request.args.get("limit")),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    payload["pipeline_plan"] = plan
-    return jsonify(payload)
+    return jsonify({
+        "events": [
+            {
+                "id": e.id,
+                "type": e.event_type,
+                "actor": e.actor_user_id,
+                "at": e.created_at.isoformat(),
+                "payload": e.payload_json,
+            }
+            for e in events
+        ],
+        "next_cursor": next_cursor,
+    })
 
 
 @jobs_bp.get("/<int:job_id>")
 @login_required
 def job_detail(job_id: int):
     analysts = User.query.filter(User.role.in_([Role.ADMIN, Role.ANALYST]), User.is_active == True).order_by(User.name.asc()).all()
-    job = _get_job_or_404(job_id)
-    sc = SearchConfig.query.get(job.id)
-    vc = ValidationConfig.query.get(job.id)
-    raw_files = JobRawFile.query.filter_by(job_id=job.id).order_by(JobRawFile.created_at.desc()).all()
-    db_reqs = DatabaseRequest.query.filter_by(job_id=job.id).order_by(DatabaseRequest.rank_level.asc()).all()
-    rounds = MicroproteomeRound.query.filter_by(job_id=job.id).order_by(MicroproteomeRound.min_len.asc()).all()
+    job = _get_job_aggregate_or_404(job_id)
     return render_template(
         "jobs/detail.html",
         job=job,
-        search_config=sc,
-        validation_config=vc,
-        raw_files=raw_files,
-        db_reqs=db_reqs,
-        rounds=rounds,
+        search_config=job.search_config,
+        validation_config=job.validation_config,
+        raw_files=list(reversed(job.raw_files)),
+        db_reqs=job.database_requests,
+        rounds=job.microproteome_rounds,
         analysts=analysts,
+        runs=job_runs(job.id, limit=5),
+        progress=job_progress(job.id),
+        queue_position=get_dispatcher().position(job.id),
+        estimate=estimate_job(job, profile_from_config(current_app.config)),
     )
 
 
 @jobs_bp.route("/<int:job_id>/config", methods=["GET", "POST"])
 @login_required
 def edit_config(job_id: int):
-    job = _get_job_or_404(job_id)
-    sc = SearchConfig.query.get(job.id) or SearchConfig(job_id=job.id)
-    vc = ValidationConfig.query.get(job.id) or ValidationConfig(job_id=job.id)
-    db.session.add(sc)
-    db.session.add(vc)
+    job = _get_job_aggregate_or_404(job_id)
+    if job.search_config is None:
+        job.search_config = SearchConfig(job_id=job.id)
+    if job.validation_config is None:
+        job.validation_config = ValidationConfig(job_id=job.id)
+    sc = job.search_config
+    vc = job.validation_config
     db.session.flush()
     sc_form = SearchConfigForm(obj=sc)
     vc_form = ValidationConfigForm(obj=vc)
@@ -509,12 +838,12 @@ def edit_config(job_id: int):
                 if not sc.tmt_plex:
                     flash("TMT plex is required when using TMT labelling.", "warning")
                     return redirect(url_for("jobs.edit_config", job_id=job.id))
-            db.session.add(JobEvent(
+            audit_sink.record(
                 job_id=job.id,
                 actor_user_id=current_user.id,
                 event_type="CONFIG_UPDATED",
                 payload_json={"section": "search_config"}
-            ))
+            )
             db.session.commit()
             flash("Search config saved.", "success")
             return redirect(url_for("jobs.edit_config", job_id=job.id))
@@ -530,19 +859,16 @@ def edit_config(job_id: int):
             vc.immunogenicity_analysis = bool(vc_form.immunogenicity_analysis.data)
             vc.notes = (vc_form.notes.data or "").strip() or None
             if vc.pepquery:
-                has_rank3 = DatabaseRequest.query.filter(
-                    DatabaseRequest.job_id == job.id,
-                    DatabaseRequest.rank_level >= 3
-                ).count() > 0
+                has_rank3 = any(d.rank_level >= 3 for d in job.database_requests)
                 if not has_rank3:
                     vc.pepquery = False
                     flash("PepQuery requires at least one database request with rank level 3+.", "warning")
-            db.session.add(JobEvent(
+            audit_sink.record(
                 job_id=job.id,
                 actor_user_id=current_user.id,
                 event_type="CONFIG_UPDATED",
                 payload_json={"section": "validation_config"}
-            ))
+            )
             db.session.commit()
             flash("Validation config saved.", "success")
             return redirect(url_for("jobs.edit_config", job_id=job.id))
@@ -556,23 +882,151 @@ def raw_files(job_id: int):
     job = _get_job_or_404(job_id)
     form = RawFileForm()
     if form.validate_on_submit():
-        rf = JobRawFile(
-            job_id=job.id,
-            location_uri=form.location_uri.data.strip(),
-            notes=(form.notes.data or "").strip() or None
-        )
-        db.session.add(rf)
-        db.session.add(JobEvent(
+        location_uri = form.location_uri.data.strip()
+        if not within_roots(location_uri, _raw_file_roots()):
+            flash("That path is outside the allowed raw file locations.", "warning")
+            return redirect(url_for("jobs.raw_files", job_id=job.id))
+        added, _ = register_raw_files(job.id, [(location_uri, (form.notes.data or "").strip() or None)])
+        if not added:
+            flash("That raw file is already registered.", "info")
+            return redirect(url_for("jobs.raw_files", job_id=job.id))
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="RAW_FILE_ADDED",
-            payload_json={"location_uri": rf.location_uri}
-        ))
+            payload_json={"location_uri": location_uri}
+        )
         db.session.commit()
         flash("Raw file added.", "success")
         return redirect(url_for("jobs.raw_files", job_id=job.id))
-    items = JobRawFile.query.filter_by(job_id=job.id).order_by(JobRawFile.created_at.desc()).all()
-    return render_template("jobs/raw_files.html", job=job, form=form, items=items)
+    items = (
+        JobRawFile.query.options(joinedload(JobRawFile.probe))
+        .filter_by(job_id=job.id)
+        .order_by(JobRawFile.created_at.desc())
+        .all()
+    )
+    return render_template("jobs/raw_files.html", job=job, form=form, bulk_form=RawFilesBulkForm(), items=items)
+
+
+def _register_raw_files_bulk(job: Job, entries) -> tuple[int, int, list[str]]:
+    """Register `entries` within RAW_FILE_ROOTS; returns (added, skipped, rejected locations)."""
+    rejected: list[str] = []
+    added, skipped = register_raw_files(job.id, entries_within_roots(entries, _raw_file_roots(), rejected))
+    if added:
+        audit_sink.record(
+            job_id=job.id,
+            actor_user_id=current_user.id,
+            event_type="RAW_FILES_ADDED",
+            payload_json={"added": added, "skipped": skipped, "rejected": len(rejected)}
+        )
+    db.session.commit()
+    return added, skipped, rejected
+
+
+@jobs_bp.post("/<int:job_id>/raw-files/bulk")
+@login_required
+def raw_files_bulk(job_id: int):
+    job = _get_job_or_404(job_id)
+    form = RawFilesBulkForm()
+    if not form.validate_on_submit():
+        flash("Could not read the raw file list.", "warning")
+        return redirect(url_for("jobs.raw_files", job_id=job.id))
+    upload = form.upload.data
+    stream = text_stream(upload.stream if upload else (form.uris_text.data or ""))
+    added, skipped, rejected = _register_raw_files_bulk(job, iter_raw_file_entries(stream))
+    flash(f"Added {added} raw file(s); skipped {skipped} already registered.", "success" if added else "info")
+    if rejected:
+        flash(f"Rejected {len(rejected)} path(s) outside the allowed raw file locations, "
+              f"e.g. {rejected[0]}.", "warning")
+    return redirect(url_for("jobs.raw_files", job_id=job.id))
+
+
+@jobs_bp.post("/<int:job_id>/raw-files/probe")
+@login_required
+def raw_files_probe(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    form = CSRFOnlyForm()
+    if not form.validate_on_submit():
+        abort(400)
+    report = _probe_raw_files(job, checksum=bool(request.form.get("checksum")))
+    flash(f"Probed {report.files} raw file(s): {report.ok} found, {report.missing} missing, "
+          f"{report.unsupported} not local, {report.errors} unreadable, "
+          f"{report.denied} outside the allowed locations.",
+          "success" if report.ok == report.files else "warning")
+    if report.checksums_queued:
+        flash(f"Computing SHA-256 of {report.checksums_queued} file(s) in the background.", "info")
+    return redirect(url_for("jobs.raw_files", job_id=job.id))
+
+
+def _probe_raw_files(job: Job, checksum: bool):
+    """Stat the job's raw files now; checksums, when asked for, are left to raw_file_hasher."""
+    report = probe_job(job.id, workers=current_app.config.get("RAW_PROBE_WORKERS", 8), roots=_raw_file_roots())
+    db.session.commit()
+    if checksum:
+        report.checksums_queued = raw_file_hasher.submit(job.id)
+    return report
+
+
+@jobs_bp.post("/<int:job_id>/raw-files/index-mzml")
+@login_required
+def raw_files_index_mzml(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    form = CSRFOnlyForm()
+    if not form.validate_on_submit():
+        abort(400)
+    report = index_mzml_files(job_raw_files(job.id), workers=current_app.config.get("MZML_INDEX_WORKERS", 4),
+                              roots=_raw_file_roots())
+    db.session.commit()
+    flash(f"Read {report.mzml_indexed} mzML header(s); {report.mzml_cached} unchanged since last read.", "success")
+    return redirect(url_for("jobs.raw_files", job_id=job.id))
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/raw-files/index-mzml")
+@login_required
+def raw_files_index_mzml_api(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    report = index_mzml_files(job_raw_files(job.id), workers=current_app.config.get("MZML_INDEX_WORKERS", 4),
+                              roots=_raw_file_roots())
+    db.session.commit()
+    return jsonify({"job_id": job.id, **report.as_dict()})
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/raw-files/probe")
+@login_required
+def raw_files_probe_api(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    data = request.get_json(silent=True) or {}
+    report = _probe_raw_files(job, checksum=bool(data.get("checksum")))
+    return jsonify({"job_id": job.id, **report.as_dict()})
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/raw-files")
+@login_required
+def raw_files_bulk_api(job_id: int):
+    """
+    Register many raw files at once. Accepts JSON ({"uris": [...]} or
+    {"files": [{"location_uri": ..., "notes": ...}]}), a multipart upload in
+    "file", or a text/CSV request body, which is parsed as a stream.
+    """
+    job = _get_job_or_404(job_id)
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        entries = [(str(u).strip(), None) for u in data.get("uris") or [] if str(u).strip()]
+        entries += [
+            (str(f.get("location_uri") or "").strip(), (f.get("notes") or None))
+            for f in data.get("files") or [] if isinstance(f, dict) and str(f.get("location_uri") or "").strip()
+        ]
+    elif "file" in request.files:
+        entries = iter_raw_file_entries(text_stream(request.files["file"].stream))
+    else:
+        entries = iter_raw_file_entries(text_stream(request.stream))
+    added, skipped, rejected = _register_raw_files_bulk(job, entries)
+    return jsonify({"job_id": job.id, "added": added, "skipped": skipped,
+                    "rejected": len(rejected), "rejected_sample": rejected[:20]}), 201 if added else 200
 
 
 @jobs_bp.route("/<int:job_id>/databases", methods=["GET", "POST"])
@@ -599,19 +1053,86 @@ def databases(job_id: int):
             flash("FASTA location is required for Personal DB / Special FASTA requests.", "warning")
             return redirect(url_for("jobs.databases", job_id=job.id))
         db.session.add(dr)
-        db.session.add(JobEvent(
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="DB_REQUEST_ADDED",
             payload_json={"db_tier": dr.db_tier, "rank_level": dr.rank_level}
-        ))
+        )
         db.session.commit()
         flash("Database request added.", "success")
         return redirect(url_for("jobs.databases", job_id=job.id))
-    items = DatabaseRequest.query.filter_by(job_id=job.id).order_by(DatabaseRequest.rank_level.asc()).all()
+    items = (
+        DatabaseRequest.query.options(joinedload(DatabaseRequest.fasta_catalog))
+        .filter_by(job_id=job.id).order_by(DatabaseRequest.rank_level.asc()).all()
+    )
     return render_template("jobs/databases.html", job=job, form=form, items=items)
 
 
+@jobs_bp.post("/<int:job_id>/databases/catalog")
+@login_required
+def databases_catalog(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    form = CSRFOnlyForm()
+    if not form.validate_on_submit():
+        abort(400)
+    report = catalog_fasta_files(job_database_requests(job.id), roots=_fasta_roots())
+    db.session.commit()
+    flash(f"Indexed {report.indexed} FASTA file(s); {report.cached} unchanged, {report.missing} missing, "
+          f"{report.unsupported} not local, {report.errors} unreadable, {report.invalid} not FASTA, "
+          f"{report.denied} outside the allowed locations.",
+          "success" if report.indexed + report.cached == report.files else "warning")
+    return redirect(url_for("jobs.databases", job_id=job.id))
+
+
+@jobs_bp.post("/api/jobs/<int:job_id>/databases/catalog")
+@login_required
+def databases_catalog_api(job_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    report = catalog_fasta_files(job_database_requests(job.id), roots=_fasta_roots())
+    db.session.commit()
+    return jsonify({"job_id": job.id, **report.as_dict()})
+
+
+def _lookup_protein_or_abort(job: Job, request_id: int, protein_id: str) -> dict:
+    dr = DatabaseRequest.query.filter_by(id=request_id, job_id=job.id).first_or_404()
+    if dr.fasta_catalog is None:
+        abort(409, description="This FASTA file has not been indexed yet.")
+    if not path_under_roots(dr.fasta_catalog.path, _fasta_roots()):
+        abort(403, description="This FASTA file is outside the allowed locations.")
+    try:
+        record = lookup_protein(dr.fasta_catalog, protein_id)
+    except FastaChanged as e:
+        abort(409, description=f"{e}; index it again.")
+    if record is None:
+        abort(404, description=f"No protein {protein_id!r} in this FASTA file.")
+    return record
+
+
+@jobs_bp.get("/<int:job_id>/databases/<int:request_id>/protein")
+@login_required
+def database_protein(job_id: int, request_id: int):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    protein_id = (request.args.get("id") or "").strip()
+    if not protein_id:
+        abort(400)
+    record = _lookup_protein_or_abort(job, request_id, protein_id)
+    sequence = record["sequence"]
+    lines = [">" + record["header"]] + [sequence[i:i + 60] for i in range(0, len(sequence), 60)]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain")
+
+
+@jobs_bp.get("/api/jobs/<int:job_id>/databases/<int:request_id>/proteins/<path:protein_id>")
+@login_required
+def database_protein_api(job_id: int, request_id: int, protein_id: str):
+    _require_analyst()
+    job = _get_job_or_404(job_id)
+    return jsonify(_lookup_protein_or_abort(job, request_id, protein_id))
+
+
 @jobs_bp.route("/<int:job_id>/micro-rounds", methods=["GET", "POST"])
 @login_required
 def micro_rounds(job_id: int):
@@ -627,12 +1148,12 @@ def micro_rounds(job_id: int):
             notes=(form.notes.data or "").strip() or None,
         )
         db.session.add(r)
-        db.session.add(JobEvent(
+        audit_sink.record(
             job_id=job.id,
             actor_user_id=current_user.id,
             event_type="MICRO_ROUND_ADDED",
             payload_json={"round_name": r.round_name, "min_len": r.min_len, "max_len": r.max_len}
-        ))
+        )
         db.session.commit()
         flash("Microproteome round added.", "success")
         return redirect(url_for("jobs.micro_rounds", job_id=job.id))
@@ -663,6 +1184,16 @@ def export_nextflow(job_id: int):
         download_name=filename
     )
 
+@jobs_bp.get("/api/wizard/tree")
+def wizard_tree():
+    body, etag = public_tree_document()
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = WIZARD_TREE_MAX_AGE
+    return resp.make_conditional(request)
+
+
 @jobs_bp.route("/api/wizard/sessions", methods=["POST"])
 def wizard_create_session():
     svc = _wizard_service()
@@ -670,10 +1201,12 @@ def wizard_create_session():
     return jsonify(svc.state(ws)), 201
 
 
-@jobs_bp.route("/api/wizard/sessions/<int:session_id>/choose", methods=["POST"])
-def wizard_choose(session_id: int):
+@jobs_bp.route("/api/wizard/sessions/<session_id>/choose", methods=["POST"])
+def wizard_choose(session_id: str):
     svc = _wizard_service()
     ws = svc.get(session_id)
+    if ws.status == "submitted":
+        return _wizard_already_submitted()
 
     data = request.get_json(silent=True) or {}
     choice = data.get("choice")
@@ -688,24 +1221,56 @@ def wizard_choose(session_id: int):
     return jsonify(svc.state(ws))
 
 
-@jobs_bp.route("/api/wizard/sessions/<int:session_id>/back", methods=["POST"])
-def wizard_back(session_id: int):
+@jobs_bp.route("/api/wizard/sessions/<session_id>/back", methods=["POST"])
+def wizard_back(session_id: str):
     svc = _wizard_service()
     ws = svc.get(session_id)
+    if ws.status == "submitted":
+        return _wizard_already_submitted()
     ws = svc.back(ws)
     return jsonify(svc.state(ws))
 
 
-@jobs_bp.route("/api/wizard/sessions/<int:session_id>/inputs", methods=["PATCH"])
-def wizard_patch_inputs(session_id: int):
+@jobs_bp.route("/api/wizard/sessions/<session_id>/inputs", methods=["PATCH"])
+def wizard_patch_inputs(session_id: str):
     svc = _wizard_service()
     ws = svc.get(session_id)
+    if ws.status == "submitted":
+        return _wizard_already_submitted()
 
     data = request.get_json(silent=True) or {}
     ws = svc.set_inputs(ws, data)
     return jsonify(svc.state(ws))
 
 
+@jobs_bp.route("/api/wizard/sessions/<session_id>/steps", methods=["POST"])
+def wizard_apply_steps(session_id: str):
+    """
+    Apply a list of wizard operations in one transaction, e.g.
+    {"operations": [{"op": "choose", "choice": "HLA"}, {"op": "back"},
+                    {"op": "set_inputs", "inputs": {...}}]}
+    Any invalid step rejects the whole batch.
+    """
+    svc = _wizard_service()
+    ws = svc.get(session_id)
+    if ws.status == "submitted":
+        return _wizard_already_submitted()
+
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list):
+        return jsonify({"error": "Missing 'operations' list"}), 400
+
+    try:
+        ws = svc.apply(ws, operations)
+    except WizardStepError as e:
+        return jsonify({"error": str(e), "step": e.index}), 400
+
+    state = get_public_state(ws.path, ws.inputs or {})
+    state.update({"id": ws.id, "status": ws.status})
+    return jsonify(state)
+
+
 def safe_slug(s: str) -> str:
     s = (s or "").strip().lower()
     out = []
@@ -757,6 +1322,7 @@ process {proc_name} {{
 }
 ''')
         workflow_calls.append("HELLO()")
+    workflow_block = indent_lines("\n".join(workflow_calls), 2)
     return f"""\
 /*
   Auto-generated by OMS Job App
@@ -772,7 +1338,7 @@ workflow {{
 
   input_files = Channel.fromPath(params.input)
 
-{indent_lines("\\n".join(workflow_calls), 2)}
+{workflow_block}
 
 }}
 
@@ -805,18 +1371,71 @@ def _wizard_missing_required(profile: str, inputs: dict) -> list[str]:
     return missing
 
 
-@jobs_bp.post("/api/wizard/sessions/<int:session_id>/submit")
+def _wizard_submit_error(profile: str | None, inputs: dict):
+    if not profile:
+        return jsonify({"error": "Wizard session not complete (no profile resolved)."}), 400
+    missing = _wizard_missing_required(profile, inputs)
+    if missing:
+        return jsonify({"error": "Missing required inputs", "missing": missing}), 400
+    return None
+
+
+@jobs_bp.post("/api/wizard/sessions/<session_id>/submit")
 @login_required
-def wizard_submit(session_id: int):
-    ws = WizardSession.query.get_or_404(session_id)
+def wizard_submit(session_id: str):
+    store = get_wizard_store()
+    draft = store.get(session_id)
+    if draft is None:
+        abort(404)
+    if draft.status == "submitted":
+        return _wizard_already_submitted()
+
+    error = _wizard_submit_error(draft.profile, draft.inputs or {})
+    if error:
+        return error
+
+    # First write of this draft to wizard_sessions (unless it idled out earlier).
+    ws = store.materialise(draft)
+    resp = _create_job_from_wizard_session(ws)
+    store.discard(draft)
+    return resp
+
+
+@jobs_bp.post("/api/wizard/submit")
+@login_required
+def wizard_submit_path():
+    """
+    One-shot wizard submission for clients that walked the published tree
+    locally: {"path": [...], "inputs": {...}} is validated against the tree and
+    turned into a job in a single transaction.
+    """
+    data = request.get_json(silent=True) or {}
+    path = data.get("path")
+    inputs = data.get("inputs") or {}
+    if not isinstance(path, list) or not all(isinstance(p, str) for p in path):
+        return jsonify({"error": "'path' must be a list of option keys"}), 400
+    if not isinstance(inputs, dict):
+        return jsonify({"error": "'inputs' must be an object"}), 400
+
+    try:
+        node = get_node_for_path(path)
+    except KeyError as e:
+        return jsonify({"error": f"Invalid choice: {e.args[0]}", "path": path}), 400
+
+    profile = node.get("profile")
+    error = _wizard_submit_error(profile, inputs)
+    if error:
+        return error
+
+    ws = WizardSession(path=list(path), inputs=inputs, profile=profile, status="ready")
+    db.session.add(ws)
+    db.session.flush()
+
+    return _create_job_from_wizard_session(ws)
 
-    if not ws.profile:
-        return jsonify({"error": "Wizard session not complete (no profile resolved)."}), 400
 
+def _create_job_from_wizard_session(ws: WizardSession):
     inputs = ws.inputs or {}
-    missing = _wizard_missing_required(ws.profile, inputs)
-    if missing:
-        return jsonify({"error": "Missing required inputs", "missing": missing}), 400
 
     # If you haven't added project fields to the wizard yet, we generate a minimal project.
     project_name = inputs.get("project_name") or f"Wizard Project (session {ws.id})"
@@ -847,56 +1466,29 @@ def wizard_submit(session_id: int):
     )
     db.session.add(job)
     db.session.flush()
+    record_status_change(None, job.status)
 
     # same defaults as /jobs/new
     db.session.add(SearchConfig(job_id=job.id))
     db.session.add(ValidationConfig(job_id=job.id))
 
-    # Write run artifacts
-    run_dir = Path(current_app.instance_path) / "jobs" / str(job.id)
-    run_dir.mkdir(parents=True, exist_ok=True)
-
-    params_path = run_dir / "params.json"
-    params_path.write_text(json.dumps(inputs, indent=2), encoding="utf-8")
-
-    repo_root = Path(current_app.root_path).parent
-    pipeline_path = repo_root / "pipeline" / "main.nf"
-    config_path = repo_root / "pipeline" / "nextflow.config"
-
-    run_sh = run_dir / "run.sh"
-    run_sh.write_text(
-        "\n".join([
-            "#!/usr/bin/env bash",
-            "set -euo pipefail",
-            f'nextflow run "{pipeline_path}" -c "{config_path}" -profile "{ws.profile}" -params-file "{params_path}"',
-            ""
-        ]),
-        encoding="utf-8"
-    )
-    run_sh.chmod(0o755)
-
-    (run_dir / "profile.txt").write_text(ws.profile + "\n", encoding="utf-8")
+    # The run dir is written by the artifact workers after commit.
+    queue_run_artifacts(job, ws.profile, inputs)
 
-    (run_dir / "nextflow.config.snapshot").write_text(
-        Path(config_path).read_text(encoding="utf-8"),
-        encoding="utf-8"
-    )
-
-    job.run_dir = str(run_dir)
-
-    db.session.add(JobEvent(
+    audit_sink.record(
         job_id=job.id,
         actor_user_id=current_user.id,
         event_type="CREATED_FROM_WIZARD",
         payload_json={
             "wizard_session_id": ws.id,
-            "path": [p for p in (session.path or []) if p != "options"]
+            "path": [p for p in (ws.path or []) if p != "options"],
             "profile": ws.profile,
         }
-    ))
+    )
 
     ws.status = "submitted"
     db.session.commit()
+    artifact_materialiser.wake()
 
     return jsonify({
         "job_id": job.id,
@@ -904,6 +1496,8 @@ def wizard_submit(session_id: int):
         "wizard_session_id": ws.id,
         "profile": ws.profile,
         "run_dir": job.run_dir,
+        # as queued at submit time; the artifact workers move it to READY/FAILED later
+        "run_dir_state": job.run_dir_state,
         "detail_url": url_for("jobs.job_detail", job_id=job.id),
     }), 201
 
@@ -911,9 +1505,9 @@ def wizard_submit(session_id: int):
 from flask import render_template_string
 from flask_login import login_required
 
-@jobs_bp.get("/wizard-test-submit/<int:session_id>")
+@jobs_bp.get("/wizard-test-submit/<session_id>")
 @login_required
-def wizard_test_submit_page(session_id: int):
+def wizard_test_submit_page(session_id: str):
     return render_template_string("""
     <h1>Wizard submit test</h1>
     <form method="post" action="/jobs/api/wizard/sessions/{{sid}}/submit">
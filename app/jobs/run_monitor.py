@@ -0,0 +1,332 @@
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.audit import audit_sink
+from app.extensions import db
+from app.models.job import Job, JobProgress, JobRun, JobStatus, RunState, WorkflowState
+from app.jobs.status_counts import record_status_change
+
+logger = logging.getLogger(__name__)
+
+NEXTFLOW_LOG = ".nextflow.log"
+TRACE_FILE = "trace.txt"
+
+# .nextflow.log lines the monitor acts on
+_SUBMITTED = re.compile(r"\[[0-9a-f]{2}/[0-9a-f]{6}\] Submitted process > (.+?)\s*$")
+_PROCESS_ERROR = re.compile(r"Error executing process > '(.+)'")
+_ABORTED = re.compile(r"Session aborted -- Cause: (.*)")
+_LAUNCH_ERROR = re.compile(r" ERROR nextflow\.cli\.Launcher - (.*)")
+_GOODBYE = "Execution complete -- Goodbye"
+
+# trace.txt status -> counter
+_TRACE_STATUSES = {"COMPLETED": "completed", "CACHED": "cached", "FAILED": "failed", "ABORTED": "aborted"}
+_COUNTERS = ("submitted", "completed", "cached", "failed", "aborted")
+
+# failed tasks listed in one PROCESS_FAILED event
+_FAILED_SAMPLE = 20
+_IN_CHUNK = 500
+
+
+@dataclass
+class TailRead:
+    inode: int
+    offset: int
+    lines: List[str]
+    # the file was replaced or truncated since the last read
+    reset: bool = False
+
+
+def tail_lines(path: Path, inode: Optional[int], offset: int, max_bytes: int) -> Optional[TailRead]:
+    """
+    Complete lines appended to `path` since byte `offset` of the file with
+    `inode`, reading at most `max_bytes`. A different inode or a file shorter
+    than `offset` means it was rotated or truncated, and it is read from the
+    start. A partial last line is left for the next call, so the returned
+    offset always sits just past a newline. None when there is nothing new.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    if st.st_ino == inode and st.st_size == offset:
+        return None
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with fh:
+        st = os.fstat(fh.fileno())
+        reset = inode is not None and (st.st_ino != inode or st.st_size < offset)
+        if reset or inode is None:
+            offset = 0
+        fh.seek(offset)
+        chunk = fh.read(min(max_bytes, st.st_size - offset))
+    end = chunk.rfind(b"\n") + 1
+    if end == 0 and len(chunk) == max_bytes:
+        # a single line longer than max_bytes; skip it rather than stall
+        end = len(chunk)
+    lines = chunk[:end].decode("utf-8", "replace").splitlines()
+    if not lines and not reset and st.st_ino == inode:
+        return None
+    return TailRead(inode=st.st_ino, offset=offset + end, lines=lines, reset=reset)
+
+
+def _process_name(task_name: str) -> str:
+    # "COMET_SEARCH (sample_1)" -> "COMET_SEARCH"
+    return task_name.split(" (", 1)[0].strip()
+
+
+@dataclass
+class MonitorReport:
+    jobs_followed: int = 0
+    jobs_updated: int = 0
+    bytes_read: int = 0
+    finished: List[Tuple[int, str]] = field(default_factory=list)
+    status_changes: List[Tuple[int, str]] = field(default_factory=list)
+
+
+class RunMonitor:
+    """
+    Follows the .nextflow.log and trace.txt of every IN_PROGRESS job with a
+    run dir and keeps its JobProgress row current: tasks submitted per
+    process from the log, tasks completed, cached, failed or aborted from
+    the trace, and the end of the session (success, or the first process
+    error / abort cause).
+
+    Each poll stats both files per job and reads only the bytes past the
+    stored offset (at most RUN_MONITOR_MAX_READ per file, the rest on the
+    next poll), so one thread keeps up with hundreds of runs; nothing is
+    written for a job whose files have not grown. A new .nextflow.log
+    (Nextflow rotates it on every launch, -resume included) starts a new
+    session and clears the counters.
+
+    Failed tasks are recorded as PROCESS_FAILED events. When the log reports
+    the end of a session the job moves from IN_PROGRESS to
+    RUNNER_SUCCESS_STATUS or RUNNER_FAILURE_STATUS with a STATUS_CHANGED
+    event, unless a worker is running it: then run.sh's exit code decides
+    (see jobs/runner.py). A job that leaves IN_PROGRESS is read one last
+    time before it is dropped. Run a single monitor per database, either the
+    RUN_MONITOR_INTERVAL thread or `flask jobs monitor-runs`.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.max_read = 1024 * 1024
+        self.success_status = JobStatus.COMPLETED
+        self.failure_status = JobStatus.QC
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.interval = app.config.get("RUN_MONITOR_INTERVAL", 0)
+        self.max_read = app.config.get("RUN_MONITOR_MAX_READ", 1024 * 1024)
+        self.success_status = app.config.get("RUNNER_SUCCESS_STATUS", JobStatus.COMPLETED)
+        self.failure_status = app.config.get("RUNNER_FAILURE_STATUS", JobStatus.QC)
+        app.extensions["run_monitor"] = self
+        if self.interval:
+            self.start()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="run-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_forever(self, interval: float) -> None:
+        """Poll every `interval` seconds in the calling thread until stop()."""
+        self._stop.clear()
+        while True:
+            self._poll_logged()
+            if self._stop.wait(interval):
+                return
+
+    def poll(self) -> MonitorReport:
+        report = MonitorReport()
+        with self.app.app_context():
+            for job_id, run_dir, status, progress in self._followed_jobs():
+                report.jobs_followed += 1
+                try:
+                    self._follow(job_id, run_dir, status, progress, report)
+                except OSError as e:
+                    logger.warning("cannot read run dir of job %s: %s", job_id, e)
+            db.session.commit()
+        return report
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._poll_logged()
+
+    def _poll_logged(self) -> None:
+        try:
+            report = self.poll()
+            for job_id, state in report.finished:
+                logger.info("nextflow session of job %s ended: %s", job_id, state)
+        except Exception:
+            logger.exception("run monitor poll failed")
+
+    def _followed_jobs(self) -> List[Tuple[int, str, str, Optional[JobProgress]]]:
+        """IN_PROGRESS jobs with a run dir, plus jobs whose session is still open but have left IN_PROGRESS."""
+        active = db.session.execute(
+            select(Job.id, Job.run_dir, Job.status)
+            .where(Job.status == JobStatus.IN_PROGRESS, Job.run_dir.isnot(None))
+        ).all()
+        closing = db.session.execute(
+            select(Job.id, Job.run_dir, Job.status)
+            .join(JobProgress, JobProgress.job_id == Job.id)
+            .where(JobProgress.state == WorkflowState.RUNNING, Job.status != JobStatus.IN_PROGRESS)
+        ).all()
+        rows = {job_id: (run_dir, status) for job_id, run_dir, status in list(active) + list(closing)}
+        job_ids = sorted(rows)
+        progress: Dict[int, JobProgress] = {}
+        for i in range(0, len(job_ids), _IN_CHUNK):
+            for p in JobProgress.query.filter(JobProgress.job_id.in_(job_ids[i:i + _IN_CHUNK])):
+                progress[p.job_id] = p
+        return [(job_id, rows[job_id][0], rows[job_id][1], progress.get(job_id)) for job_id in job_ids]
+
+    def _follow(self, job_id: int, run_dir: Optional[str], status: str,
+                progress: Optional[JobProgress], report: MonitorReport) -> None:
+        closing = status != JobStatus.IN_PROGRESS
+        base = Path(run_dir or "")
+        log = tail_lines(base / NEXTFLOW_LOG, progress.log_inode if progress else None,
+                         progress.log_offset if progress else 0, self.max_read) if run_dir else None
+
+        if progress is None:
+            if log is None:
+                return
+            progress = JobProgress(job_id=job_id, processes={}, log_offset=0, trace_offset=0)
+            db.session.add(progress)
+            self._new_session(progress)
+        elif log is not None and log.reset:
+            self._new_session(progress)
+
+        trace = tail_lines(base / TRACE_FILE, progress.trace_inode, progress.trace_offset,
+                           self.max_read) if run_dir else None
+        changed = log is not None or trace is not None
+        processes = {name: dict(counts) for name, counts in (progress.processes or {}).items()}
+        failed_tasks: List[dict] = []
+        was_running = progress.state == WorkflowState.RUNNING
+
+        if log is not None:
+            report.bytes_read += log.offset - (0 if log.reset else progress.log_offset)
+            progress.log_inode, progress.log_offset = log.inode, log.offset
+            self._read_log(progress, log.lines, processes)
+        if trace is not None:
+            report.bytes_read += trace.offset - (0 if trace.reset else progress.trace_offset)
+            if trace.reset or progress.trace_inode is None:
+                progress.trace_columns = None
+            progress.trace_inode, progress.trace_offset = trace.inode, trace.offset
+            self._read_trace(progress, trace.lines, processes, failed_tasks)
+
+        if closing and progress.state == WorkflowState.RUNNING:
+            progress.state = WorkflowState.STOPPED
+            progress.finished_at = datetime.utcnow()
+            changed = True
+        if not changed:
+            return
+
+        report.jobs_updated += 1
+        progress.processes = processes
+        progress.updated_at = datetime.utcnow()
+        if failed_tasks:
+            audit_sink.record(job_id=job_id, actor_user_id=None, event_type="PROCESS_FAILED", payload_json={
+                "run_id": progress.run_id, "count": len(failed_tasks), "tasks": failed_tasks[:_FAILED_SAMPLE],
+            })
+        if was_running and progress.state in (WorkflowState.SUCCEEDED, WorkflowState.FAILED):
+            report.finished.append((job_id, progress.state))
+            audit_sink.record(job_id=job_id, actor_user_id=None, event_type="WORKFLOW_FINISHED", payload_json={
+                "run_id": progress.run_id, "state": progress.state, "error": progress.error,
+                "totals": progress.totals(),
+            })
+            if not closing and not self._worker_owned(job_id):
+                new_status = self.success_status if progress.state == WorkflowState.SUCCEEDED else self.failure_status
+                if self._set_job_status(job_id, new_status, progress):
+                    report.status_changes.append((job_id, new_status))
+
+    @staticmethod
+    def _new_session(progress: JobProgress) -> None:
+        run = JobRun.query.filter_by(job_id=progress.job_id, state=RunState.RUNNING).first()
+        progress.run_id = run.id if run else None
+        progress.state = WorkflowState.RUNNING
+        progress.error = None
+        progress.processes = {}
+        progress.started_at = datetime.utcnow()
+        progress.finished_at = None
+
+    @staticmethod
+    def _read_log(progress: JobProgress, lines: List[str], processes: Dict[str, dict]) -> None:
+        for line in lines:
+            m = _SUBMITTED.search(line)
+            if m:
+                counts = processes.setdefault(_process_name(m.group(1)), dict.fromkeys(_COUNTERS, 0))
+                counts["submitted"] = counts.get("submitted", 0) + 1
+                continue
+            if progress.error is None:
+                m = _PROCESS_ERROR.search(line) or _ABORTED.search(line) or _LAUNCH_ERROR.search(line)
+                if m:
+                    progress.error = m.group(0) if m.re is _PROCESS_ERROR else m.group(1)
+                    continue
+            if _GOODBYE in line and progress.state == WorkflowState.RUNNING:
+                progress.state = WorkflowState.FAILED if progress.error else WorkflowState.SUCCEEDED
+                progress.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def _read_trace(progress: JobProgress, lines: List[str], processes: Dict[str, dict],
+                    failed_tasks: List[dict]) -> None:
+        columns = progress.trace_columns
+        for line in lines:
+            fields = line.split("\t")
+            if columns is None:
+                columns = fields
+                continue
+            row = dict(zip(columns, fields))
+            counter = _TRACE_STATUSES.get(row.get("status", ""))
+            if counter is None:
+                continue
+            name = row.get("name", "")
+            process = row.get("process") or _process_name(name)
+            counts = processes.setdefault(process, dict.fromkeys(_COUNTERS, 0))
+            counts[counter] = counts.get(counter, 0) + 1
+            if counter == "failed":
+                failed_tasks.append({"process": process, "task": name, "exit": row.get("exit")})
+        progress.trace_columns = columns
+
+    @staticmethod
+    def _worker_owned(job_id: int) -> bool:
+        return JobRun.query.filter_by(job_id=job_id, state=RunState.RUNNING).first() is not None
+
+    @staticmethod
+    def _set_job_status(job_id: int, new_status: str, progress: JobProgress) -> bool:
+        job = db.session.get(Job, job_id)
+        old_status = job.status
+        if old_status != JobStatus.IN_PROGRESS or new_status == old_status:
+            return False
+        record_status_change(old_status, new_status)
+        job.status = new_status
+        audit_sink.record(job_id=job.id, actor_user_id=None, event_type="STATUS_CHANGED",
+                          payload_json={"from": old_status, "to": new_status, "source": "nextflow",
+                                        "error": progress.error})
+        return True
+
+
+run_monitor = RunMonitor()
+
+
+def job_progress(job_id: int) -> Optional[JobProgress]:
+    return db.session.get(JobProgress, job_id)
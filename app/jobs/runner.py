@@ -0,0 +1,384 @@
+import logging
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+from sqlalchemy import or_, select, update
+
+from app.audit import audit_sink
+from app.extensions import db
+from app.models.job import Job, JobRun, JobStatus, RunDirState, RunState
+from app.jobs.admission import AdmissionController, ResourceEstimate
+from app.jobs.dispatch import get_dispatcher
+from app.jobs.repository import load_job_aggregate
+from app.jobs.status_counts import record_status_change
+
+logger = logging.getLogger(__name__)
+
+STDOUT_LOG = "stdout.log"
+STDERR_LOG = "stderr.log"
+# Slack between JobRun.started_at and the create time psutil reports for its process.
+_START_SLACK_SECONDS = 5.0
+
+
+class RunnerError(Exception):
+    """A run cannot be queued or cancelled in the job's current state."""
+
+
+def active_run(job_id: int) -> Optional[JobRun]:
+    return JobRun.query.filter(JobRun.job_id == job_id, JobRun.state.in_(RunState.ACTIVE)).first()
+
+
+def enqueue_run(job: Job, user_id: Optional[int]) -> JobRun:
+    """
+    Queue a run of `job`'s run.sh for the workers. The job needs a READY run
+    directory and no queued or running run. The caller commits.
+    """
+    if job.status == JobStatus.ARCHIVED:
+        raise RunnerError("Archived jobs cannot be run.")
+    if job.run_dir_state != RunDirState.READY or not job.run_dir:
+        raise RunnerError("The job has no ready run directory.")
+    if active_run(job.id) is not None:
+        raise RunnerError("The job already has a queued or running run.")
+    run = JobRun(job_id=job.id, requested_by_user_id=user_id, state=RunState.QUEUED)
+    db.session.add(run)
+    db.session.flush()
+    audit_sink.record(job_id=job.id, actor_user_id=user_id, event_type="RUN_QUEUED", payload_json={"run_id": run.id})
+    return run
+
+
+def request_cancel(run: JobRun, user_id: Optional[int]) -> JobRun:
+    """
+    Cancel a queued run straight away, or flag a running one for its worker
+    to terminate on its next poll. The caller commits.
+    """
+    table = JobRun.__table__
+    if run.state == RunState.QUEUED:
+        won = db.session.execute(
+            update(table)
+            .where(table.c.id == run.id, table.c.state == RunState.QUEUED)
+            .values(state=RunState.CANCELLED, finished_at=datetime.utcnow(), error="cancelled before start")
+        ).rowcount
+        db.session.refresh(run)
+        if won:
+            audit_sink.record(job_id=run.job_id, actor_user_id=user_id, event_type="RUN_CANCELLED",
+                              payload_json={"run_id": run.id})
+            return run
+    if run.state == RunState.RUNNING:
+        run.cancel_requested = True
+        audit_sink.record(job_id=run.job_id, actor_user_id=user_id, event_type="RUN_CANCEL_REQUESTED",
+                          payload_json={"run_id": run.id})
+        return run
+    raise RunnerError(f"Run {run.id} has already finished ({run.state}).")
+
+
+def read_log_tail(run_dir: str, name: str, max_bytes: int = 64 * 1024) -> str:
+    path = Path(run_dir) / name
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(max(0, path.stat().st_size - max_bytes))
+            return fh.read().decode("utf-8", "replace")
+    except FileNotFoundError:
+        return ""
+
+
+@dataclass
+class _Child:
+    process: subprocess.Popen
+    terminate_reason: Optional[str] = None
+    terminated_at: Optional[float] = None
+
+
+class JobWorker:
+    """
+    Runs queued job_runs as subprocesses, at most `slots` at a time.
+
+    Each poll the worker reaps finished children, terminates the process
+    group of any run flagged cancel_requested, refreshes the heartbeat of
+    its runs and then claims queued runs in dispatch order (priority with
+    aging; compare-and-set on state, so two workers never start the same
+    run) until its slots are full or admission control holds the next one
+    back for lack of memory or CPUs (see jobs/admission.py). run.sh is
+    started in the run directory with stdout/stderr appended to stdout.log
+    and stderr.log there. A RUNNING run whose heartbeat is older than
+    RUNNER_HEARTBEAT_TIMEOUT belonged to a worker that died and is failed;
+    if that worker ran on this host, what is left of the run's process group
+    is killed first.
+
+    Job.status moves to IN_PROGRESS when a run starts and, if still
+    IN_PROGRESS when it ends, to RUNNER_SUCCESS_STATUS (COMPLETED) or
+    RUNNER_FAILURE_STATUS (QC). A cancelled run puts back the status the job
+    had before it started.
+    """
+
+    def __init__(self, app, slots: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.app = app
+        self.slots = max(1, slots or app.config.get("RUNNER_SLOTS", 2))
+        self.poll_interval = poll_interval or app.config.get("RUNNER_POLL_INTERVAL", 2.0)
+        self.heartbeat_timeout = app.config.get("RUNNER_HEARTBEAT_TIMEOUT", 120)
+        self.kill_grace = app.config.get("RUNNER_KILL_GRACE", 30)
+        self.shell = app.config.get("RUNNER_SHELL", "bash")
+        self.script = app.config.get("RUNNER_SCRIPT", "run.sh")
+        self.success_status = app.config.get("RUNNER_SUCCESS_STATUS", JobStatus.COMPLETED)
+        self.failure_status = app.config.get("RUNNER_FAILURE_STATUS", JobStatus.QC)
+        # oldest queued runs considered per claim, in dispatch order (see jobs/dispatch.py)
+        self.claim_window = app.config.get("RUNNER_CLAIM_WINDOW", 500)
+        self.admission = AdmissionController(app.config)
+        self.backfill = app.config.get("ADMISSION_BACKFILL", False)
+        self.hostname = socket.gethostname()
+        self.worker_id = f"{self.hostname}:{os.getpid()}"
+        self._children: Dict[int, _Child] = {}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop claiming, terminate running children and return from run() once they exit."""
+        self._stop.set()
+
+    def run(self, once: bool = False) -> None:
+        """Poll until stop(); with `once`, return as soon as the queue is empty and every child has exited."""
+        while True:
+            self._reap()
+            self._poll_runs()
+            if self._stop.is_set():
+                for run_id, child in self._children.items():
+                    self._terminate(run_id, child, "worker stopped")
+                if not self._children:
+                    return
+                time.sleep(min(self.poll_interval, 0.5))
+                continue
+            claimed = self._fill_slots()
+            if once and not claimed and not self._children:
+                return
+            self._stop.wait(self.poll_interval)
+
+    def _fill_slots(self) -> int:
+        claimed = 0
+        while len(self._children) < self.slots:
+            run_id = self._next_run()
+            if run_id is None:
+                break
+            self._launch(run_id)
+            claimed += 1
+        return claimed
+
+    def _next_run(self) -> Optional[int]:
+        """
+        Claim the first queued run, in dispatch order, that admission control
+        lets start. Without ADMISSION_BACKFILL a run that does not fit holds
+        back everything behind it, so large jobs are not starved by small ones.
+        """
+        table = JobRun.__table__
+        with self.app.app_context():
+            queued = dict(db.session.execute(
+                select(table.c.job_id, table.c.id).where(table.c.state == RunState.QUEUED)
+                .order_by(table.c.queued_at, table.c.id).limit(self.claim_window)
+            ).all())
+            if not queued:
+                return None
+            reserved = self._reserved()
+            for job_id in get_dispatcher().order(queued):
+                run_id = queued[job_id]
+                job = load_job_aggregate(job_id)
+                if job is None:
+                    continue
+                estimate = self.admission.estimate(job)
+                reason = self.admission.check(estimate, reserved)
+                db.session.remove()
+                if reason is not None:
+                    self._defer(run_id, reason)
+                    if self.backfill:
+                        continue
+                    return None
+                if self._claim(run_id, estimate):
+                    return run_id
+        return None
+
+    def _reserved(self) -> List[Tuple[float, int]]:
+        """Estimates of the runs currently running on this host, by any worker."""
+        table = JobRun.__table__
+        rows = db.session.execute(
+            select(table.c.est_cpus, table.c.est_memory_mb)
+            .where(table.c.state == RunState.RUNNING, table.c.worker.startswith(f"{self.hostname}:"))
+        ).all()
+        return [(cpus or 0.0, memory or 0) for cpus, memory in rows]
+
+    def _claim(self, run_id: int, estimate: ResourceEstimate) -> bool:
+        table = JobRun.__table__
+        with db.engine.begin() as conn:
+            # compare-and-set so two workers never take the same run
+            return bool(conn.execute(
+                update(table)
+                .where(table.c.id == run_id, table.c.state == RunState.QUEUED)
+                .values(state=RunState.RUNNING, worker=self.worker_id, heartbeat_at=datetime.utcnow(),
+                        est_cpus=estimate.cpus, est_memory_mb=estimate.memory_mb, deferred_reason=None)
+            ).rowcount)
+
+    def _defer(self, run_id: int, reason: str) -> None:
+        table = JobRun.__table__
+        with db.engine.begin() as conn:
+            changed = conn.execute(
+                update(table)
+                .where(table.c.id == run_id, table.c.state == RunState.QUEUED,
+                       or_(table.c.deferred_reason.is_(None), table.c.deferred_reason != reason))
+                .values(deferred_reason=reason, deferred_at=datetime.utcnow())
+            ).rowcount
+        if changed:
+            logger.info("run %s deferred: %s", run_id, reason)
+
+    def _launch(self, run_id: int) -> None:
+        with self.app.app_context():
+            run = db.session.get(JobRun, run_id)
+            job = db.session.get(Job, run.job_id)
+            run_dir = Path(job.run_dir or "")
+            script = run_dir / self.script
+            if not job.run_dir or not script.is_file():
+                self._record_end(run, job, RunState.FAILED, None, f"{script} does not exist")
+                return
+            try:
+                with open(run_dir / STDOUT_LOG, "ab") as out, open(run_dir / STDERR_LOG, "ab") as err:
+                    process = subprocess.Popen(
+                        [self.shell, str(script)], cwd=run_dir, stdin=subprocess.DEVNULL,
+                        stdout=out, stderr=err, start_new_session=True,
+                    )
+            except OSError as e:
+                self._record_end(run, job, RunState.FAILED, None, f"{type(e).__name__}: {e}")
+                return
+            self._children[run_id] = _Child(process)
+            run.pid = process.pid
+            run.started_at = datetime.utcnow()
+            run.previous_status = job.status
+            self._set_job_status(job, JobStatus.IN_PROGRESS, run)
+            audit_sink.record(job_id=job.id, actor_user_id=None, event_type="RUN_STARTED",
+                              payload_json={"run_id": run.id, "pid": process.pid, "worker": self.worker_id})
+            db.session.commit()
+            logger.info("started run %s of job %s (pid %s)", run.id, job.id, process.pid)
+
+    def _reap(self) -> None:
+        for run_id, child in list(self._children.items()):
+            code = child.process.poll()
+            if code is None:
+                if child.terminated_at and time.monotonic() - child.terminated_at > self.kill_grace:
+                    self._signal(child, signal.SIGKILL)
+                continue
+            del self._children[run_id]
+            with self.app.app_context():
+                run = db.session.get(JobRun, run_id)
+                job = db.session.get(Job, run.job_id)
+                if child.terminate_reason == "cancelled":
+                    self._record_end(run, job, RunState.CANCELLED, code, "cancelled")
+                elif child.terminate_reason:
+                    self._record_end(run, job, RunState.FAILED, code, child.terminate_reason)
+                elif code == 0:
+                    self._record_end(run, job, RunState.SUCCEEDED, code, None)
+                else:
+                    self._record_end(run, job, RunState.FAILED, code, f"exit code {code}")
+
+    def _poll_runs(self) -> None:
+        """Heartbeat our runs, pick up cancel requests and fail runs of dead workers."""
+        table = JobRun.__table__
+        now = datetime.utcnow()
+        with self.app.app_context():
+            ids = list(self._children)
+            if ids:
+                with db.engine.begin() as conn:
+                    conn.execute(update(table).where(table.c.id.in_(ids)).values(heartbeat_at=now))
+                    cancelled = conn.execute(
+                        select(table.c.id).where(table.c.id.in_(ids), table.c.cancel_requested.is_(True))
+                    ).scalars().all()
+                for run_id in cancelled:
+                    self._terminate(run_id, self._children[run_id], "cancelled")
+
+            stale = now - timedelta(seconds=self.heartbeat_timeout)
+            lost = JobRun.query.filter(JobRun.state == RunState.RUNNING, JobRun.heartbeat_at < stale).all()
+            for run in lost:
+                if run.id not in self._children:
+                    error = f"worker {run.worker} stopped sending heartbeats"
+                    killed = self._kill_orphans(run)
+                    if killed:
+                        error += f"; killed {killed} leftover process(es)"
+                    self._record_end(run, db.session.get(Job, run.job_id), RunState.FAILED, None, error)
+
+    def _kill_orphans(self, run: JobRun) -> int:
+        """
+        SIGKILL the processes still in the group of a run whose worker died on
+        this host. run.pid is also the group id (runs start in their own
+        session); a live process under that pid that started at another time
+        is a reused pid and is left alone. Returns how many were killed.
+        """
+        if not run.pid or not run.started_at or not (run.worker or "").startswith(f"{self.hostname}:"):
+            return 0
+        started = (run.started_at - datetime(1970, 1, 1)).total_seconds()
+        try:
+            if abs(psutil.Process(run.pid).create_time() - started) > _START_SLACK_SECONDS:
+                return 0
+        except psutil.NoSuchProcess:
+            pass  # the leader exited; children it started may still be running
+        except psutil.Error:
+            return 0
+
+        killed = 0
+        for proc in psutil.process_iter(["create_time"]):
+            try:
+                if os.getpgid(proc.pid) != run.pid or proc.info["create_time"] < started - _START_SLACK_SECONDS:
+                    continue
+                proc.kill()
+                killed += 1
+            except (OSError, psutil.Error):
+                continue
+        if killed:
+            logger.warning("killed %d leftover process(es) of run %s (group %s)", killed, run.id, run.pid)
+        return killed
+
+    def _terminate(self, run_id: int, child: _Child, reason: str) -> None:
+        if child.terminated_at is not None:
+            return
+        child.terminate_reason = reason
+        child.terminated_at = time.monotonic()
+        self._signal(child, signal.SIGTERM)
+        logger.info("terminating run %s (%s)", run_id, reason)
+
+    @staticmethod
+    def _signal(child: _Child, sig: int) -> None:
+        try:
+            os.killpg(child.process.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _record_end(self, run: JobRun, job: Job, state: str, exit_code: Optional[int], error: Optional[str]) -> None:
+        run.state = state
+        run.exit_code = exit_code
+        run.error = error
+        run.finished_at = datetime.utcnow()
+        if run.started_at is not None and job.status == JobStatus.IN_PROGRESS:
+            if state == RunState.SUCCEEDED:
+                self._set_job_status(job, self.success_status, run)
+            elif state == RunState.CANCELLED:
+                self._set_job_status(job, run.previous_status or JobStatus.TRIAGED, run)
+            else:
+                self._set_job_status(job, self.failure_status, run)
+        audit_sink.record(job_id=job.id, actor_user_id=None, event_type="RUN_FINISHED",
+                          payload_json={"run_id": run.id, "state": state, "exit_code": exit_code, "error": error})
+        db.session.commit()
+        logger.info("run %s of job %s finished: %s", run.id, job.id, state)
+
+    @staticmethod
+    def _set_job_status(job: Job, new_status: str, run: JobRun) -> None:
+        old_status = job.status
+        if new_status == old_status:
+            return
+        record_status_change(old_status, new_status)
+        job.status = new_status
+        audit_sink.record(job_id=job.id, actor_user_id=None, event_type="STATUS_CHANGED",
+                          payload_json={"from": old_status, "to": new_status, "run_id": run.id})
+
+
+def job_runs(job_id: int, limit: int = 20) -> List[JobRun]:
+    return JobRun.query.filter_by(job_id=job_id).order_by(JobRun.id.desc()).limit(limit).all()
@@ -0,0 +1,70 @@
+from typing import Dict, Optional
+
+from sqlalchemy import func, update
+
+from app.extensions import db
+from app.models.job import Job, JobStatus, JobStatusCount
+
+
+def adjust_status_count(status: str, delta: int) -> None:
+    """
+    Apply `delta` to the counter row for `status` inside the current transaction.
+    The caller commits together with the job change that caused it.
+
+    On SQLite and PostgreSQL this is a single upsert, so two transactions that
+    both create the first row for a status do not collide on its primary key.
+    """
+    dialect = db.engine.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(JobStatusCount).values(status=status, count=max(delta, 0))
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[JobStatusCount.status],
+            set_={"count": JobStatusCount.count + delta},
+        ))
+        return
+    result = db.session.execute(
+        update(JobStatusCount)
+        .where(JobStatusCount.status == status)
+        .values(count=JobStatusCount.count + delta)
+    )
+    if not result.rowcount:
+        db.session.add(JobStatusCount(status=status, count=max(delta, 0)))
+        db.session.flush()
+
+
+def record_status_change(old_status: Optional[str], new_status: Optional[str]) -> None:
+    """
+    Keep job_status_counts in step with a job moving from `old_status` to `new_status`.
+    Use old_status=None for newly created jobs.
+    """
+    if old_status == new_status:
+        return
+    if old_status:
+        adjust_status_count(old_status, -1)
+    if new_status:
+        adjust_status_count(new_status, 1)
+
+
+def status_counts() -> Dict[str, int]:
+    counts = {s: 0 for s in JobStatus.ALL}
+    for row in JobStatusCount.query.all():
+        if row.status in counts:
+            counts[row.status] = row.count
+    return counts
+
+
+def rebuild_status_counts() -> Dict[str, int]:
+    """
+    Recompute every counter from the jobs table (drift repair).
+    Does not commit.
+    """
+    rows = db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    JobStatusCount.query.delete()
+    for status, n in rows:
+        db.session.add(JobStatusCount(status=status, count=n))
+    db.session.flush()
+    return {status: n for status, n in rows}
@@ -0,0 +1,159 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.extensions import db
+from app.models.wizard_session import WizardSession
+from app.jobs.wizard_store import get_wizard_store
+
+logger = logging.getLogger(__name__)
+
+# Statuses of drafts nobody has submitted; submitted sessions are referenced
+# from job events and are kept.
+EXPIRABLE_STATUSES = ("draft", "ready")
+
+
+@dataclass
+class DraftSweepReport:
+    sessions_deleted: int = 0
+    sessions_archived: int = 0
+    bytes_reclaimed: int = 0
+
+
+def _row_document(row) -> dict:
+    return {
+        "id": row.id,
+        "draft_key": row.draft_key,
+        "created_at": row.created_at.isoformat(),
+        "updated_at": row.updated_at.isoformat(),
+        "path": row.path,
+        "profile": row.profile,
+        "inputs": row.inputs,
+        "status": row.status,
+    }
+
+
+def sweep_expired_drafts(older_than: datetime, chunk_size: int = 500, pause: float = 0.0,
+                         archive_dir: Optional[str] = None,
+                         report: DraftSweepReport | None = None) -> DraftSweepReport:
+    """
+    Delete unsubmitted wizard_sessions rows last touched before `older_than`,
+    `chunk_size` rows per transaction. With `archive_dir`, rows are first
+    appended to a gzipped JSON-lines file there (one file per day).
+
+    `bytes_reclaimed` is the size of the rows' JSON encoding, which is close
+    to what they occupied in the table.
+    """
+    report = report or DraftSweepReport()
+    archive_file = None
+    if archive_dir:
+        Path(archive_dir).mkdir(parents=True, exist_ok=True)
+        name = f"wizard_sessions-{datetime.utcnow():%Y%m%d}.jsonl.gz"
+        archive_file = gzip.open(Path(archive_dir) / name, "at", encoding="utf-8")
+
+    try:
+        while True:
+            rows = db.session.execute(
+                select(WizardSession.id, WizardSession.draft_key, WizardSession.created_at,
+                       WizardSession.updated_at, WizardSession.path, WizardSession.profile,
+                       WizardSession.inputs, WizardSession.status)
+                .where(WizardSession.status.in_(EXPIRABLE_STATUSES),
+                       WizardSession.updated_at < older_than)
+                .order_by(WizardSession.updated_at, WizardSession.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+
+            lines = [json.dumps(_row_document(row), separators=(",", ":")) for row in rows]
+            if archive_file is not None:
+                archive_file.write("\n".join(lines) + "\n")
+                archive_file.flush()
+
+            db.session.execute(
+                delete(WizardSession).where(WizardSession.id.in_([row.id for row in rows]))
+            )
+            db.session.commit()
+
+            report.sessions_deleted += len(rows)
+            if archive_file is not None:
+                report.sessions_archived += len(rows)
+            report.bytes_reclaimed += sum(len(line) for line in lines)
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+    return report
+
+
+class DraftSweeper:
+    """
+    Optional background thread running sweep_expired_drafts() every
+    WIZARD_DRAFT_SWEEP_INTERVAL seconds (0, the default, leaves it off and
+    the sweep to `flask jobs expire-wizard-drafts`). Drafts older than
+    WIZARD_DRAFT_TTL_HOURS are removed, and archived to
+    WIZARD_DRAFT_ARCHIVE_DIR when that is set. Each pass first flushes idle
+    drafts from the wizard store to wizard_sessions.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.ttl = timedelta(hours=168)
+        self.chunk_size = 500
+        self.archive_dir: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.interval = app.config.get("WIZARD_DRAFT_SWEEP_INTERVAL", 0)
+        self.ttl = timedelta(hours=app.config.get("WIZARD_DRAFT_TTL_HOURS", 168))
+        self.chunk_size = app.config.get("WIZARD_DRAFT_SWEEP_CHUNK", 500)
+        self.archive_dir = app.config.get("WIZARD_DRAFT_ARCHIVE_DIR")
+        app.extensions["wizard_draft_sweeper"] = self
+        if self.interval:
+            self.start()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wizard-draft-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sweep(self) -> DraftSweepReport:
+        with self.app.app_context():
+            # Idle drafts still held by the write-behind store reach the table
+            # here even when no wizard request comes in to trigger the flush.
+            get_wizard_store().flush_idle()
+            return sweep_expired_drafts(datetime.utcnow() - self.ttl, chunk_size=self.chunk_size,
+                                        pause=0.05, archive_dir=self.archive_dir)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                report = self.sweep()
+                if report.sessions_deleted:
+                    logger.info("expired %d wizard drafts (%d bytes)",
+                                report.sessions_deleted, report.bytes_reclaimed)
+            except Exception:
+                logger.exception("wizard draft sweep failed")
+
+
+draft_sweeper = DraftSweeper()
@@ -1,78 +1,135 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from app.extensions import db
-from app.models.wizard_session import WizardSession
+from flask import abort
+
+from app.jobs.wizard_store import WizardDraft, WizardDraftStore
 from app.jobs.wizard_tree import WizardTree
 
+
+class WizardStepError(ValueError):
+    """An operation in a batched wizard replay was invalid; nothing was saved."""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Step {index}: {message}")
+        self.index = index
+
+
+def _options_for_step(tree: WizardTree, index: int, path: List[str]) -> List[str]:
+    try:
+        return tree.options(path)
+    except KeyError:
+        raise WizardStepError(index, f"Path is not in the wizard tree: {path}") from None
+
+
+def _apply_status(ws: WizardDraft) -> None:
+    """Derive the draft status from its profile; a submitted draft stays submitted."""
+    if ws.status != "submitted":
+        ws.status = "ready" if ws.profile else "draft"
+
+
+def apply_operations(tree: WizardTree, ws: WizardDraft, operations: List[Dict[str, Any]]) -> WizardDraft:
+    """
+    Replay `operations` ("choose", "back", "set_inputs") against a copy of the
+    draft's path and inputs, validating every step against `tree`.
+    The draft is only touched if every step is valid; the caller saves it.
+    """
+    path = list(ws.path or [])
+    inputs = dict(ws.inputs or {})
+    profile = ws.profile
+
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise WizardStepError(i, "operation must be an object")
+        kind = op.get("op")
+        if kind == "choose":
+            choice = op.get("choice")
+            if choice not in _options_for_step(tree, i, path):
+                raise WizardStepError(i, f"Invalid choice: {choice}")
+            path.append(choice)
+            profile, _ = tree.resolve_profile(path)
+        elif kind == "back":
+            path = path[:-1]
+            profile, _ = tree.resolve_profile(path)
+        elif kind == "set_inputs":
+            values = op.get("inputs")
+            if not isinstance(values, dict):
+                raise WizardStepError(i, "'inputs' must be an object")
+            inputs.update(values)
+        else:
+            raise WizardStepError(i, f"Unknown operation: {kind}")
+
+    ws.path = path
+    ws.inputs = inputs
+    ws.profile = profile
+    _apply_status(ws)
+    return ws
+
+
 class WizardSessionService:
-    def __init__(self, tree: WizardTree):
+    """
+    Wizard steps against drafts held in a WizardDraftStore; nothing here
+    writes to the main database.
+    """
+
+    def __init__(self, tree: WizardTree, store: WizardDraftStore):
         self.tree = tree
+        self.store = store
 
-    def create(self) -> WizardSession:
-        ws = WizardSession(path=[], inputs={}, status="draft")
-        db.session.add(ws)
-        db.session.commit()
-        return ws
+    def create(self) -> WizardDraft:
+        return self.store.create()
 
-    def get(self, session_id: int) -> WizardSession:
-        return WizardSession.query.get_or_404(session_id)
+    def get(self, session_id: str) -> WizardDraft:
+        ws = self.store.get(session_id)
+        if ws is None:
+            abort(404)
+        return ws
 
     def set_choice(self, ws, choice: str):
         """
         Move the session one step by selecting `choice`.
         If the newly selected node resolves to a profile, set ws.profile immediately.
         """
-        node = get_node_for_path(ws.path)
-        options = node.get("options") or {}
-        if choice not in options:
+        if choice not in self.tree.options(ws.path or []):
             raise ValueError(f"Invalid choice: {choice}")
 
-        # advance path
+        # advance path and take the profile of the selected node (None mid-tree)
         ws.path = list(ws.path or []) + [choice]
+        ws.profile, _ = self.tree.resolve_profile(ws.path)
 
-        # resolve node at new path
-        new_node = get_node_for_path(ws.path)
-        profile = new_node.get("profile")
-        if profile:
-            # set profile immediately when a profile is present on the selected node
-            ws.profile = profile
-
-        # Clear any previously computed status that depends on path/inputs
-        ws.status = None
-
-        # persist the session (the service should provide save/update)
-        try:
-            self.save(ws)
-        except AttributeError:
-            # service may manage persistence differently; fallback to update() if available
-            if hasattr(self, "update"):
-                self.update(ws)
+        _apply_status(ws)
+        self.store.save(ws)
         return ws
 
-    def back(self, ws: WizardSession) -> WizardSession:
+    def back(self, ws: WizardDraft) -> WizardDraft:
         if ws.path:
             ws.path = ws.path[:-1]
         profile, normalized_path = self.tree.resolve_profile(ws.path or [])
         ws.path = normalized_path
         ws.profile = profile
-        ws.status = "ready" if ws.profile else "draft"
-        db.session.commit()
+        _apply_status(ws)
+        self.store.save(ws)
+        return ws
+
+    def apply(self, ws: WizardDraft, operations: List[Dict[str, Any]]) -> WizardDraft:
+        """Apply a batch of operations (see apply_operations) and save the draft once."""
+        ws = apply_operations(self.tree, ws, operations)
+        self.store.save(ws)
         return ws
 
-    def set_inputs(self, ws: WizardSession, inputs: Dict[str, Any]) -> WizardSession:
+    def set_inputs(self, ws: WizardDraft, inputs: Dict[str, Any]) -> WizardDraft:
         merged = dict(ws.inputs or {})
         merged.update(inputs or {})
         ws.inputs = merged
-        db.session.commit()
+        self.store.save(ws)
         return ws
 
-    def state(self, ws: WizardSession) -> Dict[str, Any]:
+    def state(self, ws: WizardDraft) -> Dict[str, Any]:
         return {
             "id": ws.id,
-            "path": [p for p in (session.path or []) if p != "options"],
+            "path": [p for p in (ws.path or []) if p != "options"],
             "profile": ws.profile,
             "status": ws.status,
             "inputs": ws.inputs,
             "options": self.tree.options(ws.path or []),
             "is_leaf": bool(ws.profile),
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,273 @@
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+
+from app.extensions import db
+from app.models.wizard_session import WizardSession
+
+
+@dataclass
+class WizardDraft:
+    """
+    In-flight wizard state. Mirrors the WizardSession columns so the wizard
+    service can work on either; `session_id` is set once the draft has a
+    wizard_sessions row.
+    """
+    key: str
+    path: List[str] = field(default_factory=list)
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    profile: Optional[str] = None
+    status: str = "draft"
+    session_id: Optional[int] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def id(self) -> str:
+        return self.key
+
+    @classmethod
+    def new(cls) -> "WizardDraft":
+        return cls(key=secrets.token_urlsafe(12))
+
+    @classmethod
+    def from_row(cls, ws: WizardSession) -> "WizardDraft":
+        return cls(
+            key=ws.draft_key or str(ws.id),
+            path=list(ws.path or []),
+            inputs=dict(ws.inputs or {}),
+            profile=ws.profile,
+            status=ws.status,
+            session_id=ws.id,
+            created_at=ws.created_at.timestamp() if ws.created_at else time.time(),
+            updated_at=ws.updated_at.timestamp() if ws.updated_at else time.time(),
+        )
+
+
+class MemoryWizardStore:
+    """Per-process LRU of drafts. Drafts pushed out by `maxsize` are handed to `on_evict`."""
+
+    def __init__(self, maxsize: int = 10000, on_evict=None):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._items: "OrderedDict[str, WizardDraft]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[WizardDraft]:
+        with self._lock:
+            draft = self._items.get(key)
+            if draft is not None:
+                self._items.move_to_end(key)
+            return draft
+
+    def put(self, draft: WizardDraft) -> None:
+        draft.updated_at = time.time()
+        evicted = []
+        with self._lock:
+            self._items[draft.key] = draft
+            self._items.move_to_end(draft.key)
+            while len(self._items) > self.maxsize:
+                evicted.append(self._items.popitem(last=False)[1])
+        if evicted and self.on_evict:
+            self.on_evict(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def pop_idle(self, idle_seconds: float) -> List[WizardDraft]:
+        cutoff = time.time() - idle_seconds
+        with self._lock:
+            idle = [d for d in self._items.values() if d.updated_at < cutoff]
+            for d in idle:
+                del self._items[d.key]
+        return idle
+
+
+class SqliteWizardStore:
+    """
+    Drafts in a local SQLite file, shared by every worker process on the host.
+    Kept separate from the main database so wizard clicks never wait on its
+    write lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wizard_drafts ("
+                " key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_wizard_drafts_updated_at ON wizard_drafts (updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[WizardDraft]:
+        row = self._conn().execute("SELECT data FROM wizard_drafts WHERE key = ?", (key,)).fetchone()
+        return WizardDraft(**json.loads(row[0])) if row else None
+
+    def put(self, draft: WizardDraft) -> None:
+        draft.updated_at = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO wizard_drafts (key, data, updated_at) VALUES (?, ?, ?)",
+                (draft.key, json.dumps(asdict(draft)), draft.updated_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM wizard_drafts WHERE key = ?", (key,))
+
+    def pop_idle(self, idle_seconds: float) -> List[WizardDraft]:
+        cutoff = time.time() - idle_seconds
+        with self._conn() as conn:
+            rows = conn.execute(
+                "DELETE FROM wizard_drafts WHERE updated_at < ? RETURNING data", (cutoff,)
+            ).fetchall()
+        return [WizardDraft(**json.loads(r[0])) for r in rows]
+
+
+def persist_drafts(drafts: List[WizardDraft]) -> None:
+    """
+    Write drafts to wizard_sessions in one short transaction of its own,
+    matching existing rows by draft_key.
+    """
+    if not drafts:
+        return
+    table = WizardSession.__table__
+    with db.engine.begin() as conn:
+        keys = [d.key for d in drafts]
+        existing = dict(conn.execute(
+            select(table.c.draft_key, table.c.id).where(table.c.draft_key.in_(keys))
+        ).all())
+        for d in drafts:
+            values = {
+                "path": d.path,
+                "inputs": d.inputs,
+                "profile": d.profile,
+                "status": d.status,
+                "updated_at": datetime.utcfromtimestamp(d.updated_at),
+            }
+            row_id = d.session_id or existing.get(d.key)
+            if row_id:
+                conn.execute(update(table).where(table.c.id == row_id).values(**values))
+            else:
+                conn.execute(insert(table).values(
+                    draft_key=d.key, created_at=datetime.utcfromtimestamp(d.created_at), **values
+                ))
+
+
+class WizardDraftStore:
+    """
+    Write-behind front for the wizard: drafts live in `backend` and only reach
+    wizard_sessions when submitted (see materialise()) or after sitting idle
+    for `idle_seconds`. Idle drafts that are touched again are read back from
+    the table.
+    """
+
+    def __init__(self, backend, idle_seconds: float = 1800, sweep_interval: float = 60):
+        self.backend = backend
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self._sweep_lock = threading.Lock()
+
+    def create(self) -> WizardDraft:
+        draft = WizardDraft.new()
+        self.backend.put(draft)
+        return draft
+
+    def get(self, key: str) -> Optional[WizardDraft]:
+        self.maybe_flush_idle()
+        draft = self.backend.get(key)
+        if draft is not None:
+            return draft
+        ws = WizardSession.query.filter_by(draft_key=key).first()
+        if ws is None and key.isdigit():
+            # rows written before drafts had opaque keys are addressed by id
+            ws = WizardSession.query.filter_by(id=int(key), draft_key=None).first()
+        if ws is None:
+            return None
+        draft = WizardDraft.from_row(ws)
+        if draft.status != "submitted":
+            self.backend.put(draft)
+        return draft
+
+    def save(self, draft: WizardDraft) -> None:
+        self.backend.put(draft)
+
+    def discard(self, draft: WizardDraft) -> None:
+        self.backend.delete(draft.key)
+
+    def materialise(self, draft: WizardDraft) -> WizardSession:
+        """
+        The wizard_sessions row for `draft`, created or updated in the
+        caller's db.session (flushed, not committed).
+        """
+        ws = db.session.get(WizardSession, draft.session_id) if draft.session_id else None
+        if ws is None:
+            ws = WizardSession(draft_key=draft.key)
+            db.session.add(ws)
+        ws.path = list(draft.path)
+        ws.inputs = dict(draft.inputs)
+        ws.profile = draft.profile
+        ws.status = draft.status
+        db.session.flush()
+        return ws
+
+    def flush_idle(self) -> int:
+        drafts = self.backend.pop_idle(self.idle_seconds)
+        persist_drafts(drafts)
+        return len(drafts)
+
+    def maybe_flush_idle(self) -> None:
+        if time.time() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = time.time()
+            self.flush_idle()
+        finally:
+            self._sweep_lock.release()
+
+
+def get_wizard_store() -> WizardDraftStore:
+    """
+    The app's draft store, built on first use from config:
+    WIZARD_STORE ("memory" or "sqlite"), WIZARD_STORE_PATH (sqlite file),
+    WIZARD_STORE_MAX_DRAFTS, WIZARD_DRAFT_IDLE_SECONDS.
+    """
+    store = current_app.extensions.get("wizard_store")
+    if store is None:
+        cfg = current_app.config
+        if cfg.get("WIZARD_STORE", "memory") == "sqlite":
+            path = cfg.get("WIZARD_STORE_PATH") or f"{current_app.instance_path}/wizard_drafts.sqlite3"
+            backend = SqliteWizardStore(path)
+        else:
+            app = current_app._get_current_object()
+
+            def persist_evicted(drafts):
+                with app.app_context():
+                    persist_drafts(drafts)
+
+            backend = MemoryWizardStore(maxsize=cfg.get("WIZARD_STORE_MAX_DRAFTS", 10000), on_evict=persist_evicted)
+        store = WizardDraftStore(backend, idle_seconds=cfg.get("WIZARD_DRAFT_IDLE_SECONDS", 1800))
+        current_app.extensions["wizard_store"] = store
+    return store
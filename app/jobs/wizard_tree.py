@@ -1,50 +1,71 @@
+import hashlib
 import json
-from pathlib import Path
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
-PROFILE_KEY = "__profile__"
-DEFAULT_KEY = "_DEFAULT"
+TreePath = Tuple[str, ...]
+
 
 class WizardTree:
+    """
+    Compiled view of a wizard tree in the WIZARD_TREE shape: each node has a
+    label and either child "options", a "profile" with its required/optional
+    inputs, or both.
+
+    Every reachable path is indexed once at construction time, together with
+    its option list and its profile, so `node()`, `options()` and
+    `resolve_profile()` are dictionary lookups rather than tree walks.
+    """
+
     def __init__(self, tree: Dict[str, Any]):
         self.tree = tree
+        self._nodes: Dict[TreePath, Dict[str, Any]] = {}
+        self._options: Dict[TreePath, List[str]] = {}
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._compile((), tree)
+
+    def _compile(self, path: TreePath, node: Dict[str, Any]) -> None:
+        self._nodes[path] = node
+        options = node.get("options") or {}
+        self._options[path] = list(options)
+        profile = node.get("profile")
+        if profile:
+            self._profiles.setdefault(profile, {
+                "path": list(path),
+                "label": node.get("label", ""),
+                "required_inputs": list(node.get("required_inputs") or []),
+                "optional_inputs": list(node.get("optional_inputs") or []),
+            })
+        for token, child in options.items():
+            self._compile(path + (token,), child)
 
-    @classmethod
-    def from_json_file(cls, path: str) -> "WizardTree":
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
-        return cls(data)
+    def _key(self, path: List[str]) -> TreePath:
+        key = tuple(path)
+        if key not in self._nodes:
+            for i in range(1, len(key) + 1):
+                if key[:i] not in self._nodes:
+                    raise KeyError(key[i - 1])
+        return key
 
-    def _node_at_path(self, path: List[str]) -> Any:
-        node: Any = self.tree
-        for key in path:
-            if not isinstance(node, dict) or key not in node:
-                raise KeyError(f"Invalid path step '{key}' for path={path}")
-            node = node[key]
-        return node
+    def node(self, path: List[str]) -> Dict[str, Any]:
+        return self._nodes[self._key(path)]
 
     def options(self, path: List[str]) -> List[str]:
-        node = self._node_at_path(path)
-        if isinstance(node, dict) and PROFILE_KEY in node:
-            return []
-        if not isinstance(node, dict):
-            return []
-        keys = [k for k in node.keys() if k not in (PROFILE_KEY, DEFAULT_KEY)]
-        return sorted(keys)
+        return list(self._options[self._key(path)])
 
     def resolve_profile(self, path: List[str]) -> Tuple[Optional[str], List[str]]:
-        node = self._node_at_path(path)
+        return self._nodes[self._key(path)].get("profile"), list(path)
+
+    def profiles(self) -> Dict[str, Dict[str, Any]]:
+        """profile -> {path, label, required_inputs, optional_inputs}"""
+        return {name: dict(info) for name, info in self._profiles.items()}
 
-        if isinstance(node, dict) and PROFILE_KEY in node:
-            return node[PROFILE_KEY], path
+    def profile_inputs(self, profile: str) -> Dict[str, List[str]]:
+        info = self._profiles.get(profile) or {}
+        return {"required": list(info.get("required_inputs") or []),
+                "optional": list(info.get("optional_inputs") or [])}
 
-        while isinstance(node, dict) and DEFAULT_KEY in node:
-            path = path + [DEFAULT_KEY]
-            node = node[DEFAULT_KEY]
-            if isinstance(node, dict) and PROFILE_KEY in node:
-                return node[PROFILE_KEY], path
 
-        return None, path
-    
 # app/jobs/wizard_tree.py
 
 # The wizard chooses a path through this tree.
@@ -137,17 +158,30 @@ WIZARD_TREE = {
 }
 
 
+# Compiled once at import. WIZARD_TREE lives in code, so a change to it
+# arrives with a process restart and there is nothing to reload.
+WIZARD = WizardTree(WIZARD_TREE)
+
+
 def get_node_for_path(path: list[str]) -> dict:
     """
-    Walk down WIZARD_TREE following tokens in `path`.
+    Look up the WIZARD_TREE node for `path`.
     Example path: ["HLA", "TMT10_MHCII"]
-    Returns the node dict at that location (or raises KeyError).
+    Returns the node dict at that location (or raises KeyError naming the first bad step).
+    """
+    return WIZARD.node(path)
+
+
+@lru_cache(maxsize=1)
+def public_tree_document() -> Tuple[bytes, str]:
+    """
+    The whole WIZARD_TREE plus a flat profile -> {path, inputs} map, serialised
+    once per process. Returns (json_bytes, etag) so clients can cache the tree
+    and walk it locally.
     """
-    node = WIZARD_TREE
-    for token in path:
-        opts = node.get("options") or {}
-        node = opts[token]
-    return node
+    doc = {"tree": WIZARD_TREE, "profiles": WIZARD.profiles()}
+    body = json.dumps(doc, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return body, hashlib.sha256(body).hexdigest()
 
 
 def get_public_state(path: list[str], inputs: dict) -> dict:
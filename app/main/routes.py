@@ -17,6 +17,7 @@ def project_detail(project_id: int):
         abort(404)
 
     from ..models import Job
-    jobs = Job.query.filter_by(project_id=project.id).order_by(Job.created_at.desc()).all()
+    from ..jobs.repository import job_rows_query
+    jobs = job_rows_query().filter(Job.project_id == project.id).order_by(Job.created_at.desc()).all()
 
     return render_template("main/project_detail.html", project=project, jobs=jobs)
\ No newline at end of file
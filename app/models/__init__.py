@@ -1,9 +1,10 @@
 from .user import User, Role 
 from .user import User, Role  
 from .project import Project  
-from .job import Job, JobAssignment, JobEvent, JobStatus, JobPriority  # noqa: F401
+from .job import Job, JobAssignment, JobEvent, JobEventArchive, JobStatus, JobPriority, JobStatusCount, PendingArtifact, RunDirState, JobRun, RunState, JobProgress, WorkflowState  # noqa: F401
 from .oms_config import (
-    SearchConfig, DatabaseRequest, ValidationConfig, JobRawFile, MicroproteomeRound,
+    SearchConfig, DatabaseRequest, ValidationConfig, JobRawFile, RawFileProbe, FastaCatalog, MicroproteomeRound,
     ProjectType, MSMode, TMTLabelType, SearchEnginesMode, DatabaseTier
 )
-from .wizard_session import WizardSession
\ No newline at end of file
+from .wizard_session import WizardSession
+from .versioning import bump_content_versions  # noqa: F401  (registers flush hooks)
\ No newline at end of file
@@ -16,6 +16,28 @@ class JobStatus:
         SUBMITTED, TRIAGED, IN_PROGRESS, WAITING_ON_DATA, QC, COMPLETED, ARCHIVED
     ]
 
+class RunDirState:
+    MATERIALISING = "MATERIALISING"
+    READY = "READY"
+    FAILED = "FAILED"
+
+class RunState:
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+    ACTIVE = [QUEUED, RUNNING]
+    ALL = [QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED]
+
+class WorkflowState:
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    # the job left IN_PROGRESS before .nextflow.log reported an end
+    STOPPED = "STOPPED"
+
 class JobPriority:
     LOW = "LOW"
     NORMAL = "NORMAL"
@@ -26,12 +48,22 @@ class JobPriority:
 
 class Job(db.Model):
     __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        db.Index("ix_jobs_created_at_id", "created_at", "id"),
+        db.Index("ix_jobs_assigned_primary_user_id_created_at", "assigned_primary_user_id", "created_at"),
+    )
 
     job_kind = db.Column(db.String(16), nullable=False, default="PRESET")
 
     nf_profile = db.Column(db.String(128), nullable=True)
     nf_params = db.Column(db.JSON, nullable=True)
     run_dir = db.Column(db.String(512), nullable=True)
+    # NULL for jobs without a run dir; see jobs/artifacts.py
+    run_dir_state = db.Column(db.String(16), nullable=True)
+
+    # bumped on any change to the job or its config children (see models/versioning.py)
+    content_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -48,6 +80,13 @@ class Job(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     project = db.relationship("Project", backref=db.backref("jobs", lazy="dynamic"))
+    assigned_primary_user = db.relationship("User", foreign_keys=[assigned_primary_user_id])
+
+    search_config = db.relationship("SearchConfig", uselist=False)
+    validation_config = db.relationship("ValidationConfig", uselist=False)
+    raw_files = db.relationship("JobRawFile", order_by="JobRawFile.id")
+    database_requests = db.relationship("DatabaseRequest", order_by="DatabaseRequest.rank_level")
+    microproteome_rounds = db.relationship("MicroproteomeRound", order_by="MicroproteomeRound.min_len")
 
     def __repr__(self) -> str:
         return f"<Job {self.id} status={self.status}>"
@@ -66,6 +105,9 @@ class JobAssignment(db.Model):
 
 class JobEvent(db.Model):
     __tablename__ = "job_events"
+    __table_args__ = (
+        db.Index("ix_job_events_job_id_created_at", "job_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False)
@@ -76,4 +118,149 @@ class JobEvent(db.Model):
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-    job = db.relationship("Job", backref=db.backref("events", lazy="dynamic"))
\ No newline at end of file
+    job = db.relationship("Job", backref=db.backref("events", lazy="dynamic"))
+
+class JobEventArchive(db.Model):
+    """Cold copy of job_events rows for archived jobs (see jobs/retention.py)."""
+    __tablename__ = "job_events_archive"
+    __table_args__ = (
+        db.Index("ix_job_events_archive_job_id_created_at", "job_id", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False)
+    actor_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+
+    event_type = db.Column(db.String(64), nullable=False)
+    payload_json = db.Column(db.JSON, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class JobStatusCount(db.Model):
+    __tablename__ = "job_status_counts"
+
+    status = db.Column(db.String(32), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class PendingArtifact(db.Model):
+    """A run directory waiting to be written by the artifact workers (see jobs/artifacts.py)."""
+    __tablename__ = "pending_artifacts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False, unique=True)
+
+    profile = db.Column(db.String(128), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class JobRun(db.Model):
+    """One execution of a job's run.sh. QUEUED rows are the worker queue (see jobs/runner.py)."""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        db.Index("ix_job_runs_state_queued_at", "state", "queued_at"),
+        # at most one queued or running run per job
+        db.Index(
+            "uq_job_runs_active_job_id", "job_id", unique=True,
+            sqlite_where=db.text("state IN ('QUEUED', 'RUNNING')"),
+            postgresql_where=db.text("state IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False, index=True)
+    requested_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+
+    state = db.Column(db.String(16), nullable=False, default=RunState.QUEUED)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    worker = db.Column(db.String(128), nullable=True)
+    pid = db.Column(db.Integer, nullable=True)
+    exit_code = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # Job.status when the run started, restored if it is cancelled
+    previous_status = db.Column(db.String(32), nullable=True)
+
+    # admission control (see jobs/admission.py): footprint reserved while
+    # running, and why a queued run was last held back
+    est_cpus = db.Column(db.Float, nullable=True)
+    est_memory_mb = db.Column(db.Integer, nullable=True)
+    deferred_reason = db.Column(db.Text, nullable=True)
+    deferred_at = db.Column(db.DateTime, nullable=True)
+
+    queued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    job = db.relationship("Job", backref=db.backref("runs", lazy="dynamic", order_by="JobRun.id.desc()"))
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "job_id": self.job_id,
+            "state": self.state,
+            "cancel_requested": self.cancel_requested,
+            "worker": self.worker,
+            "pid": self.pid,
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "est_cpus": self.est_cpus,
+            "est_memory_mb": self.est_memory_mb,
+            "deferred_reason": self.deferred_reason,
+            "deferred_at": self.deferred_at.isoformat() if self.deferred_at else None,
+            "queued_at": self.queued_at.isoformat() if self.queued_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class JobProgress(db.Model):
+    """
+    Nextflow progress of a job's current session, read from .nextflow.log and
+    trace.txt in its run dir (see jobs/run_monitor.py). The inode/offset
+    pairs record how far each file has been read.
+    """
+    __tablename__ = "job_progress"
+
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("job_runs.id"), nullable=True)
+
+    state = db.Column(db.String(16), nullable=False, default=WorkflowState.RUNNING, index=True)
+    error = db.Column(db.Text, nullable=True)
+    # {process: {"submitted": n, "completed": n, "cached": n, "failed": n, "aborted": n}}
+    processes = db.Column(db.JSON, nullable=False, default=dict)
+
+    log_inode = db.Column(db.BigInteger, nullable=True)
+    log_offset = db.Column(db.BigInteger, nullable=False, default=0)
+    trace_inode = db.Column(db.BigInteger, nullable=True)
+    trace_offset = db.Column(db.BigInteger, nullable=False, default=0)
+    # trace.txt header fields, kept so reading can resume mid-file
+    trace_columns = db.Column(db.JSON, nullable=True)
+
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def totals(self) -> dict:
+        totals = {"submitted": 0, "completed": 0, "cached": 0, "failed": 0, "aborted": 0}
+        for counts in (self.processes or {}).values():
+            for key in totals:
+                totals[key] += counts.get(key, 0)
+        return totals
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "run_id": self.run_id,
+            "state": self.state,
+            "error": self.error,
+            "processes": self.processes or {},
+            "totals": self.totals(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import deferred
 from ..extensions import db
 
 class ProjectType:
@@ -42,6 +44,9 @@ class DatabaseTier:
 
 class JobRawFile(db.Model):
     __tablename__ = "job_raw_files"
+    __table_args__ = (
+        db.Index("uq_job_raw_files_job_id_location_uri", "job_id", "location_uri", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False, index=True)
@@ -51,6 +56,60 @@ class JobRawFile(db.Model):
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # last probe of location_uri (see jobs/probe.py); not part of the exported content
+    probe_status = db.Column(db.String(16), nullable=True)
+    probe_error = db.Column(db.Text, nullable=True)
+    probed_at = db.Column(db.DateTime, nullable=True)
+    probe_id = db.Column(db.Integer, db.ForeignKey("raw_file_probes.id"), nullable=True)
+
+    probe = db.relationship("RawFileProbe")
+
+
+class RawFileProbe(db.Model):
+    """Stat (and optional checksum) of a local file, cached by (path, size, mtime)."""
+    __tablename__ = "raw_file_probes"
+    __table_args__ = (
+        db.Index("uq_raw_file_probes_path_size_mtime", "path", "size", "mtime_ns", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.Text, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    mtime_ns = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)
+
+    # mzML header stats (see jobs/mzml.py); mzml_indexed_at is NULL until read
+    mzml_status = db.Column(db.String(16), nullable=True)
+    mzml_error = db.Column(db.Text, nullable=True)
+    spectrum_count = db.Column(db.Integer, nullable=True)
+    ms1_count = db.Column(db.Integer, nullable=True)
+    ms2_count = db.Column(db.Integer, nullable=True)
+    ms3_count = db.Column(db.Integer, nullable=True)
+    rt_min_seconds = db.Column(db.Float, nullable=True)
+    rt_max_seconds = db.Column(db.Float, nullable=True)
+    has_index = db.Column(db.Boolean, nullable=True)
+    mzml_indexed_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @property
+    def mtime(self) -> datetime:
+        return datetime.utcfromtimestamp(self.mtime_ns / 1e9)
+
+    def mzml_summary(self) -> Optional[dict]:
+        if self.mzml_indexed_at is None:
+            return None
+        return {
+            "status": self.mzml_status,
+            "spectrum_count": self.spectrum_count,
+            "ms1_count": self.ms1_count,
+            "ms2_count": self.ms2_count,
+            "ms3_count": self.ms3_count,
+            "rt_min_seconds": self.rt_min_seconds,
+            "rt_max_seconds": self.rt_max_seconds,
+            "has_index": self.has_index,
+        }
+
 
 class SearchConfig(db.Model):
     __tablename__ = "search_configs"
@@ -99,6 +158,58 @@ class DatabaseRequest(db.Model):
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # last catalog of fasta_location (see jobs/fasta.py)
+    fasta_catalog_id = db.Column(db.Integer, db.ForeignKey("fasta_catalogs.id"), nullable=True)
+
+    fasta_catalog = db.relationship("FastaCatalog")
+
+
+class FastaCatalog(db.Model):
+    """
+    Stats and header index of a local FASTA file, cached by (path, size, mtime).
+
+    The index is three little-endian arrays sorted by protein id: `id_blob`
+    (ids concatenated) with `id_offsets` (uint64 starts into it, plus a final
+    end), and `record_offsets`/`record_lengths` (uint64 byte span of each
+    record in the file). They are deferred so loading a catalog row never
+    pulls them in.
+    """
+    __tablename__ = "fasta_catalogs"
+    __table_args__ = (
+        db.Index("uq_fasta_catalogs_path_size_mtime", "path", "size", "mtime_ns", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.Text, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    mtime_ns = db.Column(db.BigInteger, nullable=False)
+
+    status = db.Column(db.String(16), nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    sequence_count = db.Column(db.Integer, nullable=False, default=0)
+    total_residues = db.Column(db.BigInteger, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_sample = db.Column(db.JSON, nullable=True)
+
+    id_blob = deferred(db.Column(db.LargeBinary, nullable=True))
+    id_offsets = deferred(db.Column(db.LargeBinary, nullable=True))
+    record_offsets = deferred(db.Column(db.LargeBinary, nullable=True))
+    record_lengths = deferred(db.Column(db.LargeBinary, nullable=True))
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @property
+    def mtime(self) -> datetime:
+        return datetime.utcfromtimestamp(self.mtime_ns / 1e9)
+
+    def summary(self) -> dict:
+        return {
+            "status": self.status,
+            "sequence_count": self.sequence_count,
+            "total_residues": self.total_residues,
+            "duplicate_count": self.duplicate_count,
+        }
+
 
 class MicroproteomeRound(db.Model):
     __tablename__ = "microproteome_rounds"
@@ -0,0 +1,57 @@
+from typing import Iterable
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from .job import Job
+from .oms_config import SearchConfig, ValidationConfig, JobRawFile, DatabaseRequest, MicroproteomeRound
+
+# Child rows that are part of a job's exported content.
+VERSIONED_CHILDREN = (SearchConfig, ValidationConfig, JobRawFile, DatabaseRequest, MicroproteomeRound)
+
+_PENDING_KEY = "job_content_version_bumps"
+
+
+def bump_content_versions(session: Session, job_ids: Iterable[int]) -> None:
+    """
+    Increment Job.content_version for `job_ids` in the current transaction.
+    ORM changes are picked up automatically; call this after Core-level bulk
+    writes to child tables, which bypass the flush hooks below.
+    """
+    ids = sorted(set(job_ids))
+    if not ids:
+        return
+    session.connection().execute(
+        update(Job.__table__)
+        .where(Job.__table__.c.id.in_(ids))
+        .values(content_version=Job.__table__.c.content_version + 1)
+    )
+    for obj in session.identity_map.values():
+        if isinstance(obj, Job) and obj.id in ids:
+            session.expire(obj, ["content_version"])
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_version_bumps(session, flush_context, instances):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.dirty):
+        if isinstance(obj, Job) and session.is_modified(obj, include_collections=False):
+            obj.content_version = Job.content_version + 1
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, VERSIONED_CHILDREN) or obj.job_id is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        pending.add(obj.job_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_version_bumps(session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bump_content_versions(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_version_bumps(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -3,9 +3,15 @@ from app.extensions import db
 
 class WizardSession(db.Model):
     __tablename__ = "wizard_sessions"
+    __table_args__ = (
+        db.Index("ix_wizard_sessions_status_updated_at", "status", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
+    # Opaque key of the draft this row was written from (see app/jobs/wizard_store.py).
+    draft_key = db.Column(db.String(64), unique=True, index=True, nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
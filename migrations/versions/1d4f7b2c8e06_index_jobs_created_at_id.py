@@ -0,0 +1,28 @@
+"""index jobs by created_at, id
+
+Revision ID: 1d4f7b2c8e06
+Revises: 8f3a6d1c5e20
+Create Date: 2026-10-17 22:41:07.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d4f7b2c8e06'
+down_revision = '8f3a6d1c5e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The unfiltered job list (status != 'ARCHIVED') cannot use
+    # ix_jobs_status_created_at_id for its ORDER BY; this one serves it.
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_created_at_id')
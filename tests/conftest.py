@@ -0,0 +1,72 @@
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.jobs.status_counts import record_status_change
+from app.models import Job, Project, Role, User
+
+PASSWORD = "password1"
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "ARTIFACT_ASYNC": False,
+        "ARTIFACT_STORE_PATH": str(tmp_path / "artifacts"),
+        "WIZARD_STORE_PATH": str(tmp_path / "wizard_drafts.sqlite3"),
+    })
+    app.instance_path = str(tmp_path / "instance")
+    with app.app_context():
+        db.create_all()
+        admin = User(name="Admin", email="admin@example.org", role=Role.ADMIN)
+        admin.set_password(PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def login(client, email="admin@example.org"):
+    r = client.post("/auth/login", data={"email": email, "password": PASSWORD})
+    assert r.status_code == 302
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return login(app.test_client())
+
+
+@pytest.fixture
+def make_user(app):
+    def make(email, role=Role.REQUESTER, name=None) -> int:
+        with app.app_context():
+            user = User(name=name or email.split("@")[0], email=email, role=role)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+@pytest.fixture
+def make_job(app):
+    def make(project_name="Project", user_id=1, **fields) -> int:
+        with app.app_context():
+            project = Project.query.filter_by(name=project_name).first()
+            if project is None:
+                project = Project(name=project_name, owner_user_id=user_id, created_by_user_id=user_id)
+                db.session.add(project)
+                db.session.flush()
+            job = Job(project_id=project.id, submitted_by_user_id=user_id, **fields)
+            db.session.add(job)
+            db.session.flush()
+            record_status_change(None, job.status)
+            db.session.commit()
+            return job.id
+    return make
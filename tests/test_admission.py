@@ -0,0 +1,26 @@
+from app.jobs.admission import AdmissionController, Headroom, ResourceEstimate
+
+
+def _controller(cpus_idle=7.4, memory_available_mb=60000):
+    host = Headroom(cpus_total=8, cpus_idle=cpus_idle, memory_total_mb=64000,
+                    memory_available_mb=memory_available_mb)
+    return AdmissionController({}, headroom=lambda: host)
+
+
+def test_first_run_starts_despite_background_load():
+    admission = _controller(cpus_idle=7.4)
+    assert admission.check(ResourceEstimate(cpus=8, memory_mb=4096), []) is None
+    assert admission.check(ResourceEstimate(cpus=9, memory_mb=4096), []) is None
+
+
+def test_waits_for_live_headroom_beside_own_runs():
+    admission = _controller(cpus_idle=3.0)
+    reason = admission.check(ResourceEstimate(cpus=4, memory_mb=4096), [(4, 4096)])
+    assert reason == "needs 4 CPUs; 3.0 of 8 idle"
+    assert admission.check(ResourceEstimate(cpus=2, memory_mb=4096), [(4, 4096)]) is None
+
+
+def test_waits_for_reserved_capacity():
+    admission = _controller(cpus_idle=8.0)
+    reason = admission.check(ResourceEstimate(cpus=6, memory_mb=4096), [(4, 4096)])
+    assert reason.startswith("needs 6 CPUs; 1 running job(s) have 4 of 8 reserved")
@@ -0,0 +1,133 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.jobs import artifacts
+from app.jobs.artifacts import MANIFEST_NAME, ArtifactMaterialiser, ArtifactStore, write_run_artifacts
+from app.models.job import Job, PendingArtifact, RunDirState
+
+
+def _restart(app, monkeypatch):
+    started = []
+    monkeypatch.setattr(ArtifactMaterialiser, "_ensure_started", lambda self: started.append(self))
+    create_app({"SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"], "ARTIFACT_ASYNC": True})
+    return started
+
+
+def test_pool_starts_for_rows_left_by_an_earlier_process(app, monkeypatch):
+    with app.app_context():
+        db.session.add(PendingArtifact(job_id=1, profile="HLA_TMT10", params={}))
+        db.session.commit()
+    assert len(_restart(app, monkeypatch)) == 1
+
+
+def test_pool_waits_for_wake_when_nothing_is_pending(app, monkeypatch):
+    assert _restart(app, monkeypatch) == []
+
+    with app.app_context():
+        db.session.add(PendingArtifact(job_id=1, profile="HLA_TMT10", params={}, attempts=5))
+        db.session.commit()
+    # rows that used up their attempts are not picked up again
+    assert _restart(app, monkeypatch) == []
+
+
+def test_rows_for_deleted_jobs_are_dropped(app):
+    materialiser = ArtifactMaterialiser(app)
+    with app.app_context():
+        db.session.add(PendingArtifact(job_id=999, profile="HLA_TMT10", params={}))
+        db.session.commit()
+    assert materialiser.drain() == 0
+    with app.app_context():
+        assert PendingArtifact.query.count() == 0
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    main_nf, config = tmp_path / "pipeline" / "main.nf", tmp_path / "pipeline" / "nextflow.config"
+    config.parent.mkdir()
+    main_nf.write_text("workflow {}\n")
+    config.write_text("profiles { HLA_TMT10 {} }\n")
+    monkeypatch.setattr(artifacts, "pipeline_paths", lambda: (main_nf, config))
+    return config
+
+
+def test_store_keeps_each_body_once(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    digest = store.put_bytes(b"same")
+    assert store.put_bytes(b"same") == digest == hashlib.sha256(b"same").hexdigest()
+    assert [p.name for p in (tmp_path / "store").rglob("*") if p.is_file()] == [digest]
+    assert store.blob_path(digest).stat().st_mode & 0o777 == 0o444
+
+    dest = tmp_path / "run" / "copy"
+    dest.parent.mkdir()
+    dest.write_text("old")
+    assert store.link_into(digest, dest) == "hardlink"
+    assert dest.stat().st_ino == store.blob_path(digest).stat().st_ino
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path / "store"))
+    src = tmp_path / "nextflow.config"
+    src.write_text("a = 1\n")
+    hashed = []
+    real_put_bytes = store.put_bytes
+    monkeypatch.setattr(store, "put_bytes", lambda data: hashed.append(data) or real_put_bytes(data))
+
+    first = store.put_file(src)
+    assert store.put_file(src) == first
+    assert len(hashed) == 1
+
+    src.write_text("a = 22\n")
+    assert store.put_file(src) != first
+    assert len(hashed) == 2
+
+
+def test_run_dirs_share_the_config_snapshot(app, pipeline):
+    with app.app_context():
+        dirs = [write_run_artifacts(job_id, "HLA_TMT10", {"out_dir": f"/out/{job_id}"}) for job_id in (1, 2)]
+
+    snapshots = [d / "nextflow.config.snapshot" for d in dirs]
+    assert snapshots[0].stat().st_ino == snapshots[1].stat().st_ino
+    assert snapshots[0].read_text() == pipeline.read_text()
+
+    manifest = json.loads((dirs[0] / MANIFEST_NAME).read_text())
+    for name, entry in manifest["files"].items():
+        assert entry["sha256"] == hashlib.sha256((dirs[0] / name).read_bytes()).hexdigest()
+    assert json.loads((dirs[1] / "params.json").read_text()) == {"out_dir": "/out/2"}
+
+
+def test_wizard_submit_materialises_the_run_dir(app, client, pipeline):
+    r = client.post("/jobs/api/wizard/submit", json={
+        "path": ["PRO", "TMT10", "MS2"],
+        "inputs": {"mzml_input_dir": "/data/mzml", "database": "/data/db.fasta", "out_dir": "/data/out"},
+    })
+    assert r.status_code == 201
+    with app.app_context():
+        job = db.session.get(Job, r.json["job_id"])
+        assert job.run_dir_state == RunDirState.READY
+        assert (Path(job.run_dir) / "profile.txt").read_text() == "PRO_TMT10MS2\n"
+        assert PendingArtifact.query.count() == 0
+
+
+def test_failed_writes_are_retried_then_marked_failed(app, make_job, monkeypatch):
+    job_id = make_job()
+    app.config.update(ARTIFACT_MAX_ATTEMPTS=2, ARTIFACT_CLAIM_TIMEOUT=0)
+    materialiser = ArtifactMaterialiser(app)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(artifacts, "write_run_artifacts", fail)
+    with app.app_context():
+        db.session.add(PendingArtifact(job_id=job_id, profile="HLA_TMT10", params={}))
+        db.session.commit()
+
+    assert materialiser.drain() == 0
+    with app.app_context():
+        pending = PendingArtifact.query.one()
+        assert (pending.attempts, pending.last_error) == (2, "OSError: disk full")
+        assert db.session.get(Job, job_id).run_dir_state == RunDirState.FAILED
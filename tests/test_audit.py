@@ -0,0 +1,48 @@
+from app import audit
+from app.audit import AuditSink
+from app.extensions import db
+from app.models import JobEvent
+
+
+def _rows(job_id, n):
+    return [{"job_id": job_id, "actor_user_id": 1, "event_type": "EXPORTED_JSON", "payload_json": None,
+             "created_at": audit.datetime.utcnow()} for _ in range(n)]
+
+
+def test_queue_is_bounded_by_rows_not_calls(app, make_job, monkeypatch):
+    job_id = make_job()
+    app.config.update(AUDIT_ASYNC=True, AUDIT_BATCH_SIZE=100, AUDIT_QUEUE_SIZE=1000)
+    sink = AuditSink(app)
+    monkeypatch.setattr(sink, "_ensure_started", lambda: None)  # leave the queue undrained
+
+    sink.record_many(_rows(job_id, 2500))
+    assert sink._pending == 1000
+    assert max(len(batch) for batch in sink._queue.queue) == 100
+    with app.app_context():
+        # everything that did not fit was written inline
+        assert JobEvent.query.count() == 1500
+
+    sink.record_many(_rows(job_id, 1))
+    sink.flush()
+    assert sink._pending == 0
+    with app.app_context():
+        assert JobEvent.query.count() == 2501
+
+
+def test_background_thread_drains_the_queue(app, make_job):
+    job_id = make_job()
+    app.config.update(AUDIT_ASYNC=True, AUDIT_FLUSH_INTERVAL=0.05)
+    sink = AuditSink(app)
+    sink.record(job_id, 1, "EXPORTED_JSON", {"format": "ndjson"})
+    sink.shutdown()
+    assert sink._pending == 0
+    with app.app_context():
+        assert db.session.query(JobEvent).filter_by(event_type="EXPORTED_JSON").count() == 1
+
+
+def test_shutdown_hook_is_registered_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(audit.atexit, "register", registered.append)
+    sink = AuditSink(app)
+    sink.init_app(app)
+    assert registered == [sink.shutdown]
@@ -0,0 +1,101 @@
+import io
+
+import pytest
+
+from app.extensions import db
+from app.jobs.bulk_import import ManifestError, import_manifest, parse_manifest, validate_row
+from app.models import DatabaseTier, Job, JobRawFile, JobStatus, JobStatusCount, Project, SearchConfig
+
+CSV = """project_name,priority,tmt_label_type,tmt_plex,db_tiers,raw_files,micro_rounds
+ Tumour panel ,high,TMTpro,10,CANONICAL_ONLY;PERSONAL_DB,/data/a.raw|/data/b.raw,8-13
+Second,,LF,,,,
+"""
+
+
+def test_parse_csv_and_json_manifests():
+    rows = parse_manifest(CSV)
+    assert len(rows) == 2
+    assert rows[0]["project_name"] == "Tumour panel"
+    assert rows[1]["tmt_plex"] == ""
+
+    assert parse_manifest('{"jobs": [{"project_name": "A"}]}') == [{"project_name": "A"}]
+    with pytest.raises(ManifestError):
+        parse_manifest("[1, 2]")
+    with pytest.raises(ManifestError):
+        parse_manifest("", "csv")
+
+
+def test_validate_row_collects_every_error():
+    plan, errors = validate_row(parse_manifest(CSV)[0])
+    assert plan is None
+    assert errors == ["personal_fasta_location is required for PERSONAL_DB"]
+
+    plan, errors = validate_row({"priority": "soon", "tmt_label_type": "TMTpro", "micro_rounds": "13-8",
+                                 "db_tiers": "NOPE", "pep_filter": "maybe"})
+    assert plan is None
+    assert errors == [
+        "project_name is required",
+        "priority: 'SOON' is not one of LOW, NORMAL, HIGH, URGENT",
+        "tmt_plex is required when using TMT labelling",
+        "pep_filter: expected a yes/no value, got 'maybe'",
+        f"db_tiers: 'NOPE' is not one of {', '.join(DatabaseTier.ALL)}",
+        "micro_rounds: '13-8' is not a length range like 8-13",
+    ]
+
+    plan, errors = validate_row({"project_name": "P", "raw_files": "/data/a.raw;/elsewhere/b.raw"},
+                                raw_file_roots=["/data"])
+    assert errors == ["raw_files: '/elsewhere/b.raw' is outside the allowed raw file locations"]
+
+
+def test_import_creates_valid_rows_and_reports_bad_ones(app):
+    rows = parse_manifest(CSV)
+    rows[0]["personal_fasta_location"] = "/data/db.fasta"
+    rows.insert(1, {"project_name": ""})
+    with app.app_context():
+        report = import_manifest(rows, user_id=1, chunk_size=1)
+        assert report.as_dict()["created"] == 2
+        assert report.errors == [{"row": 2, "errors": ["project_name is required"]}]
+
+        first = db.session.get(Job, report.created_job_ids[0])
+        assert first.priority == "HIGH"
+        assert first.project.name == "Tumour panel"
+        assert SearchConfig.query.filter_by(job_id=first.id).one().tmt_plex == 10
+        assert [rf.location_uri for rf in JobRawFile.query.filter_by(job_id=first.id).order_by(JobRawFile.id)] \
+            == ["/data/a.raw", "/data/b.raw"]
+        assert db.session.get(JobStatusCount, JobStatus.SUBMITTED).count == 2
+
+
+def test_failed_chunk_is_reported_and_the_rest_still_go_in(app, monkeypatch):
+    rows = [{"project_name": f"P{i}"} for i in range(5)]
+    with app.app_context():
+        real_commit = db.session.commit
+        commits = []
+
+        def flaky_commit():
+            commits.append(1)
+            if len(commits) == 2:
+                raise RuntimeError("disk full")
+            real_commit()
+
+        monkeypatch.setattr(db.session, "commit", flaky_commit)
+        report = import_manifest(rows, user_id=1, chunk_size=2)
+        monkeypatch.undo()
+
+        # the second chunk (rows 3-4) was rolled back and is not reported as created
+        assert [e["row"] for e in report.errors] == [3, 4]
+        assert report.errors[0]["errors"] == ["not saved: RuntimeError: disk full"]
+        assert len(report.created_job_ids) == 3
+        assert sorted(report.created_job_ids) == [j.id for j in Job.query.order_by(Job.id)]
+        assert sorted(p.name for p in Project.query) == ["P0", "P1", "P4"]
+
+
+def test_import_endpoint_accepts_a_csv_upload(client):
+    r = client.post("/jobs/api/import", data={
+        "manifest": (io.BytesIO(b"project_name,priority\nA,LOW\nB,never\n"), "jobs.csv"),
+    }, content_type="multipart/form-data")
+    assert r.status_code == 201
+    assert (r.json["created"], r.json["failed"]) == (1, 1)
+    assert r.json["errors"][0]["row"] == 2
+
+    r = client.post("/jobs/api/import", data="not json", content_type="application/json")
+    assert r.status_code == 400
@@ -0,0 +1,36 @@
+import random
+
+from app.jobs.dispatch import ReadyQueue
+
+
+def test_ready_queue_matches_a_full_sort():
+    rng = random.Random(7)
+    queue, keys = ReadyQueue(), {}
+    for _ in range(3000):
+        job_id = rng.randrange(300)
+        if rng.random() < 0.3:
+            queue.remove(job_id)
+            keys.pop(job_id, None)
+        else:
+            key = float(rng.randrange(50))  # repeated keys fall back to job id order
+            queue.push(job_id, key)
+            keys[job_id] = key
+
+    expected = sorted((k, j) for j, k in keys.items())
+    assert len(queue) == len(expected)
+    assert queue.head(10) == expected[:10]
+    for pos, (key, job_id) in enumerate(expected, start=1):
+        assert queue.position(job_id) == pos
+        assert queue.key(job_id) == key
+    assert queue.position(10_000) is None
+
+
+def test_moving_a_job_replaces_its_entry():
+    queue = ReadyQueue()
+    queue.push(1, 10.0)
+    queue.push(2, 20.0)
+    queue.push(1, 30.0)
+    assert queue.head(5) == [(20.0, 2), (30.0, 1)]
+    queue.remove(2)
+    assert queue.position(1) == 1
+    assert 2 not in queue
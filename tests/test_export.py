@@ -0,0 +1,141 @@
+import json
+
+from app.extensions import db
+from app.jobs import routes
+from app.jobs.export import export_cache, export_etag
+from app.models import (
+    Job, JobEvent, JobPriority, JobRawFile, JobStatus, MicroproteomeRound, SearchConfig, bump_content_versions,
+)
+from tests.test_query_counts import count_queries
+
+
+def _ndjson(r):
+    assert r.status_code == 200
+    assert r.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+
+
+def _add_children(app, job_id, n_raw=2):
+    with app.app_context():
+        db.session.add(SearchConfig(job_id=job_id))
+        for i in range(n_raw):
+            db.session.add(JobRawFile(job_id=job_id, location_uri=f"s3://bucket/{job_id}/{i}.raw"))
+        db.session.commit()
+
+
+def test_ndjson_lines_match_the_single_job_export(app, client, make_job):
+    job_ids = [make_job() for _ in range(3)]
+    for job_id in job_ids:
+        _add_children(app, job_id)
+
+    lines = _ndjson(client.get("/jobs/export.ndjson"))
+    assert [line["job"]["id"] for line in lines] == job_ids
+    for line in lines:
+        single = client.get(f"/jobs/{line['job']['id']}/export.json").json
+        assert line == single
+    assert lines[0]["pipeline_plan"]["search_engines"] == ["COMET"]
+    assert len(lines[0]["raw_files"]) == 2
+
+    with app.app_context():
+        streamed = JobEvent.query.filter_by(event_type="EXPORTED_JSON").all()
+        assert sorted(e.job_id for e in streamed if e.payload_json == {"format": "ndjson"}) == job_ids
+
+
+def test_ndjson_filters(client, make_job):
+    a = make_job(project_name="A", priority=JobPriority.HIGH)
+    b = make_job(project_name="B")
+    c = make_job(project_name="B", status=JobStatus.QC)
+
+    def ids(r):
+        return [line["job"]["id"] for line in _ndjson(r)]
+
+    assert ids(client.get("/jobs/export.ndjson?priority=HIGH")) == [a]
+    assert ids(client.get(f"/jobs/export.ndjson?ids={a},{c}")) == [a, c]
+    assert ids(client.get(f"/jobs/export.ndjson?ids={a}&ids={b}&status=SUBMITTED")) == [a, b]
+    assert ids(client.post("/jobs/export.ndjson", json={"status": ["QC"]})) == [c]
+    assert ids(client.get("/jobs/export.ndjson?created_after=2999-01-01")) == []
+    assert client.get("/jobs/export.ndjson?project_id=x").status_code == 400
+    assert client.get("/jobs/export.ndjson?created_before=yesterday").status_code == 400
+
+
+def test_ndjson_query_count_grows_with_batches_not_jobs(app, client, make_job, monkeypatch):
+    monkeypatch.setattr(routes, "EXPORT_BATCH_SIZE", 4)
+
+    def statements_for(n_jobs):
+        while len(job_ids) < n_jobs:
+            job_ids.append(make_job())
+            _add_children(app, job_ids[-1])
+        client.get("/jobs/export.ndjson")  # warm-up
+        with count_queries(app) as statements:
+            lines = _ndjson(client.get("/jobs/export.ndjson"))
+        assert len(lines) == n_jobs
+        return len([s for s in statements if s.lstrip().startswith("SELECT")])
+
+    job_ids = []
+    two_batches = statements_for(5)
+    assert statements_for(7) == two_batches
+    assert statements_for(9) > two_batches
+
+
+def _version(app, job_id):
+    with app.app_context():
+        return db.session.get(Job, job_id).content_version
+
+
+def test_job_and_child_edits_bump_content_version(app, make_job):
+    job_id = make_job()
+    _add_children(app, job_id, n_raw=1)
+    seen = [_version(app, job_id)]
+
+    def edit(change):
+        with app.app_context():
+            change()
+            db.session.commit()
+        seen.append(_version(app, job_id))
+        return seen[-1] - seen[-2]
+
+    assert edit(lambda: setattr(db.session.get(Job, job_id), "priority", JobPriority.HIGH)) == 1
+    assert edit(lambda: setattr(SearchConfig.query.filter_by(job_id=job_id).one(), "species", "Mouse")) == 1
+    assert edit(lambda: db.session.add(MicroproteomeRound(job_id=job_id, round_name="8-13", min_len=8,
+                                                          max_len=13))) == 1
+    assert edit(lambda: db.session.delete(JobRawFile.query.filter_by(job_id=job_id).one())) == 1
+    # loading or re-assigning the same value is not a change
+    assert edit(lambda: setattr(SearchConfig.query.filter_by(job_id=job_id).one(), "species", "Mouse")) == 0
+    # Core writes go through bump_content_versions
+    assert edit(lambda: bump_content_versions(db.session, [job_id, job_id])) == 1
+
+
+def test_raw_file_registration_bumps_content_version(app, client, make_job):
+    job_id = make_job()
+    before = _version(app, job_id)
+    client.post(f"/jobs/api/jobs/{job_id}/raw-files", json={"uris": ["s3://bucket/a.raw"]})
+    assert _version(app, job_id) == before + 1
+
+
+def test_export_json_etag_and_cache(app, client, make_job):
+    export_cache.clear()
+    job_id = make_job()
+    _add_children(app, job_id)
+
+    r = client.get(f"/jobs/{job_id}/export.json")
+    etag = r.headers["ETag"]
+    assert etag == f'"{export_etag(job_id, _version(app, job_id))}"'
+
+    r = client.get(f"/jobs/{job_id}/export.json", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.get_data() == b""
+
+    # a cache hit reads the version and nothing from the config tables
+    with count_queries(app) as statements:
+        assert client.get(f"/jobs/{job_id}/export.json").status_code == 200
+    assert not [s for s in statements if "search_configs" in s or "job_raw_files" in s]
+
+    with app.app_context():
+        SearchConfig.query.filter_by(job_id=job_id).one().species = "Mouse"
+        db.session.commit()
+    r = client.get(f"/jobs/{job_id}/export.json", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json["search_config"]["species"] == "Mouse"
+
+    assert client.get("/jobs/999/export.json").status_code == 404
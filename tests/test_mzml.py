@@ -0,0 +1,61 @@
+import tracemalloc
+
+from app.jobs.mzml import OK, TRUNCATED, read_mzml_header
+
+SPECTRUM = (
+    '<spectrum index="{i}" id="scan={i}" defaultArrayLength="0">'
+    '<cvParam cvRef="MS" accession="MS:1000511" name="ms level" value="{level}"/>'
+    '<scanList count="1"><scan><cvParam cvRef="MS" accession="MS:1000016" name="scan start time"'
+    ' value="{i}" unitCvRef="UO" unitAccession="UO:0000010"/></scan></scanList>'
+    '<binaryDataArrayList count="0"/></spectrum>\n'
+)
+
+
+def _write_mzml(path, n, complete=True):
+    with open(path, "w") as fh:
+        fh.write('<?xml version="1.0"?>\n<indexedmzML xmlns="http://psi.hupo.org/ms/mzml">'
+                 '<mzML><run id="r"><spectrumList count="%d">\n' % n)
+        for i in range(n):
+            fh.write(SPECTRUM.format(i=i, level=1 if i % 10 == 0 else 2))
+        if complete:
+            fh.write('</spectrumList></run></mzML><indexList count="1"><index name="spectrum">')
+            for i in range(n):
+                fh.write(f'<offset idRef="scan={i}">{i}</offset>')
+            fh.write("</index></indexList></indexedmzML>\n")
+
+
+def _peak_bytes(path):
+    tracemalloc.start()
+    try:
+        result = read_mzml_header(str(path))
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_header_counts(tmp_path):
+    path = tmp_path / "run.mzML"
+    _write_mzml(path, 50)
+    result = read_mzml_header(str(path))
+    assert result["status"] == OK
+    assert result["spectrum_count"] == 50
+    assert result["ms_levels"] == {"1": 5, "2": 45}
+    assert result["has_index"] is True
+
+
+def test_memory_does_not_grow_with_spectrum_count(tmp_path):
+    small, large = tmp_path / "small.mzML", tmp_path / "large.mzML"
+    _write_mzml(small, 2000)
+    _write_mzml(large, 20000)
+    small_result, small_peak = _peak_bytes(small)
+    large_result, large_peak = _peak_bytes(large)
+    assert large_result["spectrum_count"] == 20000
+    assert large_peak < 2 * small_peak + 256 * 1024
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "cut.mzML"
+    _write_mzml(path, 20, complete=False)
+    result = read_mzml_header(str(path))
+    assert result["status"] == TRUNCATED
+    assert result["spectrum_count"] == 20
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Job, Role
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def add_jobs(app, make_user, make_job):
+    """Add jobs with their own submitters and assignees (half assigned to the admin), every other one in project 1."""
+    made = []
+
+    def add(n):
+        for _ in range(n):
+            i = len(made)
+            uid = make_user(f"user{i}@example.org", role=Role.ANALYST if i % 2 else Role.REQUESTER)
+            job_id = make_job(project_name="Project" if i % 2 == 0 else f"Project {i}", user_id=uid)
+            with app.app_context():
+                job = db.session.get(Job, job_id)
+                job.assigned_primary_user_id = 1 if i % 2 else (uid if i % 3 else None)
+                db.session.commit()
+            made.append(job_id)
+        return made
+    return add
+
+
+def _queries_for(app, client, url):
+    client.get(url)  # warm-up: first-request lookups are not part of the page cost
+    with count_queries(app) as statements:
+        r = client.get(url)
+    assert r.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize("url", ["/jobs/", "/jobs/dashboard", "/projects/1"])
+def test_query_count_does_not_grow_with_jobs(app, client, add_jobs, url):
+    add_jobs(2)
+    few = _queries_for(app, client, url)
+    add_jobs(10)
+    many = _queries_for(app, client, url)
+    assert many == few
+
+
+def _job_list_plan(app, client, url):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM jobs" in statement and "LIMIT" in statement:
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        r = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert r.status_code == 200
+    statement, parameters = captured[-1]
+    with app.app_context():
+        with db.engine.connect() as conn:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return r, " | ".join(row[-1] for row in plan)
+
+
+def test_unfiltered_job_list_is_served_by_an_index(app, client, make_job):
+    for _ in range(5):
+        make_job()
+
+    r, plan = _job_list_plan(app, client, "/jobs/api/jobs?limit=2")
+    assert "SCAN jobs" not in plan.replace("SCAN jobs USING INDEX", "")
+    assert "TEMP B-TREE" not in plan
+
+    r, plan = _job_list_plan(app, client, f"/jobs/api/jobs?limit=2&cursor={r.json['next_cursor']}")
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,124 @@
+import hashlib
+import os
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.jobs.raw_files import iter_raw_file_entries, register_raw_files, text_stream
+from app.jobs.repository import insert_ignoring_conflicts
+from app.models import DatabaseRequest, JobRawFile
+from tests.conftest import login
+
+
+@pytest.fixture
+def roots(app, tmp_path):
+    allowed = tmp_path / "raw"
+    outside = tmp_path / "elsewhere"
+    allowed.mkdir()
+    outside.mkdir()
+    app.config["RAW_FILE_ROOTS"] = [str(allowed)]
+    app.config["FASTA_ROOTS"] = [str(allowed)]
+    return allowed, outside
+
+
+def test_probing_and_catalogs_need_an_analyst(app, make_user, make_job):
+    uid = make_user("req@example.org")
+    job_id = make_job(user_id=uid)
+    client = login(app.test_client(), "req@example.org")
+    assert client.post(f"/jobs/api/jobs/{job_id}/raw-files/probe", json={}).status_code == 403
+    assert client.post(f"/jobs/api/jobs/{job_id}/raw-files/index-mzml").status_code == 403
+    assert client.post(f"/jobs/api/jobs/{job_id}/databases/catalog").status_code == 403
+    assert client.get(f"/jobs/api/jobs/{job_id}/databases/1/proteins/P1").status_code == 403
+
+
+def test_registration_rejects_paths_outside_the_roots(client, make_job, roots):
+    allowed, outside = roots
+    job_id = make_job()
+    r = client.post(f"/jobs/api/jobs/{job_id}/raw-files", json={"uris": [
+        str(allowed / "a.raw"), str(outside / "b.raw"), str(allowed / ".." / "elsewhere" / "c.raw"),
+        "s3://bucket/d.raw",
+    ]})
+    assert r.json["added"] == 2
+    assert r.json["rejected"] == 2
+
+
+def test_probe_denies_outside_roots_and_hashes_in_background(app, client, make_job, roots):
+    allowed, outside = roots
+    inside_file = allowed / "a.raw"
+    inside_file.write_bytes(b"spectra")
+    (outside / "secret").write_bytes(b"do not read")
+    os.symlink(outside / "secret", allowed / "link.raw")
+    job_id = make_job()
+    with app.app_context():
+        # registered before RAW_FILE_ROOTS was set
+        for path in (inside_file, outside / "secret", allowed / "link.raw"):
+            db.session.add(JobRawFile(job_id=job_id, location_uri=str(path)))
+        db.session.commit()
+
+    r = client.post(f"/jobs/api/jobs/{job_id}/raw-files/probe", json={"checksum": True})
+    assert r.status_code == 200
+    assert (r.json["ok"], r.json["denied"]) == (1, 2)
+    assert r.json["hashed"] == 0
+    assert r.json["checksums_queued"] == 1
+
+    with app.app_context():
+        rows = {rf.location_uri: rf for rf in JobRawFile.query.filter_by(job_id=job_id)}
+        assert rows[str(inside_file)].probe.sha256 == hashlib.sha256(b"spectra").hexdigest()
+        for path in (outside / "secret", allowed / "link.raw"):
+            assert rows[str(path)].probe_status == "DENIED"
+            assert rows[str(path)].probe_id is None
+
+
+def test_fasta_catalog_stays_inside_the_roots(app, client, make_job, roots):
+    allowed, outside = roots
+    (allowed / "db.fasta").write_text(">P1 one\nPEPTIDE\n")
+    (outside / "db.fasta").write_text(">P2 two\nPEPTIDE\n")
+    job_id = make_job()
+    with app.app_context():
+        for path in (allowed / "db.fasta", outside / "db.fasta"):
+            db.session.add(DatabaseRequest(job_id=job_id, db_tier="SPECIAL_FASTA", rank_level=6,
+                                           fasta_location=str(path)))
+        db.session.commit()
+        inside_id, outside_id = [dr.id for dr in DatabaseRequest.query.order_by(DatabaseRequest.id)]
+
+    r = client.post(f"/jobs/api/jobs/{job_id}/databases/catalog")
+    assert (r.json["indexed"], r.json["denied"]) == (1, 1)
+    r = client.get(f"/jobs/api/jobs/{job_id}/databases/{inside_id}/proteins/P1")
+    assert r.json["sequence"] == "PEPTIDE"
+    assert client.get(f"/jobs/api/jobs/{job_id}/databases/{outside_id}/proteins/P2").status_code == 409
+
+    app.config["FASTA_ROOTS"] = []
+    assert client.get(f"/jobs/api/jobs/{job_id}/databases/{inside_id}/proteins/P1").status_code == 403
+
+
+def test_raw_file_list_parsing():
+    long_path = "/data/" + "x" * 3000 + ".raw"
+    text = "\n".join([
+        "location_uri,notes",
+        "/data/a.raw",
+        "/data/b.raw,first, second",
+        '"/data/c,d.raw",quoted',
+        "/data/e,f.raw\ttab notes, with comma",
+        "",
+        "# comment",
+        long_path,
+    ])
+    assert list(iter_raw_file_entries(text_stream(text))) == [
+        ("/data/a.raw", None),
+        ("/data/b.raw", "first, second"),
+        ("/data/c,d.raw", "quoted"),
+        ("/data/e,f.raw", "tab notes, with comma"),
+        (long_path, None),
+    ]
+
+
+def test_added_counts_only_rows_inserted(app, make_job):
+    job_id = make_job()
+    with app.app_context():
+        assert register_raw_files(job_id, [("s3://b/a.raw", None), ("s3://b/a.raw", None)]) == (1, 1)
+        now = datetime.utcnow()
+        rows = [{"job_id": job_id, "location_uri": uri, "created_at": now} for uri in ("s3://b/a.raw", "s3://b/b.raw")]
+        # as if another request registered a.raw between the existence check and the insert
+        assert insert_ignoring_conflicts(JobRawFile, rows, ["job_id", "location_uri"]) == 1
+        db.session.commit()
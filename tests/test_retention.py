@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.jobs import retention
+from app.jobs.retention import archive_events_of_archived_jobs, compact_events
+from app.models import JobEvent, JobEventArchive, JobStatus
+
+OLD = datetime(2026, 1, 5, 9, 0)
+CUTOFF = datetime(2026, 3, 1)
+
+
+def _events(app, job_id, event_type, times, actor=1, payload=None):
+    with app.app_context():
+        for at in times:
+            db.session.add(JobEvent(job_id=job_id, actor_user_id=actor, event_type=event_type,
+                                    payload_json=payload, created_at=at))
+        db.session.commit()
+
+
+def _types(app, job_id):
+    with app.app_context():
+        return sorted(e.event_type for e in JobEvent.query.filter_by(job_id=job_id))
+
+
+def test_compaction_summarises_old_events_per_job_and_day(app, make_job):
+    job_id = make_job()
+    _events(app, job_id, "EXPORTED_JSON", [OLD, OLD + timedelta(hours=3)], actor=1)
+    _events(app, job_id, "EXPORTED_JSON", [OLD + timedelta(hours=4)], actor=2)
+    _events(app, job_id, "EXPORTED_JSON", [OLD + timedelta(days=1)])
+    _events(app, job_id, "EXPORTED_JSON", [CUTOFF + timedelta(days=1)])  # too recent
+    _events(app, job_id, "CONFIG_UPDATED", [OLD], payload={"section": "search"})
+    _events(app, job_id, "CONFIG_UPDATED", [OLD + timedelta(days=2), OLD + timedelta(days=2, hours=1)],
+            payload={"section": "validation"})
+    _events(app, job_id, "ASSIGNED", [OLD])
+
+    with app.app_context():
+        report = compact_events(CUTOFF)
+        assert (report.events_compacted, report.summaries_written) == (6, 3)
+
+        summaries = {(e.event_type, e.payload_json["day"]): e.payload_json
+                     for e in JobEvent.query.filter(JobEvent.event_type.like("%_DAILY"))}
+    first_day = summaries[("EXPORTED_JSON_DAILY", "2026-01-05")]
+    assert first_day["count"] == 3
+    assert first_day["actor_user_ids"] == [1, 2]
+    assert (first_day["first_at"], first_day["last_at"]) == (OLD.isoformat(), (OLD + timedelta(hours=4)).isoformat())
+    assert summaries[("EXPORTED_JSON_DAILY", "2026-01-06")]["count"] == 1
+    assert summaries[("CONFIG_UPDATED_DAILY", "2026-01-07")]["sections"] == ["validation"]
+
+    # the lone CONFIG_UPDATED, the recent export and other types are left alone
+    assert _types(app, job_id) == [
+        "ASSIGNED", "CONFIG_UPDATED", "CONFIG_UPDATED_DAILY", "EXPORTED_JSON",
+        "EXPORTED_JSON_DAILY", "EXPORTED_JSON_DAILY",
+    ]
+
+    with app.app_context():
+        assert compact_events(CUTOFF).events_compacted == 0
+
+
+def test_compaction_commits_one_chunk_of_jobs_at_a_time(app, make_job, monkeypatch):
+    job_ids = [make_job() for _ in range(5)]
+    for job_id in job_ids:
+        _events(app, job_id, "EXPORTED_JSON", [OLD, OLD + timedelta(minutes=1)])
+
+    commits, sleeps = [], []
+    with app.app_context():
+        real_commit = db.session.commit
+
+        def commit():
+            commits.append(JobEvent.query.filter_by(event_type="EXPORTED_JSON_DAILY").count())
+            real_commit()
+
+        monkeypatch.setattr(db.session, "commit", commit)
+        monkeypatch.setattr(retention.time, "sleep", sleeps.append)
+        report = compact_events(CUTOFF, chunk_size=2, pause=0.25)
+        monkeypatch.undo()
+
+    assert report.jobs_scanned == 5
+    assert report.events_compacted == 10
+    assert commits == [2, 4, 5]
+    assert sleeps == [0.25, 0.25, 0.25]
+
+
+def test_events_of_archived_jobs_move_to_the_archive_table(app, make_job, monkeypatch):
+    archived = make_job(status=JobStatus.ARCHIVED)
+    live = make_job()
+    _events(app, archived, "ASSIGNED", [OLD + timedelta(minutes=i) for i in range(5)])
+    _events(app, live, "ASSIGNED", [OLD])
+
+    with app.app_context():
+        real_commit = db.session.commit
+        commits = []
+        monkeypatch.setattr(db.session, "commit", lambda: (commits.append(1), real_commit()))
+        report = archive_events_of_archived_jobs(chunk_size=2)
+        monkeypatch.undo()
+
+        assert report.events_archived == 5
+        assert len(commits) == 3
+        assert JobEvent.query.filter_by(job_id=archived).count() == 0
+        moved = JobEventArchive.query.filter_by(job_id=archived).order_by(JobEventArchive.id).all()
+        assert [e.created_at for e in moved] == [OLD + timedelta(minutes=i) for i in range(5)]
+        assert all(e.archived_at is not None for e in moved)
+        assert JobEvent.query.filter_by(job_id=live).count() == 1
+
+
+def test_event_retention_command(app, make_job):
+    job_id = make_job()
+    _events(app, job_id, "EXPORTED_JSON", [datetime.utcnow() - timedelta(days=120)] * 2)
+    result = app.test_cli_runner().invoke(args=["jobs", "event-retention", "--pause", "0"])
+    assert result.exit_code == 0, result.output
+    assert _types(app, job_id) == ["EXPORTED_JSON_DAILY"]
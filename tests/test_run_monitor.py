@@ -0,0 +1,197 @@
+import os
+
+import pytest
+
+from app.extensions import db
+from app.jobs.run_monitor import NEXTFLOW_LOG, TRACE_FILE, RunMonitor, tail_lines
+from app.models import Job, JobEvent, JobRun, JobStatus, RunState, WorkflowState
+from app.models.job import JobProgress
+
+TRACE_HEADER = "task_id\thash\tname\tstatus\texit\n"
+
+
+def _append(path, text):
+    with open(path, "a") as fh:
+        fh.write(text)
+
+
+def test_tail_lines_reads_whole_lines_and_resumes(tmp_path):
+    path = tmp_path / "log"
+    assert tail_lines(path, None, 0, 1024) is None
+
+    path.write_text("one\ntwo\nthr")
+    read = tail_lines(path, None, 0, 1024)
+    assert read.lines == ["one", "two"]
+    assert read.offset == len("one\ntwo\n")
+    assert not read.reset
+
+    assert tail_lines(path, read.inode, read.offset, 1024) is None  # only the partial line is new
+    _append(path, "ee\nfour\n")
+    read = tail_lines(path, read.inode, read.offset, 1024)
+    assert read.lines == ["three", "four"]
+    assert tail_lines(path, read.inode, read.offset, 1024) is None
+
+
+def test_tail_lines_reads_at_most_max_bytes(tmp_path):
+    path = tmp_path / "log"
+    path.write_text("aaaa\nbbbb\ncccc\n")
+    read = tail_lines(path, None, 0, 12)
+    assert read.lines == ["aaaa", "bbbb"]
+    read = tail_lines(path, read.inode, read.offset, 12)
+    assert read.lines == ["cccc"]
+
+    # a line longer than max_bytes comes out in pieces rather than stalling the reader
+    path.write_text("x" * 20 + "\nshort\n")
+    pieces, read = [], tail_lines(path, None, 0, 8)
+    while read is not None:
+        pieces.append(read.lines)
+        read = tail_lines(path, read.inode, read.offset, 8)
+    assert pieces == [["xxxxxxxx"], ["xxxxxxxx"], ["xxxx"], ["short"]]
+
+
+def test_tail_lines_starts_over_after_truncation_or_rotation(tmp_path):
+    path = tmp_path / "log"
+    path.write_text("one\ntwo\nthree\n")
+    first = tail_lines(path, None, 0, 1024)
+
+    # truncated in place: same inode, shorter than the offset
+    path.write_text("new\n")
+    read = tail_lines(path, first.inode, first.offset, 1024)
+    assert (read.lines, read.reset, read.inode) == (["new"], True, first.inode)
+
+    # rotated: a new file under the same name
+    os.rename(path, tmp_path / "log.1")
+    path.write_text("fresh\n")
+    rotated = tail_lines(path, read.inode, read.offset, 1024)
+    assert rotated.reset
+    assert rotated.inode != read.inode
+    assert rotated.lines == ["fresh"]
+
+    # a rotated-in empty file still reports the reset
+    os.rename(path, tmp_path / "log.2")
+    path.write_text("")
+    assert tail_lines(path, rotated.inode, rotated.offset, 1024).reset
+
+
+@pytest.fixture
+def monitor(app):
+    monitor = RunMonitor()
+    monitor.init_app(app)
+    return monitor
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    path = tmp_path / "run"
+    path.mkdir()
+    return path
+
+
+def _progress(app, job_id):
+    with app.app_context():
+        p = db.session.get(JobProgress, job_id)
+        return p.state, p.totals(), p.error
+
+
+def _events(app, job_id, event_type):
+    with app.app_context():
+        return [e.payload_json for e in JobEvent.query.filter_by(job_id=job_id, event_type=event_type)]
+
+
+def _status(app, job_id):
+    with app.app_context():
+        return db.session.get(Job, job_id).status
+
+
+def test_follow_moves_a_finished_run_to_the_success_status(app, make_job, monitor, run_dir):
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(run_dir))
+    log, trace = run_dir / NEXTFLOW_LOG, run_dir / TRACE_FILE
+    assert monitor.poll().jobs_updated == 0  # no log yet: nothing to record
+
+    log.write_text("Jan-01 10:00:00.000 [Task submitter] INFO  nextflow.Session - "
+                   "[ab/123456] Submitted process > COMET_SEARCH (sample_1)\n"
+                   "Jan-01 10:00:01.000 [Task submitter] INFO  nextflow.Session - "
+                   "[cd/789abc] Submitted process > COMET_SEARCH (sample_2)\n")
+    trace.write_text(TRACE_HEADER + "1\tab/123456\tCOMET_SEARCH (sample_1)\tCOMPLETED\t0\n")
+    report = monitor.poll()
+    assert report.jobs_updated == 1
+    state, totals, _ = _progress(app, job_id)
+    assert state == WorkflowState.RUNNING
+    assert (totals["submitted"], totals["completed"]) == (2, 1)
+
+    # idle poll: the files did not grow, nothing is written
+    assert monitor.poll().jobs_updated == 0
+
+    _append(trace, "2\tcd/789abc\tCOMET_SEARCH (sample_2)\tCACHED\t0\n")
+    _append(log, "Jan-01 10:05:00.000 [main] DEBUG nextflow.cli.Launcher - Execution complete -- Goodbye\n")
+    report = monitor.poll()
+    assert report.finished == [(job_id, WorkflowState.SUCCEEDED)]
+    assert report.status_changes == [(job_id, JobStatus.COMPLETED)]
+    assert _progress(app, job_id)[:2] == (WorkflowState.SUCCEEDED, {"submitted": 2, "completed": 1, "cached": 1,
+                                                                   "failed": 0, "aborted": 0})
+    assert _status(app, job_id) == JobStatus.COMPLETED
+    assert _events(app, job_id, "STATUS_CHANGED")[0]["to"] == JobStatus.COMPLETED
+    assert _events(app, job_id, "WORKFLOW_FINISHED")[0]["state"] == WorkflowState.SUCCEEDED
+
+    # the job has left IN_PROGRESS and its session is over: it is no longer followed
+    assert monitor.poll().jobs_followed == 0
+
+
+def test_follow_moves_a_failed_run_to_the_failure_status(app, make_job, monitor, run_dir):
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(run_dir))
+    (run_dir / NEXTFLOW_LOG).write_text(
+        "[ab/123456] Submitted process > COMET_SEARCH (sample_1)\n"
+        "ERROR ~ Error executing process > 'COMET_SEARCH (sample_1)'\n"
+        "Execution complete -- Goodbye\n")
+    (run_dir / TRACE_FILE).write_text(TRACE_HEADER + "1\tab/123456\tCOMET_SEARCH (sample_1)\tFAILED\t137\n")
+
+    report = monitor.poll()
+    assert report.status_changes == [(job_id, JobStatus.QC)]
+    state, totals, error = _progress(app, job_id)
+    assert (state, totals["failed"]) == (WorkflowState.FAILED, 1)
+    assert error == "Error executing process > 'COMET_SEARCH (sample_1)'"
+    assert _events(app, job_id, "PROCESS_FAILED")[0]["tasks"] == [
+        {"process": "COMET_SEARCH", "task": "COMET_SEARCH (sample_1)", "exit": "137"}]
+    assert _status(app, job_id) == JobStatus.QC
+
+
+def test_worker_runs_keep_their_status(app, make_job, monitor, run_dir):
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(run_dir))
+    with app.app_context():
+        db.session.add(JobRun(job_id=job_id, state=RunState.RUNNING))
+        db.session.commit()
+    (run_dir / NEXTFLOW_LOG).write_text("Execution complete -- Goodbye\n")
+
+    report = monitor.poll()
+    assert report.finished == [(job_id, WorkflowState.SUCCEEDED)]
+    assert report.status_changes == []
+    assert _status(app, job_id) == JobStatus.IN_PROGRESS
+
+
+def test_new_log_starts_a_new_session(app, make_job, monitor, run_dir):
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(run_dir))
+    log = run_dir / NEXTFLOW_LOG
+    log.write_text("[ab/123456] Submitted process > A (1)\n[cd/789abc] Submitted process > A (2)\n")
+    monitor.poll()
+    assert _progress(app, job_id)[1]["submitted"] == 2
+
+    # -resume: Nextflow rotates the log to .nextflow.log.1 and starts a new one
+    os.rename(log, run_dir / (NEXTFLOW_LOG + ".1"))
+    log.write_text("[ef/abcdef] Submitted process > B (1)\n")
+    monitor.poll()
+    state, totals, _ = _progress(app, job_id)
+    assert (state, totals["submitted"]) == (WorkflowState.RUNNING, 1)
+
+
+def test_job_leaving_in_progress_stops_the_session(app, make_job, monitor, run_dir):
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(run_dir))
+    (run_dir / NEXTFLOW_LOG).write_text("[ab/123456] Submitted process > A (1)\n")
+    monitor.poll()
+    with app.app_context():
+        db.session.get(Job, job_id).status = JobStatus.WAITING_ON_DATA
+        db.session.commit()
+
+    assert monitor.poll().jobs_updated == 1
+    assert _progress(app, job_id)[0] == WorkflowState.STOPPED
+    assert _status(app, job_id) == JobStatus.WAITING_ON_DATA
+    assert monitor.poll().jobs_followed == 0
@@ -0,0 +1,90 @@
+import socket
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.jobs.runner import JobWorker, enqueue_run, request_cancel
+from app.models.job import Job, JobRun, JobStatus, RunDirState, RunState
+
+
+@pytest.fixture
+def runner_app(app):
+    app.config.update(RUNNER_SCRIPT="stub.sh", RUNNER_SHELL="sh", ADMISSION_ENABLED=False,
+                      RUNNER_KILL_GRACE=2)
+    return app
+
+
+def _job_with_script(app, make_job, tmp_path, name, body):
+    run_dir = tmp_path / "runs" / name
+    run_dir.mkdir(parents=True)
+    (run_dir / "stub.sh").write_text(body + "\n")
+    job_id = make_job(status=JobStatus.TRIAGED, run_dir=str(run_dir), run_dir_state=RunDirState.READY)
+    with app.app_context():
+        run = enqueue_run(db.session.get(Job, job_id), None)
+        db.session.commit()
+        return job_id, run.id
+
+
+def test_runs_succeed_fail_and_cancel(runner_app, make_job, tmp_path):
+    app = runner_app
+    ok = _job_with_script(app, make_job, tmp_path, "ok", "echo done")
+    bad = _job_with_script(app, make_job, tmp_path, "bad", "echo broken >&2; exit 3")
+    slow = _job_with_script(app, make_job, tmp_path, "slow", "sleep 30")
+
+    worker = JobWorker(app, slots=3, poll_interval=0.05)
+    assert worker._fill_slots() == 3
+    with app.app_context():
+        request_cancel(db.session.get(JobRun, slow[1]), None)
+        db.session.commit()
+    worker.run(once=True)
+
+    with app.app_context():
+        def outcome(job_run):
+            job_id, run_id = job_run
+            run = db.session.get(JobRun, run_id)
+            return run.state, run.exit_code, db.session.get(Job, job_id).status
+
+        assert outcome(ok) == (RunState.SUCCEEDED, 0, JobStatus.COMPLETED)
+        assert outcome(bad) == (RunState.FAILED, 3, JobStatus.QC)
+        state, _, status = outcome(slow)
+        assert (state, status) == (RunState.CANCELLED, JobStatus.TRIAGED)
+    assert (tmp_path / "runs" / "ok" / "stdout.log").read_text() == "done\n"
+    assert "broken" in (tmp_path / "runs" / "bad" / "stderr.log").read_text()
+
+
+def _orphaned_run(app, make_job, tmp_path, started_at):
+    process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    job_id = make_job(status=JobStatus.IN_PROGRESS, run_dir=str(tmp_path), run_dir_state=RunDirState.READY)
+    with app.app_context():
+        run = JobRun(job_id=job_id, state=RunState.RUNNING, worker=f"{socket.gethostname()}:1",
+                     pid=process.pid, started_at=started_at,
+                     heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+        db.session.add(run)
+        db.session.commit()
+        return process, run.id
+
+
+def test_stale_run_of_a_dead_worker_is_killed(runner_app, make_job, tmp_path):
+    process, run_id = _orphaned_run(runner_app, make_job, tmp_path, datetime.utcnow())
+    JobWorker(runner_app)._poll_runs()
+    assert process.wait(timeout=5) == -9
+    with runner_app.app_context():
+        run = db.session.get(JobRun, run_id)
+        assert run.state == RunState.FAILED
+        assert "killed 1 leftover process(es)" in run.error
+
+
+def test_reused_pid_is_left_alone(runner_app, make_job, tmp_path):
+    process, run_id = _orphaned_run(runner_app, make_job, tmp_path, datetime.utcnow() - timedelta(hours=2))
+    try:
+        JobWorker(runner_app)._poll_runs()
+        assert process.poll() is None
+        with runner_app.app_context():
+            run = db.session.get(JobRun, run_id)
+            assert run.state == RunState.FAILED
+            assert "killed" not in run.error
+    finally:
+        process.kill()
+        process.wait()
@@ -0,0 +1,44 @@
+from sqlalchemy import func
+
+from app.extensions import db
+from app.jobs.status_counts import adjust_status_count, status_counts
+from app.models import Job, JobStatus, JobStatusCount, Role
+
+
+def _group_by_status(app):
+    with app.app_context():
+        counted = {s: 0 for s in JobStatus.ALL}
+        counted.update(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        return counted, status_counts()
+
+
+def test_counts_follow_create_status_change_and_archive(app, client, make_job):
+    job_ids = [make_job() for _ in range(3)]
+    counted, cached = _group_by_status(app)
+    assert cached == counted
+    assert cached[JobStatus.SUBMITTED] == 3
+
+    client.post(f"/jobs/{job_ids[0]}/status", data={"status": JobStatus.IN_PROGRESS})
+    client.post(f"/jobs/{job_ids[1]}/status", data={"status": JobStatus.IN_PROGRESS})
+    client.post(f"/jobs/{job_ids[1]}/archive")
+    counted, cached = _group_by_status(app)
+    assert cached == counted
+    assert (cached[JobStatus.SUBMITTED], cached[JobStatus.IN_PROGRESS], cached[JobStatus.ARCHIVED]) == (1, 1, 1)
+
+    r = client.post("/jobs/api/wizard/submit", json={
+        "path": ["PRO", "TMT10", "MS2"],
+        "inputs": {"mzml_input_dir": "/data/mzml", "database": "/data/db.fasta", "out_dir": "/data/out"},
+    })
+    assert r.status_code == 201
+    counted, cached = _group_by_status(app)
+    assert cached == counted
+
+
+def test_first_change_into_a_status_upserts_its_row(app):
+    with app.app_context():
+        assert db.session.get(JobStatusCount, JobStatus.QC) is None
+        adjust_status_count(JobStatus.QC, 1)
+        adjust_status_count(JobStatus.QC, 2)
+        adjust_status_count(JobStatus.QC, -1)
+        db.session.commit()
+        assert db.session.get(JobStatusCount, JobStatus.QC).count == 2
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import JobEvent
+
+T0 = datetime(2026, 5, 1, 12, 0)
+
+
+def _add_events(app, job_id, specs):
+    """specs: (event_type, minutes after T0); returns the new ids in order."""
+    with app.app_context():
+        events = [JobEvent(job_id=job_id, actor_user_id=1, event_type=t, payload_json={"n": i},
+                           created_at=T0 + timedelta(minutes=m)) for i, (t, m) in enumerate(specs)]
+        db.session.add_all(events)
+        db.session.commit()
+        return [e.id for e in events]
+
+
+def _walk(client, url):
+    seen, cursor = [], None
+    while True:
+        r = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert r.status_code == 200
+        seen.append([e["id"] for e in r.json["events"]])
+        cursor = r.json["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_timeline_pages_newest_first_without_gaps(app, client, make_job):
+    job_id = make_job()
+    # three events share a timestamp, so the id breaks the tie
+    ids = _add_events(app, job_id, [("ASSIGNED", 0), ("STATUS_CHANGED", 5), ("EXPORTED_JSON", 5),
+                                    ("EXPORTED_JSON", 5), ("CONFIG_UPDATED", 9)])
+    other = make_job(project_name="Other")
+    _add_events(app, other, [("ASSIGNED", 3)])
+
+    pages = _walk(client, f"/jobs/{job_id}/events?limit=2")
+    assert pages == [[ids[4], ids[3]], [ids[2], ids[1]], [ids[0]]]
+
+    first = client.get(f"/jobs/{job_id}/events?limit=1").json["events"][0]
+    assert first == {"id": ids[4], "type": "CONFIG_UPDATED", "actor": 1,
+                     "at": (T0 + timedelta(minutes=9)).isoformat(), "payload": {"n": 4}}
+
+
+def test_timeline_type_filter_and_errors(app, client, make_job):
+    job_id = make_job()
+    ids = _add_events(app, job_id, [("ASSIGNED", 0), ("STATUS_CHANGED", 1), ("EXPORTED_JSON", 2)])
+
+    assert _walk(client, f"/jobs/{job_id}/events?type=ASSIGNED,EXPORTED_JSON") == [[ids[2], ids[0]]]
+    assert _walk(client, f"/jobs/{job_id}/events?type=ASSIGNED&type=STATUS_CHANGED") == [[ids[1], ids[0]]]
+    assert client.get(f"/jobs/{job_id}/events?cursor=not-a-cursor").status_code == 400
+    assert client.get("/jobs/999/events").status_code == 404
+
+
+def test_timeline_query_uses_the_job_created_at_index(app, client, make_job):
+    job_id = make_job()
+    _add_events(app, job_id, [("ASSIGNED", m) for m in range(5)])
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM job_events" in statement and "LIMIT" in statement:
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        cursor = client.get(f"/jobs/{job_id}/events?limit=2").json["next_cursor"]
+        client.get(f"/jobs/{job_id}/events?limit=2&cursor={cursor}")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(captured) == 2
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            assert "ix_job_events_job_id_created_at" in plan
+            assert "TEMP B-TREE" not in plan
+
+
+def test_job_detail_loads_history_from_the_timeline(client, make_job):
+    job_id = make_job()
+    page = client.get(f"/jobs/{job_id}").get_data(as_text=True)
+    assert f"/jobs/{job_id}/events?limit=50" in page
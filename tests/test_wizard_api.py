@@ -0,0 +1,183 @@
+def test_session_choose_and_back(client):
+    r = client.post("/jobs/api/wizard/sessions")
+    assert r.status_code == 201
+    sid = r.json["id"]
+    assert r.json["path"] == []
+    assert r.json["options"] == ["HLA", "PRO"]
+
+    for choice in ("PRO", "TMT10", "MS2", "SEMI"):
+        r = client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": choice})
+        assert r.status_code == 200
+    assert r.json["path"] == ["PRO", "TMT10", "MS2", "SEMI"]
+    assert r.json["profile"] == "PRO_TMT10MS2_SEMI"
+
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/back")
+    assert r.status_code == 200
+    assert r.json["path"] == ["PRO", "TMT10", "MS2"]
+    assert r.json["profile"] == "PRO_TMT10MS2"
+    assert r.json["status"] == "ready"
+
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": "nope"})
+    assert r.status_code == 400
+
+
+def test_session_midtree_has_no_profile(client):
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": "PRO"})
+    assert r.json["profile"] is None
+    assert r.json["status"] == "draft"
+
+
+def test_steps_batch(client):
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/steps", json={"operations": [
+        {"op": "choose", "choice": "HLA"},
+        {"op": "choose", "choice": "LF"},
+        {"op": "back"},
+        {"op": "choose", "choice": "TMT10"},
+        {"op": "set_inputs", "inputs": {"mzml_input_dir": "/data/mzml", "database": "/data/db.fasta",
+                                        "out_dir": "/data/out"}},
+    ]})
+    assert r.status_code == 200
+    assert r.json["path"] == ["HLA", "TMT10"]
+    assert r.json["profile"] == "HLA_TMT10"
+    assert r.json["complete"] is True
+    assert r.json["missing"] == []
+
+    # the batch was saved: the next single step continues from it
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/back")
+    assert r.json["path"] == ["HLA"]
+    assert r.json["inputs"]["out_dir"] == "/data/out"
+
+
+def test_steps_batch_rejects_whole_batch(client):
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/steps", json={"operations": [
+        {"op": "choose", "choice": "HLA"},
+        {"op": "choose", "choice": "nope"},
+    ]})
+    assert r.status_code == 400
+    assert r.json["step"] == 1
+
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/steps", json={"operations": []})
+    assert r.json["path"] == []
+
+
+def test_drafts_reach_the_table_when_idle_or_submitted(app, client):
+    from app.extensions import db
+    from app.jobs.wizard_store import get_wizard_store
+    from app.models.wizard_session import WizardSession
+
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    for choice in ("PRO", "TMT10", "MS2"):
+        client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": choice})
+
+    with app.app_context():
+        # wizard clicks only touch the draft store
+        assert db.session.query(WizardSession).count() == 0
+
+        store = get_wizard_store()
+        store.idle_seconds = 0
+        assert store.flush_idle() == 1
+        ws = WizardSession.query.filter_by(draft_key=sid).one()
+        assert ws.path == ["PRO", "TMT10", "MS2"]
+        assert ws.profile == "PRO_TMT10MS2"
+        store.idle_seconds = 1800
+
+    # the flushed draft is read back from the table and carries on
+    r = client.patch(f"/jobs/api/wizard/sessions/{sid}/inputs", json={
+        "mzml_input_dir": "/data/mzml", "database": "/data/db.fasta", "out_dir": "/data/out"})
+    assert r.json["path"] == ["PRO", "TMT10", "MS2"]
+
+    r = client.post(f"/jobs/api/wizard/sessions/{sid}/submit")
+    assert r.status_code == 201
+    with app.app_context():
+        rows = WizardSession.query.filter_by(draft_key=sid).all()
+        assert len(rows) == 1
+        assert rows[0].id == r.json["wizard_session_id"]
+        assert rows[0].status == "submitted"
+        assert rows[0].inputs["out_dir"] == "/data/out"
+
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/submit").status_code == 409
+
+
+def test_draft_sweeper_flushes_idle_drafts(app, client):
+    from app.jobs.wizard_expiry import draft_sweeper
+    from app.jobs.wizard_store import get_wizard_store
+    from app.models.wizard_session import WizardSession
+
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    with app.app_context():
+        get_wizard_store().idle_seconds = 0
+    draft_sweeper.sweep()
+    with app.app_context():
+        assert WizardSession.query.filter_by(draft_key=sid).count() == 1
+
+
+def test_new_wizard_page_submits_to_the_api(client):
+    page = client.get("/jobs/new-wizard").get_data(as_text=True)
+    assert "/jobs/api/wizard/submit" in page
+
+
+def test_one_shot_submit_keeps_the_profile(app, client):
+    from app.extensions import db
+    from app.models import Job
+
+    r = client.post("/jobs/api/wizard/submit", json={
+        "path": ["PRO", "TMT10", "MS2"],
+        "inputs": {"mzml_input_dir": "/data/mzml", "database": "/data/db.fasta", "out_dir": "/data/out",
+                   "project_name": "Tumour panel", "priority": "HIGH"},
+    })
+    assert r.status_code == 201
+    assert r.json["profile"] == "PRO_TMT10MS2"
+    with app.app_context():
+        job = db.session.get(Job, r.json["job_id"])
+        assert job.nf_profile == "PRO_TMT10MS2"
+        assert job.priority == "HIGH"
+        assert job.project.name == "Tumour panel"
+
+    r = client.post("/jobs/api/wizard/submit", json={"path": ["PRO", "TMT10", "MS2"], "inputs": {}})
+    assert r.status_code == 400
+    assert "out_dir" in r.json["missing"]
+
+
+def test_submitted_session_cannot_be_reopened(app, client):
+    from app.models import Job
+
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    client.post(f"/jobs/api/wizard/sessions/{sid}/steps", json={"operations": [
+        {"op": "choose", "choice": "PRO"},
+        {"op": "choose", "choice": "TMT10"},
+        {"op": "choose", "choice": "MS2"},
+        {"op": "set_inputs", "inputs": {"mzml_input_dir": "/data/mzml", "database": "/data/db.fasta",
+                                        "out_dir": "/data/out"}},
+    ]})
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/submit").status_code == 201
+
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/back").status_code == 409
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": "LF"}).status_code == 409
+    assert client.patch(f"/jobs/api/wizard/sessions/{sid}/inputs", json={"out_dir": "/x"}).status_code == 409
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/steps", json={"operations": []}).status_code == 409
+    assert client.post(f"/jobs/api/wizard/sessions/{sid}/submit").status_code == 409
+    with app.app_context():
+        assert Job.query.count() == 1
+
+
+def test_drafts_are_not_reachable_by_row_id(app, client):
+    from app.extensions import db
+    from app.models.wizard_session import WizardSession
+
+    sid = client.post("/jobs/api/wizard/sessions").json["id"]
+    client.post(f"/jobs/api/wizard/sessions/{sid}/choose", json={"choice": "PRO"})
+    with app.app_context():
+        db.session.add(WizardSession(path=["HLA"], inputs={}, status="draft"))
+        db.session.commit()
+        keyed = WizardSession(draft_key=sid, path=["PRO"], inputs={}, status="draft")
+        db.session.add(keyed)
+        db.session.commit()
+        legacy_id, keyed_id = 1, keyed.id
+
+    assert client.post(f"/jobs/api/wizard/sessions/{keyed_id}/back").status_code == 404
+    r = client.post(f"/jobs/api/wizard/sessions/{legacy_id}/back")
+    assert r.status_code == 200
+    assert r.json["id"] == str(legacy_id)